@@ -4,6 +4,7 @@ import os
 import requests
 from alpaca.trading.client import TradingClient
 from supabase import create_client
+from src.dashboard_data import TradingLogCache, downsample_frame
 
 st.set_page_config(page_title="Antigravity Terminal", layout="wide")
 
@@ -41,6 +42,10 @@ def init_clients():
     sb = create_client(sb_url, sb_key)
     return alpaca, sb
 
+@st.cache_resource
+def init_log_cache(_sb):
+    return TradingLogCache(_sb)
+
 try:
     alpaca, supabase = init_clients()
     account = alpaca.get_account()
@@ -53,12 +58,13 @@ try:
     m1.metric("Wallet Balance", f"${float(account.equity):,.2f}")
     m2.metric("Cash Available", f"${float(account.cash):,.2f}")
     
-    # Leer historial de Supabase
-    res = supabase.table("trading_logs").select("*").order("created_at", desc=True).limit(100).execute()
-    df = pd.DataFrame(res.data)
+    # Leer historial de Supabase (incremental: solo filas nuevas desde el último created_at)
+    log_cache = init_log_cache(supabase)
+    log_cache.refresh()
+    df = log_cache.frame()
 
     if not df.empty:
-        last = df.iloc[0]
+        last = df.iloc[-1]
         m3.metric("Realized PnL", f"{last.get('pnl', 0):.2f}%")
         # Color dinámico para el sentimiento
         sent = last['sentiment']
@@ -69,13 +75,12 @@ try:
         st.divider()
         st.subheader("📈 Market Overview")
         # LIMPIEZA: Solo graficar si el precio es mayor a 1000 (evita los ceros que vimos en tu captura)
-        df_plot = df[df['price'] > 1000].copy()
-        df_plot['created_at'] = pd.to_datetime(df_plot['created_at'])
+        df_plot = downsample_frame(df[df['price'] > 1000], 'created_at', 'price', n_out=2000)
         st.line_chart(df_plot.set_index('created_at')['price'])
 
         # --- LOGS RECIENTES ---
         st.subheader("📜 Recent History")
-        st.dataframe(df[['created_at', 'action', 'price', 'sentiment']], use_container_width=True)
+        st.dataframe(df[['created_at', 'action', 'price', 'sentiment']].iloc[::-1].head(500), use_container_width=True)
     else:
         st.info("Esperando datos de la base de datos...")
 
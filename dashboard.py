@@ -4,6 +4,7 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from supabase import create_client, Client
+from src.dashboard_data import TradingLogCache, downsample_frame
 
 # --- Configuration ---
 st.set_page_config(page_title="Crypto Bot Dashboard", layout="wide", page_icon="🤖")
@@ -19,39 +20,39 @@ def init_supabase():
 
 supabase = init_supabase()
 
-def get_data():
+@st.cache_resource
+def init_log_cache():
+    # Persiste entre reruns: cada interacción solo pide filas nuevas a Supabase
+    return TradingLogCache(supabase)
+
+log_cache = init_log_cache()
+
+def get_data(force=False):
     if not supabase:
         st.error("Missing Supabase credentials.")
         return pd.DataFrame()
     
-    # Fetch logs from Supabase
+    # Fetch only rows newer than the last cached created_at
     try:
-        response = supabase.table("trading_logs").select("*").order("created_at", desc=True).limit(100).execute()
-        data = response.data
-        if not data:
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(data)
-        df['created_at'] = pd.to_datetime(df['created_at'])
-        return df
+        log_cache.refresh(force=force)
+        return log_cache.frame()
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return pd.DataFrame()
+        return log_cache.frame()
 
 # --- Layout ---
 st.title("🤖 Crypto Trading Bot - Command Center")
 
 # Refresh Button
-if st.button("🔄 Update Data"):
-    st.cache_data.clear()
+force_refresh = st.button("🔄 Update Data")
 
-df = get_data()
+df = get_data(force=force_refresh)
 
 if df.empty:
     st.warning("No trading data found yet.")
 else:
     # --- KPIs ---
-    latest_entry = df.iloc[0]
+    latest_entry = df.iloc[-1]
     current_price = latest_entry.get('price', 0)
     current_sentiment = latest_entry.get('sentiment', 'NEUTRAL')
     current_confidence = latest_entry.get('confidence', 0.0)
@@ -78,8 +79,9 @@ else:
 
     with c1:
         st.subheader("Price Evolution")
-        # Line Chart for Price
-        fig_price = px.line(df, x='created_at', y='price', title='Asset Price Over Time', markers=True)
+        # Line Chart for Price (downsampled so months of history stay smooth)
+        df_plot = downsample_frame(df, 'created_at', 'price', n_out=2000)
+        fig_price = px.line(df_plot, x='created_at', y='price', title='Asset Price Over Time', markers=len(df_plot) < 200)
         # Color line based on sentiment trend if possible, simpler: just price
         fig_price.update_layout(xaxis_title="Time", yaxis_title="Price (USDT)")
         st.plotly_chart(fig_price, use_container_width=True)
@@ -116,4 +118,4 @@ else:
 
     # --- Data Table ---
     st.subheader("Recent Trading Logs")
-    st.dataframe(df[['created_at', 'action', 'price', 'sentiment', 'confidence', 'pnl']], use_container_width=True)
+    st.dataframe(df[['created_at', 'action', 'price', 'sentiment', 'confidence', 'pnl']].iloc[::-1].head(500), use_container_width=True)
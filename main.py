@@ -1,29 +1,38 @@
 import os
+import sys
 import time
-from datetime import datetime
+from datetime import datetime, timezone
+
+_STARTUP_T0 = time.perf_counter()
 
 # Ensure logs are not buffered
 os.environ["PYTHONUNBUFFERED"] = "1"
 import json
+import hashlib
 import logging
 import threading
-import uvicorn
-from fastapi import FastAPI, HTTPException, Header, Depends
+from fastapi import FastAPI, HTTPException, Depends
 from pydantic import BaseModel
 from src.data_loader import DataLoader
 from src.model import RemoteSentimentAnalyzer, PricePredictor
-from src.trader import Trader
-from src.utils import add_indicators
+from src.candle_buffer import CandleBuffer
+from src.timeframes import MultiTimeframeEngine
 from src.notion_logger import NotionLogger
 from src.supabase_logger import SupabaseLogger
 from src.telegram_logger import TelegramLogger
+from src.heartbeat import HeartbeatAggregator
+from src.snapshot import StateSnapshotter
+from src.clock import SystemClock
+from src.signal_book import SignalBook
+from src.mem_profiler import MemoryProfiler
+from src.serving import FastJSONResponse, PreEncoded, OpenClawSignal, OPENCLAW_SECRET, verify_token, loads
 from src.news_fetcher import NewsFetcher
 from src.whale_fetcher import WhaleFetcher
 
 logging.basicConfig(level=logging.INFO)
 
 # --- FastAPI Setup ---
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 
 # Global analyzer & trader instances
 analyzer = None
@@ -31,12 +40,21 @@ trader = None
 
 # Global state for OpenClaw integration
 latest_market_data = {}
-openclaw_input = {}
-latest_market_data_lock = threading.Lock()
 latest_market_data_lock = threading.Lock()
-openclaw_input_lock = threading.Lock()
+market_status = PreEncoded()  # /market/status ya codificado, se renueva una vez por ciclo
+shared_state = None  # SharedState cuando la API corre en otro proceso (API_MODE=process)
+# Historial acotado por agente (source); el bucle lee el consenso de las señales vigentes
+openclaw_signals = SignalBook(capacity=int(os.getenv("OPENCLAW_SIGNAL_CAPACITY", "256")), window=300)
 last_loop_time = 0.0
 last_loop_time_lock = threading.Lock()
+order_notion = None  # NotionLogger de /openclaw/orders, uno para todo el proceso
+# Slots del bucle por símbolo y símbolo principal: /openclaw/orders opera a través
+# de ellos, con el mismo fencing por lease que el bucle
+symbol_slots = {}
+main_symbol = None
+shard_coordinator = None
+# RSS cada N ciclos; MEMORY_PROFILE=1 añade tracemalloc (se arranca aquí para ver también el arranque)
+memory_profiler = MemoryProfiler()
 
 class SentimentRequest(BaseModel):
     texts: list[str]
@@ -47,6 +65,7 @@ class OrderRequest(BaseModel):
     reason: str = "OpenClaw_Direct"
     sentiment: str = "NEUTRAL"
     confidence: float = 0.5
+    symbol: str = None  # None = símbolo principal
 
 @app.post("/analyze")
 def analyze_sentiment(request: SentimentRequest):
@@ -61,7 +80,7 @@ def analyze_sentiment(request: SentimentRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/")
-def health_check():
+async def health_check():
     global last_loop_time
     status = "running"
     
@@ -78,71 +97,74 @@ def health_check():
     }
 
 @app.get("/wake_up")
-def wake_up():
+async def wake_up():
     """Endpoint for OpenClaw to poke the bot and ensure it's awake."""
     return {"status": "awake", "timestamp": time.time()}
 
 # --- OpenClaw Integration Endpoints ---
-OPENCLAW_SECRET = os.getenv("OPENCLAW_SECRET", "changeme_in_production")
-
-def verify_token(x_auth_token: str = Header(None, alias="X-Auth-Token")):
-    if x_auth_token != OPENCLAW_SECRET:
-        raise HTTPException(status_code=401, detail="Invalid Authentication Token")
-    return x_auth_token
-
-class OpenClawSignal(BaseModel):
-    signal: str  # "buy", "sell", "hold"
-    confidence: float
-    sentiment_analysis: str
-    timestamp: str = None
-    source: str = "OpenClaw"
-    additional_data: dict = {}
+# OPENCLAW_SECRET, verify_token y OpenClawSignal viven en src/serving.py (compartidos con src/api_process.py)
 
 @app.get("/market/status")
-def get_market_status():
-    logging.info("Endpoint /market/status accessed")
-    with latest_market_data_lock:
-        return latest_market_data
+async def get_market_status():
+    # Bytes ya codificados por el bucle: ni lock ni serialización por petición
+    return market_status.response()
 
 # Alias for plural to avoid 404s
 @app.get("/markets/status")
-def get_markets_status():
-    return get_market_status()
+async def get_markets_status():
+    return market_status.response()
+
+def ingest_openclaw_signal(signal, confidence, sentiment_analysis, source="OpenClaw", additional_data=None, ts=None):
+    """Stores an OpenClaw signal for the bot loop (HTTP endpoints and replay share this path)."""
+    return openclaw_signals.add(signal, confidence, sentiment_analysis, source, additional_data, ts)
 
 @app.post("/openclaw/signal", dependencies=[Depends(verify_token)])
-def receive_openclaw_signal(body: OpenClawSignal):
-    global openclaw_input
-    with openclaw_input_lock:
-        openclaw_input = {
-            "signal": body.signal,
-            "sentiment": body.sentiment_analysis, # Map to internal logic
-            "confidence": body.confidence,
-            "reason": body.sentiment_analysis,
-            "timestamp": time.time(),
-            "source": body.source,
-            "additional_data": body.additional_data
-        }
-    return {"status": "Signal received", "data": openclaw_input}
+async def receive_openclaw_signal(body: OpenClawSignal):
+    data = ingest_openclaw_signal(body.signal, body.confidence, body.sentiment_analysis,
+                                  body.source, body.additional_data)
+    return {"status": "Signal received", "data": data}
+
+@app.post("/openclaw/signals", dependencies=[Depends(verify_token)])
+async def receive_openclaw_signals(body: list[OpenClawSignal]):
+    """Bulk ingestion: many signals (from one or several agents) in a single request."""
+    records = openclaw_signals.extend([s.model_dump() for s in body])
+    return {"status": "Signals received", "count": len(records), "consensus": openclaw_signals.consensus()}
+
+@app.get("/openclaw/signals", dependencies=[Depends(verify_token)])
+async def get_openclaw_signals(seconds: float = 3600, source: str = None):
+    since = time.time() - seconds
+    return {
+        "signals": openclaw_signals.window_query(since, source=source),
+        "counts": openclaw_signals.counts(since),
+        "consensus": openclaw_signals.consensus(),
+        "stats": openclaw_signals.stats(),
+    }
 
 @app.post("/openclaw/orders", dependencies=[Depends(verify_token)])
 def place_openclaw_order(order: OrderRequest):
-    global trader
-    if not trader:
-        raise HTTPException(status_code=503, detail="Trader not initialized")
+    global order_notion
+    symbol = order.symbol or main_symbol
+    if shard_coordinator and not shard_coordinator.owns(symbol):
+        raise HTTPException(status_code=409, detail=f"{symbol} is traded by another node")
+    slot = symbol_slots.get(symbol)
+    if slot is None:
+        raise HTTPException(status_code=503, detail=f"Trader for {symbol} not initialized on this node")
     
     # Get current price from cache
     current_price = 0.0
     with latest_market_data_lock:
-        current_price = latest_market_data.get("current_price", 0.0)
+        current_price = latest_market_data.get("symbols", {}).get(symbol, {}).get("current_price", 0.0)
     
     if current_price <= 0:
         raise HTTPException(status_code=503, detail="Market data unavailable (price=0)")
 
-    action_result = trader.place_order(order.side, order.amount, current_price, order.reason)
+    action_result = slot.place_order(order.side, order.amount, current_price, order.reason)
     if action_result:
         # Log to Notion (Requested by User)
         try:
-            notion = NotionLogger()
+            if order_notion is None:
+                order_notion = NotionLogger()
+            notion = order_notion
             # Calculate Profit (0 for open, PnL only for close)
             # This is simpler logic than run_bot_loop but sufficient for direct orders
             profit = 0.0 
@@ -165,236 +187,500 @@ def place_openclaw_order(order: OrderRequest):
     else:
         raise HTTPException(status_code=400, detail="Order Failed (Check balance or position)")
 
+@app.get("/debug/memory", dependencies=[Depends(verify_token)])
+def get_memory_profile(sample: bool = False):
+    """Memory report of the bot process; sample=true takes a snapshot now (gc + tracemalloc, slow)."""
+    if sample:
+        memory_profiler.sample()
+    return memory_profiler.status()
+
 # --- Bot Logic ---
-def run_bot_loop():
-    global analyzer, trader
+class SymbolSlot:
+    """Per-symbol state of the loop: trader, candle buffer, multi-timeframe engine and heartbeat window."""
+    def __init__(self, symbol, trader, settings, heartbeat, coordinator=None):
+        self.symbol = symbol
+        self.trader = trader
+        self.coordinator = coordinator
+        trader.stop_loss_pct = settings['stop_loss_pct']
+        trader.take_profit_pct = settings['take_profit_pct']
+        # Velas + indicadores en un buffer circular preasignado: cada ciclo solo escribe
+        # las velas nuevas/revisadas y no se crean DataFrames nuevos
+        self.candles = CandleBuffer(settings.get('candle_buffer_bars', 48))
+        # CoinGecko (days=1) entrega velas de 30m: los timeframes superiores se derivan
+        # de esa única descarga en lugar de pedir cada timeframe por separado.
+        self.mtf = MultiTimeframeEngine(
+            settings.get('base_timeframe', '30m'),
+            settings.get('higher_timeframes', []),
+            settings=settings
+        )
+        # Los ciclos HOLD se agregan en memoria y se escriben como un resumen por ventana
+        self.heartbeat = heartbeat
+        self.df = None
+        self.warm_df = None
+        self.timeframes_summary = {}
+
+    def owns(self):
+        return self.coordinator is None or self.coordinator.owns(self.symbol)
+
+    def place_order(self, side, amount, price, reason):
+        """trader.place_order, fenced by the lease: None if this node no longer owns the symbol."""
+        # Fencing: el lease pudo caducar durante el ciclo; sin él no se opera
+        if not self.owns():
+            logging.warning(f"🔒 Lease for {self.symbol} lost. {side} order skipped.")
+            return None
+        return self.trader.place_order(side, amount, price, reason)
+
+    def get_state(self):
+        return {"heartbeat": self.heartbeat.get_state(), "mtf": self.mtf.get_state(), "last_candles": self.df}
+
+    def set_state(self, state, age):
+        if not state:
+            return
+        self.heartbeat.set_state(state.get('heartbeat'))
+        # Velas e indicadores solo si el snapshot es más reciente que ~2 velas base
+        if age < 2 * 3600 and self.mtf.set_state(state.get('mtf', {})):
+            self.warm_df = state.get('last_candles')
+
+def run_bot_loop(settings=None, clock=None, loader=None, fetcher=None, whale_tracker=None,
+                 bot_trader=None, bot_analyzer=None, notion=None, supabase=None, telegram=None,
+                 snapshotter=None, stop=None):
+    """
+    Main trading loop. With no arguments it runs live; every dependency can be
+    injected (see src/replay.py, which drives this same code on a virtual clock).
+    `stop` is an optional callable checked before each cycle.
+    """
+    global analyzer, trader, last_loop_time, main_symbol, shard_coordinator
     logging.info("Starting Trading Bot Loop...")
+    clock = clock or SystemClock()
     
-    # Wait 10 seconds to allow server to start and system to settle
-    time.sleep(10)
+    live = settings is None
+    if live:
+        with open('config/settings.json') as f:
+            settings = json.load(f)
+
+        # Force Alpaca standard symbol
+        settings['symbol'] = 'BTC/USD'
+
+    # Modo cluster: varias réplicas se reparten los símbolos con leases en Redis
+    cluster = os.getenv("CLUSTER_ENABLED", str(settings.get('cluster_enabled', False))).lower() == "true"
+
+    loader = loader or DataLoader()
+
+    def make_trader(symbol):
+        # Lazy import: alpaca / upstash_redis solo se cargan cuando hay credenciales (ver Trader)
+        from src.trader import Trader
+        return Trader(symbol, state_prefix=f"trader:{symbol}" if cluster else "trader")
+
+    if bot_trader is None:
+        bot_trader = make_trader(settings['symbol'])
+    trader = bot_trader
+
+    if live and snapshotter is None:
+        # Warm restart: estado del último snapshot (velas, indicadores, sentimiento...).
+        # En Redis si lo hay (el disco del Space no sobrevive a un reinicio); en cluster
+        # cada nodo guarda el suyo en disco para no pisarse la misma clave
+        snapshotter = StateSnapshotter(redis=None if cluster else trader.redis,
+                                       every_cycles=settings.get('snapshot_every_cycles', 5))
+
+    snap = snapshotter.load() if snapshotter else None
+    if snap:
+        logging.info(f"♻️ Warm restart from snapshot ({snap['age']:.0f}s old, cycle {snap.get('cycle', 0)})")
+
+    # Wait to allow server to start and system to settle (shorter when warm)
+    clock.sleep(2 if snap else 10)
+    if bot_analyzer is not None:
+        analyzer = bot_analyzer
     
-    with open('config/settings.json') as f:
-        settings = json.load(f)
-    
-    # Force Alpaca standard symbol
-    settings['symbol'] = 'BTC/USD'
+    coordinator = None
+    if cluster:
+        if trader.redis:
+            from src.coordination import ShardCoordinator, RedisLeaseBackend
+            coordinator = ShardCoordinator(
+                RedisLeaseBackend(trader.redis),
+                settings.get('cluster_symbols', [settings['symbol']]),
+                lease_ttl=settings.get('cluster_lease_ttl', 30)
+            ).start()
+            logging.info(f"🛰️ Cluster node {coordinator.node_id} | Owned symbols: {coordinator.my_symbols()}")
+        else:
+            logging.warning("⚠️ Cluster mode needs Redis. Running as a single node.")
 
-    loader = DataLoader()
-    trader = Trader(settings['symbol'])
-    trader.stop_loss_pct = settings['stop_loss_pct']
-    trader.take_profit_pct = settings['take_profit_pct']
-    
     if analyzer is None:
         if os.getenv("SPACE_ID"):
-            logging.info("Initializing Local Sentiment Analyzer (Server Mode)...")
-            from src.model import SentimentAnalyzer
-            analyzer = SentimentAnalyzer()
+            logging.info("Initializing Shared Sentiment Analyzer (Server Mode)...")
+            analyzer = load_server_analyzer()
         else:
             logging.info("Initializing Remote Sentiment Analyzer (Client Mode)...")
             analyzer = RemoteSentimentAnalyzer()
-            # 1. Wake up the Space with a Ping
-            analyzer.check_status()
+            # 1. Wake up the Space with a Ping (skip if it answered right before the restart)
+            if not (snap and snap.get('remote_ok') and snap['age'] < 600):
+                analyzer.check_status()
 
     predictor = PricePredictor()
-    notion = NotionLogger()
-    supabase = SupabaseLogger()
-    telegram = TelegramLogger()
-    fetcher = NewsFetcher()
-    whale_tracker = WhaleFetcher()
+    notion = notion or NotionLogger()
+    supabase = supabase or SupabaseLogger()
+    telegram = telegram or TelegramLogger()
+    fetcher = fetcher or NewsFetcher()
+    whale_tracker = whale_tracker or WhaleFetcher()
+    logging.info(f"⏱️ Bot ready {time.perf_counter() - _STARTUP_T0:.2f}s after process start")
 
     last_news_time = 0
     cached_sent, cached_conf = "NEUTRAL", 0.5
+    analyzed_context = set() # Hashes del último contexto analizado (dedup de noticias)
+    remote_ok = False
+    cycle = 0
+
+    if snap:
+        last_news_time = snap.get('last_news_time', 0)
+        cached_sent, cached_conf = snap.get('sentiment', (cached_sent, cached_conf))
+        analyzed_context = set(snap.get('analyzed_context', ()))
+        remote_ok = snap.get('remote_ok', False)
+        cycle = snap.get('cycle', 0)
+
+    # Un slot por símbolo operado (trader, velas, multi-timeframe, latidos).
+    # En modo cluster el nodo opera todos los símbolos cuyo lease tiene.
+    slots = symbol_slots
+    slots.clear()
+    main_symbol, shard_coordinator = settings['symbol'], coordinator
+
+    def get_slot(symbol):
+        slot = slots.get(symbol)
+        if slot is None:
+            slot = slots[symbol] = SymbolSlot(
+                symbol, trader if symbol == settings['symbol'] else make_trader(symbol), settings,
+                HeartbeatAggregator(supabase, notion, settings.get('heartbeat_rollup_minutes', 15)), coordinator)
+            if snap:
+                # Snapshots anteriores guardaban un único símbolo en la raíz
+                state = snap['symbols'].get(symbol) if 'symbols' in snap else snap if symbol == settings['symbol'] else None
+                slot.set_state(state, snap['age'])
+        return slot
+
+    def snapshot_state():
+        return {
+            "cycle": cycle,
+            "last_news_time": last_news_time,
+            "sentiment": (cached_sent, cached_conf),
+            "analyzed_context": sorted(analyzed_context),
+            "remote_ok": remote_ok,
+            "symbols": {symbol: slot.get_state() for symbol, slot in slots.items()},
+        }
 
-    while True:
+    def refresh_sentiment():
+        # 2. IA y Noticias (Obtener noticias y sentimiento ANTES de riesgo)
+        nonlocal last_news_time, cached_sent, cached_conf, analyzed_context, remote_ok
         try:
-            with last_loop_time_lock:
-                last_loop_time = time.time()
+            if (clock.time() - last_news_time) > (settings['news_fetch_interval_minutes'] * 60):
+                news = fetcher.get_latest_news()
+                whale_txts, whale_bias = whale_tracker.get_latest_movements()
                 
-            telegram.send_message("🔄 Iniciando ciclo de trading...")
-            logging.info("Bot cycle: Fetching data...")
-            df = loader.fetch_ohlcv(settings['symbol'], settings['timeframe'])
-            if df.empty: 
-                time.sleep(60); continue
-            
-            # Prepare Data
-            current_price = float(df['close'].iloc[-1])
-            df = add_indicators(df, settings)
-
-
-            # Calculate Trend
-            sma_50 = df['sma_50'].iloc[-1] if 'sma_50' in df else current_price
-            trend = "up" if current_price > sma_50 else "down"
-
-            # Update Global State for OpenClaw
-            with latest_market_data_lock:
-                latest_market_data.update({
-                    "current_price": current_price,
-                    "rsi": float(df['rsi'].iloc[-1]) if 'rsi' in df else 50.0,
-                    "trend": trend,
-                    "volume": float(df['volume'].iloc[-1]) if 'volume' in df else 0.0,
-                    "avg_volume": float(df['volume'].mean()) if 'volume' in df else 0.0,
-                    "moving_average": float(sma_50),
-                    "timestamp": datetime.now().isoformat()
-                })
-
-            # 2. IA y Noticias (Obtener noticias y sentimiento ANTES de riesgo)
-            try:
-                if (time.time() - last_news_time) > (settings['news_fetch_interval_minutes'] * 60):
-                    news = fetcher.get_latest_news()
-                    whale_txts, whale_bias = whale_tracker.get_latest_movements()
-                    
-                    combined_context = news + whale_txts
+                combined_context = news + whale_txts
+                
+                context_hashes = {hashlib.sha1(t.encode("utf-8")).hexdigest()[:16] for t in combined_context}
+                if combined_context and context_hashes == analyzed_context:
+                    logging.info("Context unchanged since last analysis. Keeping cached sentiment.")
+                elif combined_context:
+                    # 3. Consultar sentimiento a la API del Space (Cerebro Unificado)
+                    logging.info(f"Analyzing context: {len(news)} news + {len(whale_txts)} whale signals...")
+                    cached_sent, cached_conf = analyzer.analyze(combined_context)
+                    analyzed_context = context_hashes
+                    remote_ok = True
+                else:
+                    logging.info("No new context (news/whales) to analyze.")
                     
-                    if combined_context:
-                        # 3. Consultar sentimiento a la API del Space (Cerebro Unificado)
-                        logging.info(f"Analyzing context: {len(news)} news + {len(whale_txts)} whale signals...")
-                        cached_sent, cached_conf = analyzer.analyze(combined_context)
-                    else:
-                        logging.info("No new context (news/whales) to analyze.")
-                        
-                    last_news_time = time.time()
+                last_news_time = clock.time()
+        except Exception as e:
+            logging.error(f"⚠️ Error en módulo de noticias/IA: {e}")
+
+    def openclaw_action():
+        # Check OpenClaw Signals but ensure thread safety
+        oc_action = None
+        consensus = openclaw_signals.consensus(clock.time())  # 5 mins expiry
+        if consensus:
+            logging.info(f"🦁 OpenClaw Signal Detected: {consensus}")
+
+            # Convert unstructured sentiment description to strictly BULLISH/BEARISH if possible, 
+            # or just rely on the 'signal' field.
+            # For now we use the signal to override action.
+
+            if consensus.get("confidence", 0) > 0.7: # High confidence threshold
+                 logging.info(f"🦁 OpenClaw High Confidence Signal: {consensus.get('signal')} ({consensus['sources']} sources)")
+                 if consensus.get("signal") in ["buy", "sell"]:
+                     oc_action = consensus.get("signal")
+        return oc_action
+
+    def trade_symbol(slot, oc_action, lead):
+        trader = slot.trader
+        candles, mtf, heartbeat = slot.candles, slot.mtf, slot.heartbeat
+
+        logging.info(f"Bot cycle: Fetching data for {slot.symbol}...")
+        changed = loader.fetch_into(candles, slot.symbol, settings['timeframe'])
+        if changed is None and slot.warm_df is not None and not len(candles):
+            logging.info("♻️ Using snapshot candles for this cycle.")
+            changed = candles.update_frame(slot.warm_df)
+        slot.warm_df = None
+        if changed is None or not len(candles):
+            return False
+        
+        # Prepare Data
+        df = slot.df = candles.frame()
+        current_price = float(df['close'].iloc[-1])
+        if changed:
+            # Sin velas nuevas o revisadas se reutilizan indicadores y resumen multi-timeframe
+            candles.refresh_indicators(settings)
+
+            try:
+                mtf.update(df)
+                slot.timeframes_summary = mtf.snapshot()
             except Exception as e:
-                logging.error(f"⚠️ Error en módulo de noticias/IA: {e}")
-
-            # Check OpenClaw Signals but ensure thread safety
-            oc_action = None
-            oc_sentiment = None
-            with openclaw_input_lock:
-                if openclaw_input and (time.time() - openclaw_input.get("timestamp", 0) < 300): # 5 mins expiry
-                    logging.info(f"🦁 OpenClaw Signal Detected: {openclaw_input}")
-                    oc_sentiment = openclaw_input.get("sentiment") # "RSI indicates..."
-                    
-                    # Convert unstructured sentiment description to strictly BULLISH/BEARISH if possible, 
-                    # or just rely on the 'signal' field.
-                    # For now we use the signal to override action.
-                    
-                    if openclaw_input.get("confidence", 0) > 0.7: # High confidence threshold
-                         logging.info(f"🦁 OpenClaw High Confidence Signal: {openclaw_input.get('signal')}")
-                         if openclaw_input.get("signal") in ["buy", "sell"]:
-                             oc_action = openclaw_input.get("signal")
-
-            # 4. Ejecutar lógica de riesgo y Notion
-            balance = trader.get_balance()
-            event, pnl = trader.check_risk_management(current_price)
-            action_taken = None
+                logging.error(f"⚠️ Error en motor multi-timeframe: {e}")
+                slot.timeframes_summary = {}
+
+        # Calculate Trend
+        sma_50 = df['sma_50'].iloc[-1] if 'sma_50' in df else current_price
+        trend = "up" if current_price > sma_50 else "down"
+
+        # Update Global State for OpenClaw (el símbolo principal en la raíz, todos en "symbols")
+        status = {
+            "current_price": current_price,
+            "rsi": float(df['rsi'].iloc[-1]) if 'rsi' in df else 50.0,
+            "trend": trend,
+            "volume": float(df['volume'].iloc[-1]) if 'volume' in df else 0.0,
+            "avg_volume": float(df['volume'].mean()) if 'volume' in df else 0.0,
+            "moving_average": float(sma_50),
+            "timeframes": slot.timeframes_summary,
+            "timestamp": clock.now().isoformat()
+        }
+        with latest_market_data_lock:
+            if lead:
+                latest_market_data.update(status)
+            latest_market_data.setdefault("symbols", {})[slot.symbol] = status
+            body = market_status.set(latest_market_data)
+        if shared_state:
+            shared_state.publish(body)
+
+        # 4. Ejecutar lógica de riesgo y Notion
+        balance = trader.get_balance()
+        event, pnl = trader.check_risk_management(current_price)
+        action_taken = None
+        
+        if event:
+            # Risk Management Triggered (SL/TP) - Close Position
+            current_pos = trader.position
+            trade_side = "sell" if current_pos == "LONG" else "buy"
             
-            if event:
-                # Risk Management Triggered (SL/TP) - Close Position
-                current_pos = trader.position
-                trade_side = "sell" if current_pos == "LONG" else "buy"
-                
-                order_result = trader.place_order(trade_side, 0.01, current_price, event)
-                if order_result:
-                    action_taken = f"{event}_{current_pos}"
-                    try:
-                        telegram.send_message(f"🚨 RISK TRIGGERED: {event} ({current_pos}) | ID: Check Logs")
-                        notion.log_trade(action=f"CLOSE_{current_pos}", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
-                        supabase.log_to_supabase(f"CLOSE_{current_pos}", current_price, cached_sent, cached_conf, pnl)
-                    except Exception as log_err:
-                        telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
-
-            else:
-                # Trading Logic (New Entries)
-                tech_signal = predictor.predict_next_move(df)
-
-                # --- Logic for LONG Position ---
-                # OpenClaw Override or Standard Logic
-                should_long = (tech_signal == "UP" and cached_sent == "BULLISH" and cached_conf >= 0.60)
-                if oc_action == "buy": should_long = True
-
-                if should_long:
-                    if trader.position == "NONE":
-                        if balance > 10.0:
-                            if trader.place_order("buy", 0.01, current_price, "AI_LONG"):
-                                action_taken = "OPEN_LONG"
-                                try:
-                                    telegram.send_message(f"✅ REAL LONG OPENED | Price: {current_price}")
-                                    notion.log_trade(action="OPEN_LONG", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=0.0)
-                                    supabase.log_to_supabase("OPEN_LONG", current_price, cached_sent, cached_conf, 0)
-                                except Exception as log_err:
-                                    telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
-                        else:
-                            logging.warning(f"⚠️ Insufficient balance for LONG: ${balance:.2f}")
-
-                    elif trader.position == "SHORT":
-                        # Signal UP + BULLISH while holding SHORT -> Close Short (Cover)
-                        if trader.place_order("buy", 0.01, current_price, "AI_COVER"):
-                            action_taken = "CLOSE_SHORT"
+            order_result = slot.place_order(trade_side, 0.01, current_price, event)
+            if order_result:
+                action_taken = f"{event}_{current_pos}"
+                try:
+                    telegram.send_message(f"🚨 RISK TRIGGERED: {event} ({current_pos}) | ID: Check Logs")
+                    notion.log_trade(action=f"CLOSE_{current_pos}", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
+                    supabase.log_to_supabase(f"CLOSE_{current_pos}", current_price, cached_sent, cached_conf, pnl)
+                except Exception as log_err:
+                    telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
+
+        else:
+            # Trading Logic (New Entries)
+            tech_signal = predictor.predict_next_move(df)
+
+            # --- Logic for LONG Position ---
+            # OpenClaw Override or Standard Logic
+            should_long = (tech_signal == "UP" and cached_sent == "BULLISH" and cached_conf >= 0.60)
+            if oc_action == "buy": should_long = True
+
+            if should_long:
+                if trader.position == "NONE":
+                    if balance > 10.0:
+                        if slot.place_order("buy", 0.01, current_price, "AI_LONG"):
+                            action_taken = "OPEN_LONG"
                             try:
-                                telegram.send_message(f"🔄 REAL SHORT CLOSED | Price: {current_price}")
-                                notion.log_trade(action="CLOSE_SHORT", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
-                                supabase.log_to_supabase("CLOSE_SHORT", current_price, cached_sent, cached_conf, pnl)
+                                telegram.send_message(f"✅ REAL LONG OPENED | Price: {current_price}")
+                                notion.log_trade(action="OPEN_LONG", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=0.0)
+                                supabase.log_to_supabase("OPEN_LONG", current_price, cached_sent, cached_conf, 0)
                             except Exception as log_err:
-                                 telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
-
-                # --- Logic for SHORT Position ---
-                # OpenClaw Override or Standard Logic
-                should_short = (tech_signal == "DOWN" and cached_sent == "BEARISH" and cached_conf >= 0.60)
-                if oc_action == "sell": should_short = True
-
-                if should_short:
-                    if trader.position == "NONE":
-                        if balance > 10.0:
-                            if trader.place_order("sell", 0.01, current_price, "AI_SHORT"):
-                                action_taken = "OPEN_SHORT"
-                                try:
-                                    telegram.send_message(f"🔻 REAL SHORT OPENED | Price: {current_price}")
-                                    notion.log_trade(action="OPEN_SHORT", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=0.0)
-                                    supabase.log_to_supabase("OPEN_SHORT", current_price, cached_sent, cached_conf, 0)
-                                except Exception as log_err:
-                                    telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
-                        else:
-                             logging.warning(f"⚠️ Insufficient balance for SHORT: ${balance:.2f}")
-
-                    elif trader.position == "LONG":
-                         # Signal DOWN + BEARISH while holding LONG -> Close Long (Sell)
-                        if trader.place_order("sell", 0.01, current_price, "AI_SELL"):
-                            action_taken = "CLOSE_LONG"
+                                telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
+                    else:
+                        logging.warning(f"⚠️ Insufficient balance for LONG: ${balance:.2f}")
+
+                elif trader.position == "SHORT":
+                    # Signal UP + BULLISH while holding SHORT -> Close Short (Cover)
+                    if slot.place_order("buy", 0.01, current_price, "AI_COVER"):
+                        action_taken = "CLOSE_SHORT"
+                        try:
+                            telegram.send_message(f"🔄 REAL SHORT CLOSED | Price: {current_price}")
+                            notion.log_trade(action="CLOSE_SHORT", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
+                            supabase.log_to_supabase("CLOSE_SHORT", current_price, cached_sent, cached_conf, pnl)
+                        except Exception as log_err:
+                             telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
+
+            # --- Logic for SHORT Position ---
+            # OpenClaw Override or Standard Logic
+            should_short = (tech_signal == "DOWN" and cached_sent == "BEARISH" and cached_conf >= 0.60)
+            if oc_action == "sell": should_short = True
+
+            if should_short:
+                if trader.position == "NONE":
+                    if balance > 10.0:
+                        if slot.place_order("sell", 0.01, current_price, "AI_SHORT"):
+                            action_taken = "OPEN_SHORT"
                             try:
-                                telegram.send_message(f"📉 REAL LONG CLOSED | Price: {current_price}")
-                                notion.log_trade(action="CLOSE_LONG", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
-                                supabase.log_to_supabase("CLOSE_LONG", current_price, cached_sent, cached_conf, pnl)
+                                telegram.send_message(f"🔻 REAL SHORT OPENED | Price: {current_price}")
+                                notion.log_trade(action="OPEN_SHORT", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=0.0)
+                                supabase.log_to_supabase("OPEN_SHORT", current_price, cached_sent, cached_conf, 0)
                             except Exception as log_err:
-                                 telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
-            
-            # Report final status for this cycle
-            if action_taken:
-                telegram.report_cycle(action_taken, current_price, cached_sent)
-            else:
-                telegram.report_cycle("HOLD", current_price, cached_sent)
-                # Log HOLD status to Supabase as requested
+                                telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
+                    else:
+                         logging.warning(f"⚠️ Insufficient balance for SHORT: ${balance:.2f}")
+
+                elif trader.position == "LONG":
+                     # Signal DOWN + BEARISH while holding LONG -> Close Long (Sell)
+                    if slot.place_order("sell", 0.01, current_price, "AI_SELL"):
+                        action_taken = "CLOSE_LONG"
+                        try:
+                            telegram.send_message(f"📉 REAL LONG CLOSED | Price: {current_price}")
+                            notion.log_trade(action="CLOSE_LONG", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
+                            supabase.log_to_supabase("CLOSE_LONG", current_price, cached_sent, cached_conf, pnl)
+                        except Exception as log_err:
+                             telegram.report_cycle("ERROR", error=f"Logging Error: {log_err}")
+        
+        # Report final status for this cycle
+        if action_taken:
+            telegram.report_cycle(action_taken, current_price, cached_sent)
+        else:
+            telegram.report_cycle("HOLD", current_price, cached_sent)
+            # HOLD/WATCHING: muestra en memoria, se escribe como rollup (Supabase + Notion)
+            try:
+                heartbeat.record(current_price, cached_sent, cached_conf, pnl, ts=clock.now(timezone.utc))
+            except Exception as log_err:
+                logging.error(f"Logging Error: {log_err}")
+        return True
+
+    while not (stop and stop()):
+        with last_loop_time_lock:
+            last_loop_time = clock.time()
+        if shared_state:
+            shared_state.last_loop_time = last_loop_time
+
+        symbols = coordinator.my_symbols() if coordinator else [settings['symbol']]
+        if not symbols:
+            # Ningún lease propio: esperar a un rebalanceo
+            logging.info("🔒 All symbols owned by other nodes. Standing by.")
+        else:
+            cycle += 1
+            telegram.send_message("🔄 Iniciando ciclo de trading...")
+            refresh_sentiment()
+            try:
+                oc_action = openclaw_action()
+            except Exception as e:
+                logging.error(f"⚠️ OpenClaw signal error: {e}")
+                oc_action = None
+
+            for symbol in symbols:
                 try:
-                    notion.log_trade(action="WATCHING", price=float(current_price), sentiment=cached_sent, confidence=float(cached_conf), profit=float(pnl))
-                    supabase.log_to_supabase("HOLD", current_price, cached_sent, cached_conf, pnl)
-                except Exception as log_err:
-                    logging.error(f"Logging Error: {log_err}")
+                    # Las señales OpenClaw se refieren al símbolo principal (el de /market/status):
+                    # un nodo sin su lease no las ejecuta sobre otro símbolo
+                    is_main = symbol == settings['symbol']
+                    trade_symbol(get_slot(symbol), oc_action if is_main else None, lead=is_main)
+                except Exception as e:
+                    error_msg = f"Error in bot loop ({symbol}): {e}"
+                    logging.error(error_msg)
+                    telegram.report_cycle("ERROR", error=error_msg)
+
+            if snapshotter and os.getenv("RUN_ONCE") != "true":
+                try:
+                    snapshotter.maybe_save(cycle, snapshot_state)
+                except Exception as e:
+                    logging.error(f"⚠️ Snapshot error: {e}")
 
-        except Exception as e:
-            error_msg = f"Error in bot loop: {e}"
-            logging.error(error_msg)
-            telegram.report_cycle("ERROR", error=error_msg)
+            try:
+                memory_profiler.maybe_sample(cycle)
+            except Exception as e:
+                logging.error(f"⚠️ Memory profiler error: {e}")
 
         if os.getenv("RUN_ONCE") == "true": 
             logging.info("RUN_ONCE is true, exiting bot loop.")
             break
             
-        time.sleep(60)
+        clock.sleep(60 if symbols else coordinator.lease_ttl / 3)
+
+    for slot in slots.values():
+        slot.heartbeat.flush()
+    if snapshotter and slots:
+        # Snapshot final DESPUÉS del flush: si guardara la ventana pendiente, el
+        # siguiente arranque la restauraría y escribiría el mismo rollup dos veces
+        try:
+            snapshotter.save(snapshot_state())
+        except Exception as e:
+            logging.error(f"⚠️ Snapshot error: {e}")
+    if coordinator:
+        coordinator.stop()
+    return cycle
+
+def load_server_analyzer():
+    """Shared model host if available, otherwise an in-process FinBERT copy."""
+    from src.model_host import ensure_model_host
+    shared = ensure_model_host()
+    if shared:
+        return shared
+    logging.warning("⚠️ Model host unavailable. Loading FinBERT in-process.")
+    from src.model import SentimentAnalyzer
+    return SentimentAnalyzer()
+
+def drain_shared_signals(state, interval=0.05):
+    """Moves the signals queued by the API process into openclaw_signals (own thread, so the ring never waits for a cycle)."""
+    while True:
+        try:
+            records = state.drain()
+            if records:
+                openclaw_signals.extend([loads(rec) for rec in records])
+        except Exception as e:
+            logging.error(f"⚠️ Error draining OpenClaw signals: {e}")
+        time.sleep(interval)
+
+def start_api(uvicorn):
+    """
+    API_MODE=thread (default): uvicorn in a background thread of this process.
+    API_MODE=process: hot endpoints in a separate process fed through shared memory
+    (src/api_process.py); this process keeps the full API on 127.0.0.1:8001 for
+    the calls that need the trader or the model, which that process forwards.
+    """
+    global shared_state
+    if os.getenv("API_MODE", "thread") == "process":
+        from src.shared_state import SharedState
+        from src.api_process import start_api_process
+
+        internal_port = int(os.getenv("API_INTERNAL_PORT", "8001"))
+        shared_state = SharedState(create=True)
+        shared_state.publish(market_status.body())
+        threading.Thread(target=drain_shared_signals, args=(shared_state,), daemon=True, name="signal-drain").start()
+        start_api_process(shared_state, port=8000, internal_url=f"http://127.0.0.1:{internal_port}")
+        kwargs = {"host": "127.0.0.1", "port": internal_port}
+    else:
+        kwargs = {"host": "0.0.0.0", "port": 8000}
+    server_thread = threading.Thread(target=uvicorn.run, args=(app,), kwargs=kwargs)
+    server_thread.start()
+    return server_thread
 
 def main():
     global analyzer
+
+    if "--profile-imports" in sys.argv:
+        # Reporte tipo `python -X importtime` de lo que cuesta importar main.py
+        from src.import_profiler import print_import_report
+        print_import_report("main")
+        return
+
+    import uvicorn
     
     if os.getenv("SPACE_ID"):
         # Server Mode (Hugging Face Space)
         logging.info("🚀 Starting in SERVER MODE (Hugging Face Space)")
         
-        # Start API Server in background thread
+        # Start API Server in background thread (or process, see start_api)
         # Changed to 8000 because Nginx is now the entry point on 7860
-        server_thread = threading.Thread(target=uvicorn.run, args=(app,), kwargs={"host": "0.0.0.0", "port": 8000})
-        server_thread.start()
+        start_api(uvicorn)
         
-        # Initialize SentimentAnalyzer locally for Server Mode
-        from src.model import SentimentAnalyzer
-        analyzer = SentimentAnalyzer()
+        # Server Mode: FinBERT vive en un único proceso (model host) compartido
+        # por el bucle, /analyze y cualquier otro consumidor del contenedor
+        analyzer = load_server_analyzer()
         
         # Run trading bot in main thread
         run_bot_loop()
@@ -404,8 +690,7 @@ def main():
         logging.info("🌍 Starting in CLIENT MODE")
         
         # Start API for Local OpenClaw connection
-        server_thread = threading.Thread(target=uvicorn.run, args=(app,), kwargs={"host": "0.0.0.0", "port": 8000})
-        server_thread.start()
+        start_api(uvicorn)
 
         # Run trading bot directly (blocking)
         # Analyzer will be initialized as Remote in run_bot_loop
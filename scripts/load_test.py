@@ -0,0 +1,96 @@
+"""
+Load test for the bot API: requests/s and latency percentiles per endpoint.
+
+    python scripts/load_test.py --url http://127.0.0.1:8000 --connections 32 --duration 10
+
+Uses only the standard library (asyncio + keep-alive HTTP/1.1 connections) so it
+can run next to the bot without extra dependencies.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import urlsplit
+
+OPENCLAW_SECRET = os.getenv("OPENCLAW_SECRET", "changeme_in_production")
+
+SIGNAL_BODY = json.dumps({"signal": "hold", "confidence": 0.5, "sentiment_analysis": "load test",
+                          "source": "load_test"}).encode("utf-8")
+
+ENDPOINTS = {
+    "market_status": ("GET", "/market/status", None),
+    "openclaw_signal": ("POST", "/openclaw/signal", SIGNAL_BODY),
+}
+
+
+def build_request(host, method, path, body):
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: keep-alive",
+             f"X-Auth-Token: {OPENCLAW_SECRET}"]
+    if body is not None:
+        lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("ascii") + (body or b"")
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def worker(host, port, request, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            writer.write(request)
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - t0)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_endpoint(url, method, path, body, connections, duration):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    request = build_request(parts.netloc, method, path, body)
+    latencies, errors = [], []
+    t0 = time.perf_counter()
+    deadline = t0 + duration
+    await asyncio.gather(*(worker(host, port, request, deadline, latencies, errors) for _ in range(connections)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else float("nan")
+
+    return {"requests": len(latencies), "errors": len(errors), "rps": len(latencies) / elapsed,
+            "p50_ms": pct(0.50), "p99_ms": pct(0.99), "max_ms": latencies[-1] * 1000 if latencies else float("nan")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for /market/status and /openclaw/signal")
+    parser.add_argument("--url", default=os.getenv("ANTIGRAVITY_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=list(ENDPOINTS))
+    args = parser.parse_args()
+
+    print(f"🔥 {args.url} | {args.connections} connections | {args.duration:.0f}s per endpoint")
+    for name in args.endpoints:
+        method, path, body = ENDPOINTS[name]
+        r = asyncio.run(run_endpoint(args.url, method, path, body, args.connections, args.duration))
+        print(f"{method:4} {path:18} {r['rps']:9.0f} req/s | p50 {r['p50_ms']:6.2f} ms | "
+              f"p99 {r['p99_ms']:6.2f} ms | max {r['max_ms']:7.2f} ms | {r['requests']} requests, {r['errors']} errors")
+
+
+if __name__ == "__main__":
+    main()
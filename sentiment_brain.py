@@ -1,19 +1,36 @@
 from fastapi import FastAPI
 from pydantic import BaseModel
-from transformers import pipeline
-import torch
+import contextlib
 import gc
 
 app = FastAPI()
 
 # Task: Sentiment Analysis (FinBERT)
 # This app is specifically for the Sentiment Brain (crypto-sentiment-api)
+# If a shared model host is already running in this container, reuse it
+# instead of loading a second copy of FinBERT.
+analyzer = None
+no_grad = contextlib.nullcontext
 try:
-    analyzer = pipeline("sentiment-analysis", model="ProsusAI/finbert")
-    print("✅ Model ProsusAI/finbert loaded successfully.")
-except Exception as e:
-    print(f"❌ Failed to load model: {e}")
-    analyzer = None
+    from src.model_host import ModelHostClient
+    _host = ModelHostClient()
+    if _host.ping():
+        analyzer = _host.classify
+        print("✅ Using shared model host.")
+except Exception:
+    pass
+
+if analyzer is None:
+    try:
+        # torch solo hace falta para el modelo en proceso
+        import torch
+        from transformers import pipeline
+        no_grad = torch.no_grad
+        analyzer = pipeline("sentiment-analysis", model="ProsusAI/finbert")
+        print("✅ Model ProsusAI/finbert loaded successfully.")
+    except Exception as e:
+        print(f"❌ Failed to load model: {e}")
+        analyzer = None
 
 class AnalyzeRequest(BaseModel):
     texts: list[str]
@@ -31,7 +48,7 @@ async def analyze(request: AnalyzeRequest):
          return [{"label": "neutral", "score": 0.0}]
 
     # Memory Optimization
-    with torch.no_grad():
+    with no_grad():
         results = analyzer(texts)
 
     gc.collect()
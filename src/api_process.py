@@ -0,0 +1,131 @@
+import os
+import time
+import logging
+import multiprocessing
+
+import requests
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from src.serving import FastJSONResponse, OpenClawSignal, verify_token, dumps
+from src.shared_state import SharedState
+from src.signal_book import SignalBook
+
+# API en un proceso propio (API_MODE=process).
+# Los endpoints calientes se sirven aquí sin tocar el GIL del bucle: el estado
+# de mercado se lee ya codificado de la memoria compartida y las señales se
+# encolan en ella para el bot. Las operaciones que necesitan el trader o el
+# modelo (/openclaw/orders, /analyze) o su memoria (/debug/memory) se reenvían
+# a la API interna del bot.
+
+logger = logging.getLogger(__name__)
+
+
+def create_app(state, internal_url=None):
+    app = FastAPI(default_response_class=FastJSONResponse)
+    # Copia del historial para consultas; el bucle mantiene la suya con lo que le llega por la cola
+    book = SignalBook(capacity=int(os.getenv("OPENCLAW_SIGNAL_CAPACITY", "256")), window=300)
+    status = {"version": -1, "body": b"{}"}
+
+    def market_body():
+        version = state.version
+        if version != status["version"]:
+            status["body"], status["version"] = state.read(), version
+        return status["body"]
+
+    def enqueue(signals):
+        """Queues the signals for the bot, all or none; only then they enter the local book."""
+        now = time.time()
+        signals = [{"signal": s["signal"], "confidence": s["confidence"], "sentiment_analysis": s["sentiment_analysis"],
+                    "source": s["source"], "additional_data": s["additional_data"], "ts": now} for s in signals]
+        if not state.push_many([dumps(s) for s in signals]):
+            raise HTTPException(status_code=503, detail="Signal queue full, bot is not draining it")
+        return book.extend(signals)
+
+    @app.get("/")
+    async def health_check():
+        seconds_since_update = time.time() - state.last_loop_time
+        return {
+            "status": "frozen" if seconds_since_update > 300 else "running",
+            "mode": "hybrid" if os.getenv("SPACE_ID") else "client",
+            "seconds_since_last_loop": seconds_since_update,
+            "api": "process",
+        }
+
+    @app.get("/wake_up")
+    async def wake_up():
+        return {"status": "awake", "timestamp": time.time()}
+
+    @app.get("/market/status")
+    @app.get("/markets/status")
+    async def get_market_status():
+        return Response(content=market_body(), media_type="application/json")
+
+    @app.post("/openclaw/signal", dependencies=[Depends(verify_token)])
+    async def receive_openclaw_signal(body: OpenClawSignal):
+        (data,) = enqueue([body.model_dump()])
+        return {"status": "Signal received", "data": data}
+
+    @app.post("/openclaw/signals", dependencies=[Depends(verify_token)])
+    async def receive_openclaw_signals(body: list[OpenClawSignal]):
+        records = enqueue([s.model_dump() for s in body])
+        return {"status": "Signals received", "count": len(records), "consensus": book.consensus()}
+
+    @app.get("/openclaw/signals", dependencies=[Depends(verify_token)])
+    async def get_openclaw_signals(seconds: float = 3600, source: str = None):
+        since = time.time() - seconds
+        return {
+            "signals": book.window_query(since, source=source),
+            "counts": book.counts(since),
+            "consensus": book.consensus(),
+            "stats": dict(book.stats(), shared=state.stats()),
+        }
+
+    # El reenvío bloquea: se ejecuta en el pool de hilos, no en el event loop
+    def forward(request_body, path, token, method="POST", params=None):
+        if not internal_url:
+            raise HTTPException(status_code=503, detail="Bot API not configured")
+        try:
+            r = requests.request(method, f"{internal_url}{path}", data=request_body, params=params, timeout=30,
+                                 headers={"Content-Type": "application/json", "X-Auth-Token": token or ""})
+        except requests.RequestException as e:
+            raise HTTPException(status_code=502, detail=f"Bot API unreachable: {e}")
+        return Response(content=r.content, status_code=r.status_code, media_type="application/json")
+
+    @app.post("/analyze")
+    async def analyze(request: Request):
+        return await run_in_threadpool(forward, await request.body(), "/analyze", None)
+
+    @app.post("/openclaw/orders", dependencies=[Depends(verify_token)])
+    async def place_openclaw_order(request: Request):
+        return await run_in_threadpool(forward, await request.body(), "/openclaw/orders",
+                                       request.headers.get("X-Auth-Token"))
+
+    @app.get("/debug/memory", dependencies=[Depends(verify_token)])
+    async def get_memory_profile(request: Request):
+        # Memoria del proceso del bot, que es el que crece
+        return await run_in_threadpool(forward, None, "/debug/memory", request.headers.get("X-Auth-Token"),
+                                       "GET", dict(request.query_params))
+
+    return app
+
+
+def serve(state_name, host="0.0.0.0", port=8000, internal_url=None):
+    import uvicorn
+
+    logging.basicConfig(level=logging.INFO)
+    state = SharedState(state_name)
+    logger.info(f"🚀 API process {os.getpid()} on {host}:{port} (shared state {state_name})")
+    try:
+        uvicorn.run(create_app(state, internal_url), host=host, port=port, log_level="warning")
+    finally:
+        state.close()
+
+
+def start_api_process(state, host="0.0.0.0", port=8000, internal_url=None):
+    """Spawns the API process attached to `state` (a SharedState created by the caller)."""
+    process = multiprocessing.get_context("spawn").Process(
+        target=serve, args=(state.name, host, port, internal_url), name="api", daemon=True)
+    process.start()
+    return process
@@ -1,9 +1,15 @@
+import os
 import pandas as pd
 import yfinance as yf
 import matplotlib.pyplot as plt
 from src.trader import Trader
 from src.utils import add_indicators
-from src.model import PricePredictor
+from src.model import PricePredictor, SIGNAL_LABELS
+from src.recorder import TradeLog, EquityBuffer
+from src.monte_carlo import run_monte_carlo, print_monte_carlo_report
+from src.sentiment_store import SentimentStore, sentiment_asof
+from src.intrabar import simulate_intrabar, trades_to_frame
+from src.memo import DiskCache, fingerprint_frame, fingerprint_object, code_version, make_key
 import logging
 
 # Configurar logger para backtest silencioso
@@ -13,39 +19,64 @@ logging.basicConfig(level=logging.INFO)
 class BacktestTrader(Trader):
     """
     Versión del Trader optimizada para simulación en memoria.
-    No escribe a CSV, guarda en lista para análisis.
+    No escribe a CSV, guarda en arrays tipados (TradeLog / EquityBuffer) para análisis.
     """
     def __init__(self, symbol, stop_loss_pct, take_profit_pct, initial_balance=10000):
-        super().__init__(symbol, stop_loss_pct, take_profit_pct)
+        super().__init__(symbol, stop_loss_pct, take_profit_pct, offline=True)
         self.virtual_balance = initial_balance
         self.initial_balance = initial_balance
-        self.trades = [] # Lista de diccionarios con historia
-        self.equity_curve = [] # Evolución del balance
+        self.trades = TradeLog() # Historia de operaciones (columnas tipadas)
+        self.equity_curve = EquityBuffer() # Evolución del balance (float64)
 
     def _save_to_csv(self, timestamp, action, price, reason, profit):
         # Sobreescribimos para no dañar el CSV real y guardar en memoria
-        self.trades.append({
-            "timestamp": timestamp,
-            "action": action,
-            "price": price,
-            "reason": reason,
-            "profit_pct": profit,
-            "balance": self.virtual_balance
-        })
+        self.trades.append(timestamp, action, price, reason, profit, self.virtual_balance)
+
+    @property
+    def is_holding(self):
+        return self.position != "NONE"
 
     def force_close(self, price, timestamp, reason="END_OF_BACKTEST"):
         """Cierra posiciones abiertas al final del backtest"""
         if self.is_holding:
             self.place_order("sell", 0, price, reason)
 
+# Archivos de los que dependen los resultados cacheados (ver src/memo.py)
+_RESULT_SOURCES = ("backtester.py", "trader.py", "utils.py", "model.py", "intrabar.py", "recorder.py",
+                   "sentiment_store.py")
+_INDICATOR_SOURCES = ("utils.py",)
+INDICATOR_SETTINGS = {
+    "rsi_period": 14,
+    "macd_fast": 12, "macd_slow": 26, "macd_signal": 9
+}
+
+def _source_version(names):
+    here = os.path.dirname(os.path.abspath(__file__))
+    return code_version(*(os.path.join(here, n) for n in names))
+
 class Backtester:
-    def __init__(self, symbol="BTC-USD", timeframe="1h", period="60d"):
+    def __init__(self, symbol="BTC-USD", timeframe="1h", period="60d", cache=None, history=None):
+        """
+        cache: optional memo.DiskCache; indicator frames and results are reused across runs.
+        history: optional history.HistoryDownloader; candles come from the local chunked
+        store (downloading only what is missing) instead of a single yfinance call.
+        """
         self.symbol = symbol
         self.timeframe = timeframe
         self.period = period
         self.price_predictor = PricePredictor()
+        self.cache = cache
+        self.history = history
     
     def fetch_data(self):
+        if self.history is not None:
+            end = pd.Timestamp.now(tz="UTC")
+            df = self.history.fetch(self.symbol, self.timeframe, end - pd.Timedelta(self.period), end)
+            if df.empty:
+                raise ValueError("No se pudieron descargar datos.")
+            print(f"✅ Datos cargados: {len(df)} velas ({self.history.provider.name}).")
+            return df
+
         print(f"📥 Descargando datos históricos de {self.symbol} ({self.period})...")
         # Usamos yfinance que es gratuito y robusto para históricos
         df = yf.download(tickers=self.symbol, period=self.period, interval=self.timeframe, progress=False)
@@ -69,44 +100,79 @@ class Backtester:
         print(f"✅ Datos cargados: {len(df)} velas.")
         return df
 
-    def run(self, stop_loss=0.02, take_profit=0.05):
+    def indicators(self, df, settings=INDICATOR_SETTINGS):
+        """add_indicators(df), reused from the cache when the same candles were seen before."""
+        if self.cache is None:
+            return add_indicators(df, settings)
+        key = make_key(fingerprint_frame(df), settings, _source_version(_INDICATOR_SOURCES))
+        return self.cache.memoize("indicators", key, lambda: add_indicators(df.copy(), settings))
+
+    def _memo_result(self, df, params, sentiment, compute):
+        # SL/TP no afectan a los indicadores: cada combinación de un barrido tiene su
+        # propio resultado, pero todas comparten el frame de indicadores cacheado
+        if self.cache is None:
+            return compute()
+        key = make_key(fingerprint_frame(df), params,
+                       None if sentiment is None else fingerprint_frame(sentiment),
+                       fingerprint_object(self.price_predictor), _source_version(_RESULT_SOURCES))
+        # hits/misses son compartidos con el memo de indicadores que compute() usa por dentro
+        computed = []
+
+        def run():
+            computed.append(True)
+            return compute()
+
+        result = self.cache.memoize("results", key, run)
+        if not computed:
+            logger.info(f"♻️ Cached result for {params}")
+        return result
+
+    def run(self, stop_loss=0.02, take_profit=0.05, sentiment=None, min_confidence=0.60):
+        """
+        sentiment: optional frame from SentimentStore.load(). When given, entries and
+        exits need the same sentiment confirmation as run_bot_loop.
+        """
         df = self.fetch_data()
-        
-        # Simulamos settings
-        settings = {
-            "rsi_period": 14, 
-            "macd_fast": 12, "macd_slow": 26, "macd_signal": 9 
-        }
-        
+        return self._memo_result(df, ("run", stop_loss, take_profit, min_confidence), sentiment,
+                                 lambda: self._run(df, stop_loss, take_profit, sentiment, min_confidence))
+
+    def _run(self, df, stop_loss, take_profit, sentiment, min_confidence):
         # Añadir indicadores (reutilizamos la lógica real del bot)
-        df = add_indicators(df, settings)
+        df = self.indicators(df)
         
         # Inicializar Trader Simulado
         trader = BacktestTrader(self.symbol, stop_loss, take_profit)
+        trader.equity_curve.reserve(len(df))
         
         print("\n▶️ Iniciando Simulación...")
         
-        for index, row in df.iterrows():
-            current_price = row['close']
-            
+        # Señales técnicas de toda la historia en una sola pasada vectorizada.
+        # Cada señal solo usa datos hasta su propia vela (SMAs), así que es
+        # equivalente a evaluar df.iloc[:i+1] vela por vela.
+        signals = self.price_predictor.predict_series(df)
+        closes = df['close'].to_numpy(dtype=float)
+
+        # Sentimiento que tenía el bot en cada vela (as-of vectorizado sobre el almacén histórico)
+        sent_labels, sent_conf = (None, None)
+        if sentiment is not None:
+            sent_labels, sent_conf = sentiment_asof(df.index, sentiment)
+
+        for i, current_price in enumerate(closes):
             # 1. Gestión de Riesgo (Check SL/TP)
             risk_event, pnl = trader.check_risk_management(current_price)
             if risk_event:
                 trader.place_order("sell", 0, current_price, reason=risk_event)
                 continue # Si vendimos, pasamos a la siguiente vela
             
-            # 2. Lógica de Trading (Simplificada sin Noticias Históricas)
-            # Para el backtest, asumimos que el Sentiment es NEUTRAL o 
-            # confiamos puramente en el técnico para validar la robustez base.
-            
-            # Generar ventana de datos (lookback) para el predictor
-            # (En una implementación real compleja pasaríamos el slice histórico df.iloc[:i])
-            # Aquí pasamos el DF completo pero el predictor dummy solo mira la última fila actual
-            # Para ser estrictos deberíamos pasar df.iloc[:i+1], pero por rendimiento
-            # y dado que nuestro predictor dummy es simple, usaremos la lógica row por row simulada.
-            
-            current_slice = df.loc[:index] 
-            signal = self.price_predictor.predict_next_move(current_slice)
+            # 2. Lógica de Trading
+            # Sin almacén de sentimiento confiamos puramente en el técnico para
+            # validar la robustez base; con él se aplica el filtro del bot en vivo.
+            signal = SIGNAL_LABELS[int(signals[i])]
+            if sent_labels is not None:
+                if signal == "UP" and not (sent_labels[i] == "BULLISH" and sent_conf[i] >= min_confidence):
+                    signal = "HOLD"
+                elif signal == "DOWN" and not (sent_labels[i] == "BEARISH" and sent_conf[i] >= min_confidence):
+                    signal = "HOLD"
             
             # Lógica de Compra
             if signal == "UP" and not trader.is_holding:
@@ -135,8 +201,47 @@ class Backtester:
         
         return trader
 
+    def prepare_signals(self, df=None, sentiment=None):
+        """
+        Candles with indicators plus the raw technical signals (int8) and, if a
+        sentiment frame is given, the as-of sentiment labels/confidence per candle.
+        """
+        df = self.indicators(self.fetch_data() if df is None else df)
+        signals = self.price_predictor.predict_series(df).astype("int8")
+        labels, conf = sentiment_asof(df.index, sentiment) if sentiment is not None else (None, None)
+        return df, signals, labels, conf
+
+    @staticmethod
+    def gate_signals(signals, labels, conf, min_confidence=0.60):
+        """Drops signals without the sentiment confirmation run_bot_loop requires."""
+        if labels is None:
+            return signals
+        signals = signals.copy()
+        signals[(signals == 1) & ~((labels == "BULLISH") & (conf >= min_confidence))] = 0
+        signals[(signals == -1) & ~((labels == "BEARISH") & (conf >= min_confidence))] = 0
+        return signals
+
+    def run_intrabar(self, stop_loss=0.02, take_profit=0.05, tie_break="stop", allow_short=False,
+                     slippage=0.001, sentiment=None, min_confidence=0.60, df=None):
+        """
+        Same signals as run(), simulated with the single-pass kernel of src/intrabar.py:
+        SL/TP are checked against each candle's high/low instead of only its close.
+        Returns a DataFrame with one row per trade.
+        """
+        df = self.fetch_data() if df is None else df
+
+        def simulate():
+            frame, signals, labels, conf = self.prepare_signals(df, sentiment)
+            signals = self.gate_signals(signals, labels, conf, min_confidence)
+            trades = simulate_intrabar(frame['open'], frame['high'], frame['low'], frame['close'], signals,
+                                       stop_loss, take_profit, tie_break, allow_short, slippage)
+            return trades_to_frame(trades, frame.index)
+
+        params = ("intrabar", stop_loss, take_profit, tie_break, allow_short, slippage, min_confidence)
+        return self._memo_result(df, params, sentiment, simulate)
+
 def analyze_results(trader):
-    trades = pd.DataFrame(trader.trades)
+    trades = trader.trades.to_frame()
     
     print("\n" + "="*40)
     print("📊 REPORTE DE RESULTADOS (BACKTEST)")
@@ -146,9 +251,11 @@ def analyze_results(trader):
         print("⚠️ No se realizaron operaciones.")
         return
 
-    total_trades = len(trades[trades['action'] == 'SELL'])
-    wins = len(trades[(trades['action'] == 'SELL') & (trades['profit_pct'] > 0)])
-    losses = len(trades[(trades['action'] == 'SELL') & (trades['profit_pct'] <= 0)])
+    # Solo los cierres (CLOSE_LONG / CLOSE_SHORT) realizan beneficio
+    closed = trades['action'].astype(str).str.startswith('CLOSE')
+    total_trades = int(closed.sum())
+    wins = int((closed & (trades['profit_pct'] > 0)).sum())
+    losses = int((closed & (trades['profit_pct'] <= 0)).sum())
     win_rate = (wins / total_trades * 100) if total_trades > 0 else 0
     
     initial = trader.initial_balance
@@ -173,9 +280,22 @@ def analyze_results(trader):
 if __name__ == "__main__":
     # Configuración del Backtest
     # Usamos BTC-USD de Yahoo Finance
-    bt = Backtester(symbol="BTC-USD", period="60d", timeframe="1h")
+    # Caché en disco de indicadores y resultados (BACKTEST_CACHE=0 para desactivarla)
+    cache = DiskCache() if os.getenv("BACKTEST_CACHE", "1") != "0" else None
+    bt = Backtester(symbol="BTC-USD", period="60d", timeframe="1h", cache=cache)
     
+    # Sentimiento histórico (python -m src.sentiment_store <archivo>) si se indica la versión
+    sentiment_version = os.getenv("BACKTEST_SENTIMENT_VERSION")
+    sentiment = SentimentStore(sentiment_version).load() if sentiment_version else None
+
     # Ejecutar con SL=2%, TP=5%
-    trader_result = bt.run(stop_loss=0.02, take_profit=0.05)
+    trader_result = bt.run(stop_loss=0.02, take_profit=0.05, sentiment=sentiment)
     
     analyze_results(trader_result)
+
+    # Distribución de ROI / Drawdown re-muestreando la secuencia de operaciones
+    mc = run_monte_carlo(trader_result, n_sims=100_000, seed=42)
+    print_monte_carlo_report(mc)
+
+    if cache is not None:
+        print(f"\n🗄️ Cache: {cache.stats()}")
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+# Buffer circular de velas para el bucle en vivo.
+# Capacidad fija y columnas preasignadas (OHLCV + indicadores): cada ciclo solo
+# escribe las velas nuevas o la última revisada, y los indicadores se recalculan
+# en su sitio desde la primera vela cambiada. Cada vela se guarda dos veces
+# (posición p y p + capacidad), así que la ventana actual siempre es un bloque
+# contiguo y frame() / column() son vistas sin copia.
+
+FIELDS = ("open", "high", "low", "close", "volume")
+INDICATORS = ("rsi", "macd", "macd_signal", "macd_hist", "sma_50", "sma_200", "ema_fast", "ema_slow")
+COLUMNS = FIELDS + INDICATORS
+_COL = {name: i for i, name in enumerate(COLUMNS)}
+
+
+class CandleBuffer:
+    def __init__(self, capacity=48):
+        if capacity < 1:
+            raise ValueError("capacity debe ser >= 1")
+        self.capacity = capacity
+        self._data = np.full((len(COLUMNS), 2 * capacity), np.nan)
+        self._ts = np.zeros(2 * capacity, dtype=np.int64)
+        self._head = 0
+        self._size = 0
+        self._dirty_from = None
+
+    def __len__(self):
+        return self._size
+
+    # --- Escritura ---
+
+    def _slots(self, start, stop):
+        return (self._head + np.arange(start, stop)) % self.capacity
+
+    def _write(self, i, ts, values):
+        p = (self._head + i) % self.capacity
+        for q in (p, p + self.capacity):
+            self._ts[q] = ts
+            self._data[:len(FIELDS), q] = values
+            self._data[len(FIELDS):, q] = np.nan
+        self._dirty_from = i if self._dirty_from is None else min(self._dirty_from, i)
+
+    def append(self, ts, values):
+        """Appends one bar (ts in ns, values = open/high/low/close/volume), evicting the oldest when full."""
+        if self._size < self.capacity:
+            self._size += 1
+        else:
+            self._head = (self._head + 1) % self.capacity
+            if self._dirty_from is not None:
+                self._dirty_from = max(0, self._dirty_from - 1)
+        self._write(self._size - 1, ts, values)
+
+    def update(self, timestamps, values):
+        """
+        Upserts bars sorted by time: identical bars are skipped, a revised bar is
+        overwritten in place, newer bars are appended. Returns how many bars changed.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        changed = 0
+        current = self.timestamps()
+        last = current[-1] if self._size else np.iinfo(np.int64).min
+
+        old = timestamps <= last
+        if old.any():
+            pos = np.searchsorted(current, timestamps[old])
+            inside = (pos < self._size)
+            pos, rows = pos[inside], values[old][inside]
+            match = current[pos] == timestamps[old][inside]
+            pos, rows = pos[match], rows[match]
+            stored = self._data[:len(FIELDS), self._head:self._head + self._size][:, pos].T
+            differs = ~((stored == rows) | (np.isnan(stored) & np.isnan(rows))).all(axis=1)
+            for i, row in zip(pos[differs], rows[differs]):
+                self._write(int(i), current[i], row)
+                changed += 1
+
+        for ts, row in zip(timestamps[~old], values[~old]):
+            self.append(int(ts), row)
+            changed += 1
+        return changed
+
+    def update_frame(self, df):
+        """update() from a DataLoader-style DataFrame (timestamp column or DatetimeIndex)."""
+        ts = df["timestamp"] if "timestamp" in df.columns else df.index.to_series()
+        ts = pd.to_datetime(ts).dt.as_unit("ns").astype("int64").to_numpy()
+        values = df.reindex(columns=list(FIELDS)).fillna({"volume": 0.0}).to_numpy(dtype=np.float64)
+        order = np.argsort(ts, kind="stable")
+        return self.update(ts[order], values[order])
+
+    # --- Indicadores (mismas fórmulas que utils.add_indicators) ---
+
+    def _set(self, name, start, values):
+        slots = self._slots(start, self._size)
+        row = self._data[_COL[name]]
+        row[slots] = values
+        row[slots + self.capacity] = values
+
+    def refresh_indicators(self, settings):
+        """Recomputes indicator columns from the first changed bar on, in place."""
+        k = self._dirty_from
+        if k is None or self._size == 0:
+            return
+        close = self.column("close")
+
+        for name, window in (("sma_50", 50), ("sma_200", 200)):
+            self._set(name, k, _rolling_mean(close, window, k))
+
+        period = settings.get("rsi_period", 14)
+        s = max(0, k - period)
+        # Como pandas: el primer delta de la ventana (NaN) cuenta como 0
+        delta = np.diff(close[s - 1:]) if s > 0 else np.diff(close, prepend=close[0])
+        gain = _rolling_mean(np.where(delta > 0, delta, 0.0), period, k - s, valid_from=-s)
+        loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), period, k - s, valid_from=-s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self._set("rsi", k, 100 - (100 / (1 + gain / loss)))
+
+        ema_fast = self._ema(close, settings.get("macd_fast", 12), "ema_fast", k)
+        ema_slow = self._ema(close, settings.get("macd_slow", 26), "ema_slow", k)
+        macd = ema_fast - ema_slow
+        self._set("macd", k, macd)
+        signal = self._ema(None, settings.get("macd_signal", 9), "macd_signal", k, source=macd)
+        self._set("macd_hist", k, macd - signal)
+        self._dirty_from = None
+
+    def _ema(self, close, span, name, k, source=None):
+        """adjust=False EMA continuing from the stored value at k-1."""
+        values = close[k:] if source is None else source
+        alpha = 2.0 / (span + 1.0)
+        out = np.empty(len(values))
+        prev = self.column(name)[k - 1] if k > 0 else np.nan
+        for j, x in enumerate(values):
+            prev = x if np.isnan(prev) else prev + alpha * (x - prev)
+            out[j] = prev
+        self._set(name, k, out)
+        return out
+
+    # --- Lectura sin copia ---
+
+    def timestamps(self):
+        return self._ts[self._head:self._head + self._size]
+
+    def column(self, name):
+        """Zero-copy view of one column, oldest bar first."""
+        return self._data[_COL[name], self._head:self._head + self._size]
+
+    def frame(self):
+        """
+        DataFrame over the buffer memory (no copy), indexed by timestamp.
+        It reflects later writes, so copy it if it must outlive the next update.
+        """
+        block = self._data[:, self._head:self._head + self._size]
+        index = pd.DatetimeIndex(self.timestamps().view("datetime64[ns]"), name="timestamp")
+        return pd.DataFrame(block.T, index=index, columns=list(COLUMNS), copy=False)
+
+
+def _rolling_mean(x, window, start, valid_from=0):
+    """Rolling mean of x for positions >= start (NaN until `window` values exist)."""
+    n = len(x)
+    out = np.full(n - start, np.nan)
+    lo = max(start, valid_from + window - 1)
+    if lo < n:
+        windows = np.lib.stride_tricks.sliding_window_view(x[lo - window + 1:], window)
+        out[lo - start:] = windows.mean(axis=1)
+    return out
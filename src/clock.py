@@ -0,0 +1,36 @@
+import time
+from datetime import datetime
+
+# Reloj inyectable para run_bot_loop: el bot en vivo usa el del sistema y el
+# modo replay uno virtual que avanza al instante en cada sleep().
+
+
+class SystemClock:
+    def time(self):
+        return time.time()
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """Simulated time: sleep() advances the clock instead of blocking."""
+    def __init__(self, start):
+        self._t = start.timestamp() if isinstance(start, datetime) else float(start)
+        self.slept = 0.0
+
+    def time(self):
+        return self._t
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self._t, tz)
+
+    def sleep(self, seconds):
+        self._t += seconds
+        self.slept += seconds
+
+    def advance_to(self, ts):
+        self._t = max(self._t, float(ts))
@@ -0,0 +1,225 @@
+import os
+import time
+import uuid
+import zlib
+import socket
+import hashlib
+import logging
+import threading
+
+# Coordinación entre réplicas del bot sobre Redis.
+# El universo de símbolos se reparte en shards; cada shard tiene un lease con
+# TTL (SET NX + renovación atómica) y por tanto un único dueño a la vez.
+# Los nodos publican latidos; el reparto objetivo se calcula con rendezvous
+# hashing sobre los nodos vivos, así que cuando uno muere sus shards pasan a
+# los demás en cuanto expiran sus leases, y cuando uno entra se rebalancean.
+
+logger = logging.getLogger(__name__)
+
+_RENEW_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class RedisLeaseBackend:
+    """Leases and node registry on Redis (redis-py or upstash_redis client)."""
+    def __init__(self, redis, namespace="cluster"):
+        self.redis = redis
+        self.ns = namespace
+        self._upstash = type(redis).__module__.startswith("upstash_redis")
+
+    def _eval(self, script, keys, args):
+        if self._upstash:
+            return self.redis.eval(script, keys=keys, args=args)
+        return self.redis.eval(script, len(keys), *keys, *args)
+
+    def _lease_key(self, shard):
+        return f"{self.ns}:lease:{shard}"
+
+    def acquire(self, shard, owner, ttl):
+        return bool(self.redis.set(self._lease_key(shard), owner, nx=True, px=int(ttl * 1000)))
+
+    def renew(self, shard, owner, ttl):
+        return bool(self._eval(_RENEW_LUA, [self._lease_key(shard)], [owner, str(int(ttl * 1000))]))
+
+    def release(self, shard, owner):
+        return bool(self._eval(_RELEASE_LUA, [self._lease_key(shard)], [owner]))
+
+    def owner(self, shard):
+        return _decode(self.redis.get(self._lease_key(shard)))
+
+    def heartbeat(self, node_id, ttl):
+        self.redis.hset(f"{self.ns}:nodes", node_id, str(time.time()))
+
+    def live_nodes(self, ttl):
+        raw = self.redis.hgetall(f"{self.ns}:nodes") or {}
+        now = time.time()
+        live, dead = [], []
+        for node, ts in raw.items():
+            (live if now - float(_decode(ts)) <= ttl else dead).append(_decode(node))
+        if dead:
+            self.redis.hdel(f"{self.ns}:nodes", *dead)
+        return sorted(live)
+
+
+class InMemoryLeaseBackend:
+    """
+    Process-local stand-in with the same semantics, for tests and failover drills.
+    Several coordinators sharing one instance behave like nodes sharing a Redis.
+    `clock` can be replaced to simulate time passing.
+    """
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._leases = {}
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def _current(self, shard):
+        lease = self._leases.get(shard)
+        if lease and lease[1] <= self.clock():
+            del self._leases[shard]
+            return None
+        return lease
+
+    def acquire(self, shard, owner, ttl):
+        with self._lock:
+            if self._current(shard):
+                return False
+            self._leases[shard] = (owner, self.clock() + ttl)
+            return True
+
+    def renew(self, shard, owner, ttl):
+        with self._lock:
+            lease = self._current(shard)
+            if not lease or lease[0] != owner:
+                return False
+            self._leases[shard] = (owner, self.clock() + ttl)
+            return True
+
+    def release(self, shard, owner):
+        with self._lock:
+            lease = self._current(shard)
+            if lease and lease[0] == owner:
+                del self._leases[shard]
+                return True
+            return False
+
+    def owner(self, shard):
+        with self._lock:
+            lease = self._current(shard)
+            return lease[0] if lease else None
+
+    def heartbeat(self, node_id, ttl):
+        with self._lock:
+            self._nodes[node_id] = self.clock()
+
+    def live_nodes(self, ttl):
+        with self._lock:
+            now = self.clock()
+            for node in [n for n, ts in self._nodes.items() if now - ts > ttl]:
+                del self._nodes[node]
+            return sorted(self._nodes)
+
+
+def shard_of(symbol, n_shards):
+    return zlib.crc32(symbol.encode("utf-8")) % n_shards
+
+
+def rendezvous_owner(shard, nodes):
+    """Highest-random-weight node for a shard: stable when other nodes come and go."""
+    if not nodes:
+        return None
+    return max(nodes, key=lambda n: hashlib.sha1(f"{n}:{shard}".encode()).digest())
+
+
+class ShardCoordinator:
+    def __init__(self, backend, symbols, n_shards=None, node_id=None, lease_ttl=30.0, clock=time.monotonic):
+        self.backend = backend
+        self.symbols = list(symbols)
+        self.n_shards = n_shards or max(1, len(self.symbols))
+        self.node_id = node_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_ttl = lease_ttl
+        # Margen de seguridad: dejamos de operar antes de que el lease caduque en Redis
+        self.safety_margin = lease_ttl / 3
+        self.clock = clock
+        self._owned = {}  # shard -> instante local (clock) de la última renovación
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def tick(self):
+        """One coordination round: heartbeat, renew, rebalance. Returns owned shards."""
+        self.backend.heartbeat(self.node_id, self.lease_ttl)
+        nodes = self.backend.live_nodes(self.lease_ttl)
+        if self.node_id not in nodes:
+            nodes = sorted(nodes + [self.node_id])
+        target = {s for s in range(self.n_shards) if rendezvous_owner(s, nodes) == self.node_id}
+
+        now = self.clock()
+        with self._lock:
+            for shard in list(self._owned):
+                if shard not in target:
+                    # Otro nodo es el dueño objetivo: ceder el shard
+                    self.backend.release(shard, self.node_id)
+                    del self._owned[shard]
+                elif self.backend.renew(shard, self.node_id, self.lease_ttl):
+                    self._owned[shard] = now
+                else:
+                    logger.warning(f"⚠️ Lost lease for shard {shard}")
+                    del self._owned[shard]
+
+            for shard in target - set(self._owned):
+                # Si el dueño anterior murió, su lease caduca y entonces lo tomamos
+                if self.backend.acquire(shard, self.node_id, self.lease_ttl):
+                    logger.info(f"🔑 Node {self.node_id} acquired shard {shard}")
+                    self._owned[shard] = now
+            return set(self._owned)
+
+    def owns_shard(self, shard):
+        with self._lock:
+            renewed = self._owned.get(shard)
+        return renewed is not None and self.clock() - renewed < self.lease_ttl - self.safety_margin
+
+    def owns(self, symbol):
+        return self.owns_shard(shard_of(symbol, self.n_shards))
+
+    def my_symbols(self):
+        return [s for s in self.symbols if self.owns(s)]
+
+    def run_forever(self, interval=None):
+        interval = interval or self.lease_ttl / 3
+        while not self._stop.wait(interval):
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"❌ Coordination error: {e}")
+
+    def start(self):
+        # Primera ronda síncrona: al volver ya sabemos qué shards son nuestros
+        try:
+            self.tick()
+        except Exception as e:
+            logger.error(f"❌ Coordination error: {e}")
+        threading.Thread(target=self.run_forever, daemon=True, name="shard-coordinator").start()
+        return self
+
+    def stop(self, release=True):
+        self._stop.set()
+        if release:
+            with self._lock:
+                for shard in list(self._owned):
+                    self.backend.release(shard, self.node_id)
+                self._owned.clear()
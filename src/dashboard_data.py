@@ -0,0 +1,147 @@
+import time
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+# Capa de datos de los dashboards (dashboard.py / app.py).
+# Mantiene en memoria las filas de trading_logs ya descargadas y en cada
+# refresco solo pide a Supabase las filas con created_at posterior a la última.
+# Las series largas se reducen (LTTB / min-max) antes de dibujarlas.
+
+PAGE_SIZE = 1000
+
+
+class TradingLogCache:
+    def __init__(self, client, table="trading_logs", history_days=90, max_rows=200_000, min_refresh_seconds=30):
+        self.client = client
+        self.table = table
+        self.history_days = history_days
+        self.max_rows = max_rows
+        self.min_refresh_seconds = min_refresh_seconds
+        self._df = pd.DataFrame()
+        self._last_created_at = None
+        self._last_refresh = 0.0
+        self.stats = {"refreshes": 0, "rows_fetched": 0, "queries": 0}
+        self._lock = threading.Lock()  # compartido entre sesiones de Streamlit
+
+    def _fetch_pages(self, since, inclusive):
+        rows = []
+        while len(rows) < self.max_rows:
+            query = self.client.table(self.table).select("*")
+            query = query.gte("created_at", since) if inclusive else query.gt("created_at", since)
+            query = query.order("created_at").range(len(rows), len(rows) + PAGE_SIZE - 1)
+            page = query.execute().data or []
+            self.stats["queries"] += 1
+            rows.extend(page)
+            if len(page) < PAGE_SIZE:
+                break
+        return rows
+
+    def refresh(self, force=False):
+        """
+        Pulls only rows newer than the last cached created_at.
+        Calls within min_refresh_seconds of the previous one are served from memory.
+        Returns the number of new rows.
+        """
+        if not self.client:
+            return 0
+        with self._lock:
+            if not force and time.time() - self._last_refresh < self.min_refresh_seconds:
+                return 0
+            return self._refresh()
+
+    def _refresh(self):
+        if self._last_created_at is None:
+            since = (datetime.now(timezone.utc) - timedelta(days=self.history_days)).isoformat()
+            rows = self._fetch_pages(since, inclusive=True)
+        else:
+            rows = self._fetch_pages(self._last_created_at, inclusive=False)
+
+        self._last_refresh = time.time()
+        self.stats["refreshes"] += 1
+        if not rows:
+            return 0
+
+        new = pd.DataFrame(rows)
+        self._last_created_at = new["created_at"].iloc[-1]
+        new["created_at"] = pd.to_datetime(new["created_at"], utc=True, format="ISO8601")
+        df = pd.concat([self._df, new], ignore_index=True) if not self._df.empty else new
+        if "id" in df.columns:
+            df = df.drop_duplicates(subset="id", keep="last")
+        if len(df) > self.max_rows:
+            df = df.iloc[-self.max_rows:]
+        self._df = df.reset_index(drop=True)
+        self.stats["rows_fetched"] += len(rows)
+        return len(rows)
+
+    def frame(self):
+        """All cached rows, oldest first."""
+        return self._df
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Keeps the visual shape of a line with n_out points. Returns indices into x/y.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)  # n_out - 2 buckets interiores
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        # Punto medio del siguiente bucket
+        avg_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        avg_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        bx = x[start:stop]
+        by = y[start:stop]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_downsample(y, n_buckets):
+    """
+    Keeps the min and max of each bucket (2 * n_buckets points), preserving spikes.
+    Returns sorted indices into y.
+    """
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    size = n // n_buckets
+    usable = size * n_buckets
+    blocks = y[:usable].reshape(n_buckets, size)
+    base = np.arange(n_buckets) * size
+    idx = [base + blocks.argmin(axis=1), base + blocks.argmax(axis=1)]
+    if usable < n:
+        tail = y[usable:]
+        idx.append(np.array([usable + tail.argmin(), usable + tail.argmax()]))
+    return np.unique(np.concatenate(idx))
+
+
+def downsample_frame(df, x_col, y_col, n_out=2000, method="lttb"):
+    """Returns the rows of df (sorted by x_col) chosen to plot y_col with ~n_out points."""
+    if len(df) <= n_out:
+        return df
+    x = df[x_col]
+    if pd.api.types.is_datetime64_any_dtype(x):
+        x = x.astype("int64")
+    if method == "minmax":
+        idx = minmax_downsample(df[y_col].to_numpy(), n_out // 2)
+    else:
+        idx = lttb(np.asarray(x, dtype=np.float64), df[y_col].to_numpy(), n_out)
+    return df.iloc[idx]
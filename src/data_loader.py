@@ -1,4 +1,5 @@
 import requests
+import numpy as np
 import pandas as pd
 import time
 
@@ -7,6 +8,49 @@ class DataLoader:
         self.base_url = "https://api.coingecko.com/api/v3"
 
     def fetch_ohlcv(self, symbol, timeframe):
+        data = self._fetch_ohlc_rows(symbol, timeframe)
+        if data is None:
+            return pd.DataFrame()
+
+        try:
+            # 3. Crear DataFrame
+            df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close'])
+            
+            # CoinGecko OHLC no trae volumen, lo creamos en 0 por compatibilidad con indicadores
+            df['volume'] = 0 
+            
+            # Convertir timestamp
+            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+            
+            # Asegurar que los datos sean numéricos para los indicadores
+            for col in ['open', 'high', 'low', 'close']:
+                df[col] = pd.to_numeric(df[col])
+            
+            return df
+            
+        except Exception as e:
+            print(f"❌ Error en DataLoader: {e}")
+            return pd.DataFrame()
+
+    def fetch_into(self, buffer, symbol, timeframe):
+        """
+        Same download as fetch_ohlcv, written straight into a CandleBuffer
+        (no DataFrame). Returns the number of bars that changed, or None on failure.
+        """
+        data = self._fetch_ohlc_rows(symbol, timeframe)
+        if not data:
+            return None
+        try:
+            rows = np.asarray(data, dtype=np.float64)
+            values = np.zeros((len(rows), 5))
+            values[:, :4] = rows[:, 1:5]  # open/high/low/close, volume = 0
+            return buffer.update(rows[:, 0].astype(np.int64) * 1_000_000, values)
+        except Exception as e:
+            print(f"❌ Error en DataLoader: {e}")
+            return None
+
+    def _fetch_ohlc_rows(self, symbol, timeframe):
+        """Raw CoinGecko OHLC rows [[ms, open, high, low, close], ...] or None."""
         # 1. Mapeo de Símbolo a ID de CoinGecko
         coin_id = symbol.split('/')[0].lower()
         mapping = {
@@ -31,29 +75,14 @@ class DataLoader:
             if response.status_code == 429:
                 print("⚠️ Rate limit alcanzado (CoinGecko). Esperando 60s...")
                 time.sleep(60)
-                return pd.DataFrame()
+                return None
             
             if response.status_code != 200:
                 print(f"❌ Error API CoinGecko: {response.status_code}")
-                return pd.DataFrame()
+                return None
                 
-            data = response.json()
-            
-            # 3. Crear DataFrame
-            df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close'])
-            
-            # CoinGecko OHLC no trae volumen, lo creamos en 0 por compatibilidad con indicadores
-            df['volume'] = 0 
-            
-            # Convertir timestamp
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            
-            # Asegurar que los datos sean numéricos para los indicadores
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = pd.to_numeric(df[col])
-            
-            return df
+            return response.json()
             
         except Exception as e:
             print(f"❌ Error en DataLoader: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return None
\ No newline at end of file
@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+# Agregación de latidos HOLD/WATCHING.
+# Cada ciclo sin operación se acumula en memoria y solo se escribe un resumen
+# por ventana (OHLC del precio, distribución de sentimiento, nº de ciclos).
+# Las operaciones reales se siguen registrando al instante desde main.py.
+
+ROLLUP_ACTION = "HOLD_ROLLUP"
+SENTIMENTS = ("BULLISH", "BEARISH", "NEUTRAL")
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket_start(ts, interval_minutes):
+    minutes = (ts.hour * 60 + ts.minute) // interval_minutes * interval_minutes
+    return ts.replace(hour=minutes // 60, minute=minutes % 60, second=0, microsecond=0)
+
+
+class HeartbeatAggregator:
+    def __init__(self, supabase=None, notion=None, interval_minutes=15):
+        if interval_minutes <= 0 or (1440 % interval_minutes):
+            raise ValueError("interval_minutes debe dividir un día (ej: 15, 60)")
+        self.supabase = supabase
+        self.notion = notion
+        self.interval_minutes = interval_minutes
+        self._bucket = None
+        self._current = None
+        self.stats = {"samples": 0, "rollups": 0}
+
+    def record(self, price, sentiment, confidence, pnl=0.0, ts=None):
+        """Adds one idle-cycle sample; flushes the previous window when a new one starts."""
+        ts = ts or datetime.now(timezone.utc)
+        bucket = _bucket_start(ts, self.interval_minutes)
+        if self._bucket is not None and bucket != self._bucket:
+            self.flush()
+
+        price = float(price)
+        if self._current is None:
+            self._bucket = bucket
+            self._current = {
+                "open": price, "high": price, "low": price, "close": price,
+                "cycles": 0, "confidence_sum": 0.0, "pnl": 0.0,
+                "sentiments": dict.fromkeys(SENTIMENTS, 0),
+            }
+        cur = self._current
+        cur["high"] = max(cur["high"], price)
+        cur["low"] = min(cur["low"], price)
+        cur["close"] = price
+        cur["cycles"] += 1
+        cur["confidence_sum"] += float(confidence)
+        cur["pnl"] = float(pnl)
+        cur["last_sentiment"] = sentiment
+        cur["sentiments"][sentiment if sentiment in SENTIMENTS else "NEUTRAL"] += 1
+        self.stats["samples"] += 1
+
+    def get_state(self):
+        return {"bucket": self._bucket, "current": self._current, "interval_minutes": self.interval_minutes}
+
+    def set_state(self, state):
+        """Restores a pending window saved before a restart (same interval only)."""
+        if state and state.get("interval_minutes") == self.interval_minutes:
+            self._bucket = state["bucket"]
+            self._current = state["current"]
+
+    def flush(self):
+        """Writes the pending window (if any). Returns the rollup dict."""
+        if self._current is None:
+            return None
+        rollup = build_rollup(self._bucket, self.interval_minutes, self._current)
+        self._current = None
+        self._bucket = None
+
+        if self.supabase:
+            self.supabase.log_rollup(rollup)
+        if self.notion:
+            try:
+                self.notion.log_trade(action="WATCHING", price=rollup["close"], sentiment=rollup["sentiment"],
+                                      confidence=rollup["confidence"], profit=rollup["pnl"])
+            except Exception as e:
+                logger.error(f"Notion rollup error: {e}")
+        self.stats["rollups"] += 1
+        return rollup
+
+
+def build_rollup(bucket_start, interval_minutes, cur):
+    dist = cur["sentiments"]
+    return {
+        "bucket_start": bucket_start.isoformat(),
+        "interval_minutes": interval_minutes,
+        "open": cur["open"],
+        "high": cur["high"],
+        "low": cur["low"],
+        "close": cur["close"],
+        "cycles": cur["cycles"],
+        "bullish": dist["BULLISH"],
+        "bearish": dist["BEARISH"],
+        "neutral": dist["NEUTRAL"],
+        # Sentimiento dominante de la ventana y confianza media
+        "sentiment": max(SENTIMENTS, key=lambda s: dist[s]),
+        "confidence": cur["confidence_sum"] / cur["cycles"] if cur["cycles"] else 0.0,
+        "pnl": cur["pnl"],
+    }
+
+
+def compact_raw_heartbeats(supabase_logger, older_than_days=7, interval_minutes=60, table="trading_logs"):
+    """
+    Retention job: raw per-minute HOLD rows older than `older_than_days`
+    are replaced by one rollup per window. Returns (raw_rows, rollups).
+    """
+    client = supabase_logger.supabase
+    if not client:
+        return 0, 0
+
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=older_than_days)).isoformat()
+    rows, page = [], 1000
+    while True:
+        data = (client.table(table).select("*").eq("action", "HOLD").lt("created_at", cutoff)
+                .order("created_at").range(len(rows), len(rows) + page - 1).execute().data or [])
+        rows.extend(data)
+        if len(data) < page:
+            break
+    if not rows:
+        return 0, 0
+
+    df = pd.DataFrame(rows)
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True, format="ISO8601")
+    df["bucket"] = df["created_at"].dt.floor(f"{interval_minutes}min")
+
+    rollups = []
+    for bucket, g in df.groupby("bucket", sort=True):
+        counts = g["sentiment"].value_counts()
+        cur = {
+            "open": float(g["price"].iloc[0]), "high": float(g["price"].max()),
+            "low": float(g["price"].min()), "close": float(g["price"].iloc[-1]),
+            "cycles": len(g), "confidence_sum": float(g["confidence"].sum()),
+            "pnl": float(g["pnl"].iloc[-1]),
+            "sentiments": {s: int(counts.get(s, 0)) for s in SENTIMENTS},
+        }
+        rollups.append(build_rollup(bucket.to_pydatetime(), interval_minutes, cur))
+    # Historia antigua: cada resumen se fecha al final de su ventana, no al momento de escribirlo
+    span = timedelta(minutes=interval_minutes)
+    ends = [(datetime.fromisoformat(r["bucket_start"]) + span).isoformat() for r in rollups]
+
+    # Primero escribir los resúmenes; solo si todos entraron se borran las filas crudas
+    if not all(supabase_logger.log_rollup(r, created_at=end) for r, end in zip(rollups, ends)):
+        logger.error("❌ Compaction aborted: some rollups failed to insert.")
+        return len(rows), 0
+    ids = [r["id"] for r in rows if "id" in r]
+    for i in range(0, len(ids), 500):
+        client.table(table).delete().in_("id", ids[i:i + 500]).execute()
+    logger.info(f"🧹 Compacted {len(rows)} HOLD rows into {len(rollups)} rollups.")
+    return len(rows), len(rollups)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.supabase_logger import SupabaseLogger
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Compact old HOLD heartbeat rows into rollups")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--interval", type=int, default=60)
+    args = parser.parse_args()
+    print(compact_raw_heartbeats(SupabaseLogger(), args.days, args.interval))
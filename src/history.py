@@ -0,0 +1,393 @@
+import os
+import glob
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Descarga de históricos largos por trozos.
+# Cada proveedor limita cuánto rango cabe en una petición (y a veces cuánto
+# hacia atrás se puede pedir), así que el rango pedido se parte en trozos
+# alineados a una rejilla fija, se descargan en paralelo bajo un límite de
+# peticiones por segundo con reintentos, y cada trozo se guarda de forma
+# atómica en el almacén local. Volver a lanzar el mismo comando reanuda: los
+# trozos completos ya guardados no se vuelven a pedir.
+
+DEFAULT_CANDLE_ROOT = os.getenv("CANDLE_STORE", "data/candles")
+FIELDS = ("open", "high", "low", "close", "volume")
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimited(Exception):
+    """Provider asked us to slow down (HTTP 429/418); retry_after in seconds if known."""
+    def __init__(self, retry_after=None):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def interval_delta(interval):
+    """'1m' / '1h' / '60m' / '1d' / '1wk' -> Timedelta."""
+    units = {"m": "min", "h": "h", "d": "D", "wk": "W"}
+    for suffix in ("wk", "m", "h", "d"):
+        if interval.endswith(suffix):
+            return pd.Timedelta(int(interval[:-len(suffix)] or 1), units[suffix])
+    raise ValueError(f"Intervalo no soportado: {interval}")
+
+
+def _utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def _empty_frame():
+    return pd.DataFrame({f: np.empty(0) for f in FIELDS},
+                        index=pd.DatetimeIndex([], tz="UTC", name="timestamp"))
+
+
+# --- Proveedores ---
+
+class YahooProvider:
+    """yfinance. Intraday ranges are capped both per request and in how far back they go."""
+    name = "yahoo"
+    # intervalo: (rango máximo por petición, antigüedad máxima)
+    LIMITS = {
+        "1m": ("7D", "30D"),
+        "2m": ("60D", "60D"), "5m": ("60D", "60D"), "15m": ("60D", "60D"),
+        "30m": ("60D", "60D"), "90m": ("60D", "60D"),
+        "60m": ("730D", "730D"), "1h": ("730D", "730D"),
+    }
+
+    def max_span(self, interval):
+        return pd.Timedelta(self.LIMITS.get(interval, ("3650D", None))[0])
+
+    def lookback(self, interval):
+        limit = self.LIMITS.get(interval, (None, None))[1]
+        return pd.Timedelta(limit) if limit else None
+
+    def fetch(self, symbol, interval, start, end):
+        import yfinance as yf
+
+        df = yf.Ticker(symbol).history(start=start, end=end, interval=interval, auto_adjust=False, raise_errors=True)
+        if df.empty:
+            return _empty_frame()
+        df.columns = [str(c).lower() for c in df.columns]
+        index = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+        return pd.DataFrame({f: df[f].to_numpy(dtype=np.float64) for f in FIELDS},
+                            index=pd.DatetimeIndex(index, name="timestamp"))
+
+
+class BinanceProvider:
+    """Binance public klines: 1000 bars per request, 1m history back to 2017, no API key."""
+    name = "binance"
+    base_url = "https://api.binance.com/api/v3/klines"
+    LIMIT = 1000
+
+    def __init__(self, quote="USDT"):
+        self.quote = quote
+
+    def max_span(self, interval):
+        return interval_delta(interval) * self.LIMIT
+
+    def lookback(self, interval):
+        return None
+
+    def market(self, symbol):
+        """'BTC-USD' / 'BTC/USD' / 'BTCUSDT' -> 'BTCUSDT'."""
+        base = symbol.replace("/", "-").split("-")[0].upper()
+        return base if base.endswith(self.quote) else f"{base}{self.quote}"
+
+    def fetch(self, symbol, interval, start, end):
+        import requests
+
+        params = {"symbol": self.market(symbol), "interval": "1h" if interval == "60m" else interval,
+                  "startTime": int(start.value // 1_000_000), "endTime": int(end.value // 1_000_000) - 1,
+                  "limit": self.LIMIT}
+        response = requests.get(self.base_url, params=params, timeout=30)
+        if response.status_code in (418, 429):
+            raise RateLimited(float(response.headers.get("Retry-After", 60)))
+        response.raise_for_status()
+        rows = response.json()
+        if not rows:
+            return _empty_frame()
+        data = np.asarray([r[:6] for r in rows], dtype=np.float64)
+        index = pd.DatetimeIndex(pd.to_datetime(data[:, 0].astype(np.int64), unit="ms", utc=True), name="timestamp")
+        return pd.DataFrame(data[:, 1:6], index=index, columns=list(FIELDS))
+
+
+class FixtureProvider:
+    """
+    Serves candles from local frames ({symbol: OHLCV DataFrame}) with the same
+    per-request cap and lookback limit as a real provider, for tests and offline
+    runs (`now` fixes the clock the lookback is measured from).
+    fail_rate makes a fraction of requests raise, to exercise retries.
+    """
+    name = "fixture"
+
+    def __init__(self, frames, span="7D", lookback=None, fail_rate=0.0, seed=0, now=None):
+        self.frames = {sym: df.sort_index() for sym, df in frames.items()}
+        self.span = pd.Timedelta(span)
+        self._lookback = pd.Timedelta(lookback) if lookback else None
+        self.now = None if now is None else _utc(now)
+        self.fail_rate = fail_rate
+        self.calls = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_dir(cls, path, **kwargs):
+        """One <SYMBOL>.csv per symbol with a timestamp column plus OHLCV."""
+        frames = {}
+        for f in sorted(glob.glob(os.path.join(path, "*.csv"))):
+            df = pd.read_csv(f, parse_dates=["timestamp"], index_col="timestamp")
+            frames[os.path.splitext(os.path.basename(f))[0]] = df
+        return cls(frames, **kwargs)
+
+    def max_span(self, interval):
+        return self.span
+
+    def lookback(self, interval):
+        return self._lookback
+
+    def fetch(self, symbol, interval, start, end):
+        with self._lock:
+            self.calls.append((symbol, interval, start, end))
+            fail = self._rng.random() < self.fail_rate
+        if end - start > self.span:
+            raise ValueError(f"Rango {end - start} mayor que el máximo {self.span}")
+        if self._lookback is not None:
+            now = self.now if self.now is not None else pd.Timestamp.now(tz="UTC")
+            if start < now - self._lookback:
+                # Como Yahoo: rechaza la petición entera si empieza antes de su límite
+                raise ValueError(f"Inicio {start} anterior al límite de {self._lookback}")
+        if fail:
+            raise ConnectionError("fixture: simulated failure")
+        df = self.frames[symbol]
+        index = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+        mask = (index >= start) & (index < end)
+        return pd.DataFrame({f: df[f].to_numpy(dtype=np.float64)[mask] for f in FIELDS},
+                            index=pd.DatetimeIndex(index[mask], name="timestamp"))
+
+
+PROVIDERS = {"yahoo": YahooProvider, "binance": BinanceProvider}
+
+
+# --- Almacén local ---
+
+class CandleStore:
+    """
+    One .npz per downloaded chunk under <root>/<provider>/<symbol>/<interval>/.
+    Chunks that reach into the future are stored as *.partial.npz and fetched again.
+    """
+    def __init__(self, root=DEFAULT_CANDLE_ROOT):
+        self.root = root
+
+    def _dir(self, provider, symbol, interval):
+        return os.path.join(self.root, provider, symbol.replace("/", "-"), interval)
+
+    def _chunk_path(self, provider, symbol, interval, start, end, partial=False):
+        name = f"{start.value}_{end.value}{'.partial' if partial else ''}.npz"
+        return os.path.join(self._dir(provider, symbol, interval), name)
+
+    def has_chunk(self, provider, symbol, interval, start, end):
+        return os.path.exists(self._chunk_path(provider, symbol, interval, start, end))
+
+    def write_chunk(self, provider, symbol, interval, start, end, df, partial=False):
+        path = self._chunk_path(provider, symbol, interval, start, end, partial)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp, "wb") as f:
+            np.savez(f, timestamp=df.index.as_unit("ns").asi8,
+                     values=df[list(FIELDS)].to_numpy(dtype=np.float64))
+        os.replace(tmp, path)  # atómico: un trozo existe completo o no existe
+        if not partial:
+            stale = self._chunk_path(provider, symbol, interval, start, end, partial=True)
+            if os.path.exists(stale):
+                os.remove(stale)
+
+    def load(self, provider, symbol, interval, start=None, end=None):
+        """All stored candles as one DataFrame (UTC index, overlaps de-duplicated)."""
+        files = [f for f in glob.glob(os.path.join(self._dir(provider, symbol, interval), "*.npz"))
+                 if ".tmp-" not in f]
+        if not files:
+            return _empty_frame()
+        # Los parciales van primero para que un trozo completo del mismo rango gane
+        files.sort(key=lambda f: (".partial" not in f, f))
+        ts, values = [], []
+        for f in files:
+            with np.load(f) as z:
+                ts.append(z["timestamp"])
+                values.append(z["values"])
+        ts, values = np.concatenate(ts), np.concatenate(values)
+        # Solapes entre trozos: se queda la última copia de cada vela
+        _, last = np.unique(ts[::-1], return_index=True)
+        keep = len(ts) - 1 - last
+        df = pd.DataFrame(values[keep], columns=list(FIELDS),
+                          index=pd.DatetimeIndex(pd.to_datetime(ts[keep], utc=True), name="timestamp"))
+        if start is not None or end is not None:
+            lo = _utc(start) if start is not None else df.index[0]
+            hi = _utc(end) if end is not None else df.index[-1] + pd.Timedelta(1)
+            df = df[(df.index >= lo) & (df.index < hi)]
+        return df
+
+
+# --- Descarga ---
+
+class RateLimiter:
+    """Token bucket shared by the worker threads (rate requests/second, bursts up to `burst`)."""
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = burst
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+    def pause(self, seconds):
+        """Everybody waits (provider said we are going too fast)."""
+        with self._lock:
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class HistoryDownloader:
+    def __init__(self, provider, store=None, workers=4, rate=2.0, retries=5, backoff=1.0, sleep=time.sleep):
+        self.provider = provider
+        self.store = store or CandleStore()
+        self.workers = workers
+        self.limiter = RateLimiter(rate, burst=max(1, workers), sleep=sleep)
+        self.retries = retries
+        self.backoff = backoff
+        self.sleep = sleep
+
+    def _lookback_start(self, interval, now):
+        """Oldest timestamp the provider serves for `interval` (None if unlimited)."""
+        lookback = self.provider.lookback(interval)
+        if lookback is None:
+            return None
+        # Margen de un intervalo para no pedir justo en el borde que el proveedor rechaza
+        return now - lookback + interval_delta(interval)
+
+    def plan(self, symbol, interval, start, end, now=None):
+        """
+        Chunks [a, b) covering [start, end), on a grid aligned to the epoch so
+        that different requested ranges share (and reuse) the same chunks.
+        """
+        now = pd.Timestamp.now(tz="UTC") if now is None else _utc(now)
+        start, end = _utc(start), min(_utc(end), now)
+        floor = self._lookback_start(interval, now)
+        if floor is not None and start < floor:
+            logger.warning(f"⚠️ {self.provider.name} only serves {interval} for the last {self.provider.lookback(interval)}; "
+                           f"starting at {floor:%Y-%m-%d %H:%M} instead of {start:%Y-%m-%d %H:%M}")
+            start = floor
+
+        span = self.provider.max_span(interval)
+        step = interval_delta(interval)
+        span = max(step, (span // step) * step)  # un número entero de velas
+        first = (start.value // span.value) * span.value
+        edges = np.arange(first, end.value + span.value, span.value)
+        chunks = []
+        for a, b in zip(edges[:-1], edges[1:]):
+            if b <= start.value or a >= end.value:
+                continue
+            chunks.append((pd.Timestamp(int(a), tz="UTC"), pd.Timestamp(int(b), tz="UTC")))
+        return chunks
+
+    def _fetch_chunk(self, symbol, interval, start, end, now):
+        # El primer trozo de la rejilla puede empezar antes del límite del proveedor:
+        # se pide desde el límite y se guarda como parcial (le falta el principio)
+        floor = self._lookback_start(interval, now)
+        fetch_start = start if floor is None else max(start, floor)
+        partial = end > now or fetch_start > start
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                df = self.provider.fetch(symbol, interval, fetch_start, min(end, now))
+                df = df[(df.index >= start) & (df.index < end)]
+                self.store.write_chunk(self.provider.name, symbol, interval, start, end, df, partial=partial)
+                return len(df)
+            except RateLimited as e:
+                wait = e.retry_after or self.backoff * 2 ** attempt
+                logger.warning(f"⏳ Rate limited by {self.provider.name}, pausing {wait:.0f}s")
+                self.limiter.pause(wait)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                wait = self.backoff * 2 ** attempt * (0.5 + random.random())
+                logger.warning(f"⚠️ {symbol} {start:%Y-%m-%d %H:%M} failed ({e}); retry {attempt + 1}/{self.retries} in {wait:.1f}s")
+                self.sleep(wait)
+        raise RuntimeError(f"{symbol} {start}: still rate limited after {self.retries} retries")
+
+    def download(self, symbol, interval, start, end, now=None):
+        """
+        Fetches every chunk of [start, end) not stored yet. Failed chunks are
+        reported and left for the next run. Returns a summary dict.
+        """
+        now = pd.Timestamp.now(tz="UTC") if now is None else _utc(now)
+        chunks = self.plan(symbol, interval, start, end, now=now)
+        pending = [(a, b) for a, b in chunks if not self.store.has_chunk(self.provider.name, symbol, interval, a, b)]
+        logger.info(f"📥 {symbol} {interval}: {len(chunks)} chunks, {len(chunks) - len(pending)} already stored, "
+                    f"{len(pending)} to fetch ({self.provider.name}, {self.workers} workers)")
+
+        bars, failed = 0, []
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [((a, b), pool.submit(self._fetch_chunk, symbol, interval, a, b, now)) for a, b in pending]
+            for i, ((a, b), future) in enumerate(futures, 1):
+                try:
+                    bars += future.result()
+                except Exception as e:
+                    failed.append((a, b))
+                    logger.error(f"❌ {symbol} chunk {a:%Y-%m-%d %H:%M}: {e}")
+                if i % 50 == 0:
+                    logger.info(f"  {i}/{len(pending)} chunks")
+        return {"chunks": len(chunks), "fetched": len(pending) - len(failed), "skipped": len(chunks) - len(pending),
+                "failed": failed, "bars": bars}
+
+    def fetch(self, symbol, interval, start, end):
+        """download() and then the stored candles for [start, end)."""
+        result = self.download(symbol, interval, start, end)
+        if result["failed"]:
+            logger.warning(f"⚠️ {len(result['failed'])} chunks missing; rerun to resume.")
+        return self.store.load(self.provider.name, symbol, interval, start, end)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Resumable chunked download of long candle histories")
+    parser.add_argument("symbols", nargs="+", help="e.g. BTC-USD ETH-USD")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--start", required=True, help="e.g. 2021-01-01")
+    parser.add_argument("--end", default=None, help="default: now")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default="binance")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="requests per second")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--root", default=DEFAULT_CANDLE_ROOT)
+    args = parser.parse_args()
+
+    downloader = HistoryDownloader(PROVIDERS[args.provider](), CandleStore(args.root),
+                                   workers=args.workers, rate=args.rate, retries=args.retries)
+    end = args.end or pd.Timestamp.now(tz="UTC")
+    for symbol in args.symbols:
+        r = downloader.download(symbol, args.interval, args.start, end)
+        stored = len(downloader.store.load(args.provider, symbol, args.interval))
+        print(f"✅ {symbol}: {r['fetched']} chunks fetched, {r['skipped']} reused, "
+              f"{len(r['failed'])} failed | {stored} candles stored")
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+# Perfilado de arranque: ejecuta `python -X importtime -c "import <module>"`
+# en un proceso limpio y resume qué paquetes dominan el tiempo de import.
+
+
+def profile_imports(module="main", cwd=None):
+    """
+    Returns (total_seconds, rows) where rows are dicts with 'package', 'depth',
+    'self_us' and 'cumulative_us', as reported by -X importtime.
+    """
+    env = dict(os.environ)
+    env.pop("SPACE_ID", None)  # perfilamos el camino de cliente
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or os.getcwd(),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabecera
+        name = parts[2].rstrip()
+        rows.append({
+            "package": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+        })
+
+    if proc.returncode != 0:
+        print(f"⚠️ import {module} falló:\n{proc.stderr.splitlines()[-1] if proc.stderr else ''}")
+
+    # Los módulos de nivel superior (sin sangría) suman el total
+    total_us = sum(r["cumulative_us"] for r in rows if r["depth"] == 0)
+    return total_us / 1e6, rows
+
+
+def print_import_report(module="main", top=25):
+    total, rows = profile_imports(module)
+    top_level = {}
+    for r in rows:
+        name = r["package"].split(".")[0]
+        top_level[name] = top_level.get(name, 0) + r["self_us"]
+
+    print("\n" + "=" * 40)
+    print(f"⏱️ IMPORT TIME: import {module} -> {total:.3f}s")
+    print("=" * 40)
+    print(f"{'paquete':<30}{'self (ms)':>12}")
+    for name, us in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{name:<30}{us / 1000:>12.1f}")
+
+    print("\nMódulos más lentos (cumulative):")
+    for r in sorted(rows, key=lambda r: r["cumulative_us"], reverse=True)[:top]:
+        print(f"{r['cumulative_us'] / 1000:>10.1f} ms  {r['package']}")
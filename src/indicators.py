@@ -0,0 +1,530 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Núcleo de indicadores fusionado.
+# Con numba, un único bucle compilado recorre cada serie una vez y actualiza el
+# estado de todos los indicadores pedidos en el mismo paso. Sin numba, en lugar
+# de una Series intermedia por paso (como src/utils.py), todas las medias
+# móviles salen de UNA suma acumulada sobre una matriz contigua con sus entradas
+# apiladas, y las medias exponenciales (MACD, RSI/ATR de Wilder) de un scan
+# lineal por bloques (producto de matrices dentro de cada bloque, acarreo entre
+# bloques). Acepta una serie (n,) o un panel (n, símbolos) y calcula solo lo que
+# pide el spec. Ese fallback da ~6M velas·símbolo/s con DEFAULT_SPEC (1 núcleo),
+# poco más que utils.add_indicators_panel; numba está en requirements.txt.
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # sin numba: motor NumPy (ver arriba)
+    HAVE_NUMBA = False
+
+# Spec declarativo: qué indicadores necesita una estrategia y con qué parámetros.
+# DEFAULT_SPEC reproduce utils.add_indicators (mismas columnas, mismas fórmulas).
+DEFAULT_SPEC = {
+    "rsi": {"period": 14, "method": "sma"},        # method: "sma" | "wilder" | "both"
+    "macd": {"fast": 12, "slow": 26, "signal": 9},
+    "sma": [50, 200],
+}
+EXTENDED_SPEC = dict(
+    DEFAULT_SPEC,
+    rsi={"period": 14, "method": "both"},
+    atr={"period": 14},                          # Wilder
+    bollinger={"period": 20, "k": 2.0},          # desviación poblacional (ddof=0)
+    vwap={"anchor": "D"},                        # se reinicia cada día (None = acumulado)
+)
+_BLOCK = 32
+
+
+def spec_from_settings(settings, extended=False):
+    """Spec equivalent to the bot settings (rsi_period, macd_fast/slow/signal)."""
+    spec = {k: (dict(v) if isinstance(v, dict) else list(v)) for k, v in (EXTENDED_SPEC if extended else DEFAULT_SPEC).items()}
+    spec["rsi"]["period"] = settings.get("rsi_period", 14)
+    spec["macd"] = {"fast": settings.get("macd_fast", 12), "slow": settings.get("macd_slow", 26),
+                    "signal": settings.get("macd_signal", 9)}
+    return spec
+
+
+def columns(spec):
+    """Output column names for a spec, in order."""
+    cols = []
+    if "rsi" in spec:
+        method = spec["rsi"].get("method", "sma")
+        cols += (["rsi"] if method in ("sma", "both") else []) + (["rsi_wilder"] if method in ("wilder", "both") else [])
+    if "macd" in spec:
+        cols += ["macd", "macd_signal", "macd_hist"]
+    cols += [f"sma_{w}" for w in spec.get("sma", [])]
+    if "atr" in spec:
+        cols.append("atr")
+    if "bollinger" in spec:
+        cols += ["bb_mid", "bb_upper", "bb_lower"]
+    if "vwap" in spec:
+        cols.append("vwap")
+    return cols
+
+
+# --- Primitivas ---
+
+def _linear_scan(u, decay, init):
+    """
+    y[t] = decay * y[t-1] + u[t] along axis 0, with y[-1] = init (shape u.shape[1:]).
+    Blocks of _BLOCK rows are solved with one matrix product for all blocks and
+    columns at once; the carries between blocks are the same recurrence one level
+    up (decay ** _BLOCK), solved recursively.
+    """
+    n = u.shape[0]
+    if n == 0:
+        return u.copy()
+    shape = u.shape
+    u = u.reshape(n, -1)
+    k = u.shape[1]
+    init = np.broadcast_to(np.asarray(init, dtype=u.dtype), shape[1:]).reshape(k)
+    b = _BLOCK
+    nb = -(-n // b)
+    pad = np.zeros((nb * b, k), dtype=u.dtype)
+    pad[:n] = u
+
+    steps = np.arange(b)
+    lag = steps[:, None] - steps[None, :]
+    weights = np.where(lag >= 0, decay ** np.maximum(lag, 0), 0.0).astype(u.dtype)
+    # (b, b) @ (b, bloques * columnas): cada bloque resuelto desde 0
+    local = weights @ pad.reshape(nb, b, k).transpose(1, 0, 2).reshape(b, nb * k)
+    local = local.reshape(b, nb, k)
+
+    # Acarreo al final de cada bloque: c_j = decay^b * c_{j-1} + local[-1, j]
+    last = local[-1]
+    carry = _linear_scan(last, decay ** b, init) if nb > 1 else last + decay ** b * init
+    prev = np.concatenate((init[None], carry[:-1]))
+    powers = (decay ** (steps + 1)).astype(u.dtype)
+    local += powers[:, None, None] * prev[None]
+    return local.transpose(1, 0, 2).reshape(nb * b, k)[:n].reshape(shape)
+
+
+def _ewm(x, alpha):
+    """pandas ewm(alpha, adjust=False).mean() on columns without NaN gaps (leading NaN allowed)."""
+    valid = ~np.isnan(x)
+    if valid.all():
+        return _linear_scan(alpha * x, 1 - alpha, x[0])
+    first = np.argmax(valid, axis=0)
+    seed = np.take_along_axis(x, first[None], axis=0)[0] if x.ndim > 1 else x[first]
+    filled = np.where(valid | (np.arange(len(x)).reshape((-1,) + (1,) * (x.ndim - 1)) > first), x, seed)
+    out = _linear_scan(alpha * filled, 1 - alpha, seed)
+    out[~valid & (np.arange(len(x)).reshape((-1,) + (1,) * (x.ndim - 1)) < first)] = np.nan
+    return out
+
+
+def _wilder(x, period, start):
+    """Wilder smoothing: mean of x[start-period+1 .. start] at `start`, then y += (x - y) / period."""
+    out = np.full(x.shape, np.nan, dtype=x.dtype)
+    if len(x) <= start:
+        return out
+    alpha = 1.0 / period
+    seed = x[start - period + 1:start + 1].mean(axis=0)
+    out[start] = seed
+    out[start + 1:] = _linear_scan(alpha * x[start + 1:], 1 - alpha, seed)
+    return out
+
+
+# Filas de salida del bucle fusionado (las SMAs van a continuación)
+_ROWS = ("rsi", "rsi_wilder", "macd", "macd_signal", "macd_hist", "atr", "bb_mid", "bb_upper", "bb_lower", "vwap")
+
+
+def _rsi_value(gain, loss):
+    # Mismo resultado que 100 - 100 / (1 + gain / loss) en NumPy: 100 sin pérdidas, NaN sin movimiento
+    if loss == 0.0:
+        return 100.0 if gain > 0.0 else np.nan
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+def _fused_loop(c, h, lo, v, day, sma_w, p, out):
+    """
+    Reference single-pass kernel over one series (compiled with numba when available).
+    p = [rsi_period, rsi_mode (1 sma, 2 wilder, 3 both), fast, slow, signal,
+         atr_period, bb_period, bb_k, vwap, ref]; a 0 period disables the indicator.
+    Writes the rows of _ROWS followed by one row per SMA window into out.
+    """
+    n = c.shape[0]
+    rsi_p = int(p[0])
+    rsi_mode = int(p[1])
+    a_fast = 2.0 / (p[2] + 1.0)
+    a_slow = 2.0 / (p[3] + 1.0)
+    a_sig = 2.0 / (p[4] + 1.0)
+    atr_p = int(p[5])
+    bb_p = int(p[6])
+    bb_k = p[7]
+    vwap = p[8] > 0
+    ref = p[9]
+    n_sma = sma_w.shape[0]
+
+    gain_sum = 0.0
+    loss_sum = 0.0
+    n_loss = 0
+    w_gain = 0.0
+    w_loss = 0.0
+    ema_f = np.nan
+    ema_s = np.nan
+    ema_sig = np.nan
+    sma_sum = np.zeros(n_sma)
+    sma_cnt = np.zeros(n_sma, np.int64)
+    tr_sum = 0.0
+    atr = np.nan
+    pv = 0.0
+    cv = 0.0
+
+    for i in range(n):
+        x = c[i]
+        d = x - c[i - 1] if i > 0 else 0.0
+        g = d if d > 0 else 0.0
+        l = -d if d < 0 else 0.0
+
+        if rsi_p > 0:
+            gain_sum += g
+            loss_sum += l
+            if l > 0:
+                n_loss += 1
+            if i >= rsi_p:
+                j = i - rsi_p
+                d_old = c[j] - c[j - 1] if j > 0 else 0.0
+                if d_old > 0:
+                    gain_sum -= d_old
+                elif d_old < 0:
+                    loss_sum += d_old
+                    n_loss -= 1
+            if rsi_mode & 1:
+                if i >= rsi_p - 1:
+                    lm = loss_sum / rsi_p if n_loss > 0 else 0.0
+                    out[0, i] = _rsi_value(gain_sum / rsi_p, lm)
+                else:
+                    out[0, i] = np.nan
+            if rsi_mode & 2:
+                if i < rsi_p:
+                    w_gain += g
+                    w_loss += l
+                    out[1, i] = np.nan
+                else:
+                    if i == rsi_p:
+                        w_gain = (w_gain + g) / rsi_p
+                        w_loss = (w_loss + l) / rsi_p
+                    else:
+                        w_gain += (g - w_gain) / rsi_p
+                        w_loss += (l - w_loss) / rsi_p
+                    out[1, i] = _rsi_value(w_gain, w_loss)
+
+        if p[2] > 0:
+            xc = x - ref
+            if not np.isnan(xc):
+                ema_f = xc if np.isnan(ema_f) else ema_f + a_fast * (xc - ema_f)
+                ema_s = xc if np.isnan(ema_s) else ema_s + a_slow * (xc - ema_s)
+                m = ema_f - ema_s
+                ema_sig = m if np.isnan(ema_sig) else ema_sig + a_sig * (m - ema_sig)
+            m = ema_f - ema_s
+            out[2, i] = m
+            out[3, i] = ema_sig
+            out[4, i] = m - ema_sig
+
+        for k in range(n_sma):
+            w = sma_w[k]
+            if not np.isnan(x):
+                sma_sum[k] += x - ref
+                sma_cnt[k] += 1
+            if i >= w:
+                old = c[i - w]
+                if not np.isnan(old):
+                    sma_sum[k] -= old - ref
+                    sma_cnt[k] -= 1
+            out[len(_ROWS) + k, i] = sma_sum[k] / w + ref if sma_cnt[k] == w else np.nan
+
+        if atr_p > 0:
+            if i == 0:
+                tr = h[0] - lo[0]
+            else:
+                tr = max(h[i] - lo[i], abs(h[i] - c[i - 1]), abs(lo[i] - c[i - 1]))
+            if i < atr_p - 1:
+                tr_sum += tr
+            elif i == atr_p - 1:
+                atr = (tr_sum + tr) / atr_p
+            else:
+                atr += (tr - atr) / atr_p
+            out[5, i] = atr
+
+        if bb_p > 0:
+            if i >= bb_p - 1:
+                s = 0.0
+                for j in range(i - bb_p + 1, i + 1):
+                    s += c[j] - ref
+                mean = s / bb_p
+                q = 0.0
+                for j in range(i - bb_p + 1, i + 1):
+                    q += (c[j] - ref - mean) ** 2
+                std = np.sqrt(q / bb_p)
+                out[6, i] = mean + ref
+                out[7, i] = mean + ref + bb_k * std
+                out[8, i] = mean + ref - bb_k * std
+            else:
+                out[6, i] = np.nan
+                out[7, i] = np.nan
+                out[8, i] = np.nan
+
+        if vwap:
+            if i > 0 and day[i] != day[i - 1]:
+                pv = 0.0
+                cv = 0.0
+            tpv = ((h[i] + lo[i] + x) / 3.0 - ref) * v[i]
+            if tpv == tpv:  # una vela con NaN no cuenta (ni envenena el resto del día)
+                pv += tpv
+                cv += v[i]
+            out[9, i] = pv / cv + ref if cv > 0 else np.nan
+
+
+if HAVE_NUMBA:
+    _rsi_value = njit(cache=True)(_rsi_value)
+    _fused_loop_compiled = njit(cache=True, nogil=True, error_model="numpy")(_fused_loop)
+
+
+def _compute_loop(kernel, c, high, low, volume, spec, index):
+    n = c.shape[0]
+    cols = c.reshape(n, -1)
+    hi = None if high is None else np.asarray(high, dtype=np.float64).reshape(n, -1)
+    lo = None if low is None else np.asarray(low, dtype=np.float64).reshape(n, -1)
+    vol = None if volume is None else np.asarray(volume, dtype=np.float64).reshape(n, -1)
+    if ("atr" in spec or "vwap" in spec) and (hi is None or lo is None):
+        raise ValueError("ATR y VWAP necesitan high y low")
+    if "vwap" in spec and vol is None:
+        raise ValueError("VWAP necesita volume")
+
+    rsi, macd = spec.get("rsi", {}), spec.get("macd", {})
+    method = rsi.get("method", "sma")
+    anchor = spec.get("vwap", {}).get("anchor")
+    day = (pd.DatetimeIndex(index).floor(anchor).asi8 if anchor and index is not None
+           else np.zeros(n, dtype=np.int64))
+    sma_w = np.asarray(spec.get("sma", []), dtype=np.int64)
+    empty = np.zeros(n)
+
+    out = np.full((cols.shape[1], len(_ROWS) + len(sma_w), n), np.nan)
+    for j in range(cols.shape[1]):
+        col = np.ascontiguousarray(cols[:, j])
+        finite = col[~np.isnan(col)]
+        p = np.array([
+            rsi.get("period", 0), {"sma": 1, "wilder": 2, "both": 3}[method] if rsi else 0,
+            macd.get("fast", 0), macd.get("slow", 0), macd.get("signal", 0),
+            spec.get("atr", {}).get("period", 0),
+            spec.get("bollinger", {}).get("period", 0), spec.get("bollinger", {}).get("k", 2.0),
+            1.0 if "vwap" in spec else 0.0,
+            finite.mean() if finite.size else 0.0,  # centrar precios reduce el error de las sumas
+        ], dtype=np.float64)
+        kernel(col,
+               empty if hi is None else np.ascontiguousarray(hi[:, j]),
+               empty if lo is None else np.ascontiguousarray(lo[:, j]),
+               empty if vol is None else np.ascontiguousarray(vol[:, j]),
+               day, sma_w, p, out[j])
+
+    rows = {name: out[:, r] for r, name in enumerate(_ROWS)}
+    rows.update({f"sma_{w}": out[:, len(_ROWS) + k] for k, w in enumerate(sma_w)})
+    return {k: rows[k].T.reshape(c.shape) for k in columns(spec)}
+
+
+# --- Núcleo ---
+
+def compute(close, high=None, low=None, volume=None, spec=None, dtype=np.float64, index=None, engine="auto"):
+    """
+    Indicators of `spec` (default: the add_indicators set) for a series (n,)
+    or a panel (n, symbols). high/low are needed for ATR, high/low/volume for
+    VWAP; index (DatetimeIndex) anchors VWAP resets.
+    dtype=np.float32 halves output memory (and the matrix-product cost of the
+    numpy engine); running sums are still accumulated in float64.
+    engine: "numba" (fused loop), "numpy", "python" (reference loop) or "auto".
+    Returns {column: array shaped like close}.
+    """
+    spec = DEFAULT_SPEC if spec is None else spec
+    c = np.ascontiguousarray(close, dtype=np.float64)
+    if engine == "auto":
+        engine = "numba" if HAVE_NUMBA else "numpy"
+    if engine in ("numba", "python"):
+        if engine == "numba" and not HAVE_NUMBA:
+            raise ValueError("Motor no disponible: numba")
+        kernel = _fused_loop_compiled if engine == "numba" else _fused_loop
+        values = _compute_loop(kernel, c, high, low, volume, spec, index)
+        return {k: np.ascontiguousarray(v, dtype=dtype) for k, v in values.items()}
+    if engine != "numpy":
+        raise ValueError(f"Motor no disponible: {engine}")
+
+    n = c.shape[0]
+    tail = c.shape[1:]
+    out = {}
+
+    # 1. Entradas de todas las medias simples, apiladas: una sola suma acumulada
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # columnas vacías
+        ref = np.nan_to_num(np.nanmean(c, axis=0)) if n else 0.0  # centrar precios reduce el error de la suma
+    delta = np.diff(c, axis=0, prepend=c[:1])  # como pandas: el primer delta cuenta como 0
+    valid = ~np.isnan(c)
+    gaps = not valid.all()
+    inputs = {}   # filas de la suma acumulada (cada entrada una sola vez)
+    if "rsi" in spec:
+        p = spec["rsi"]["period"]
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        if spec["rsi"].get("method", "sma") in ("sma", "both"):
+            inputs.update(gain=gain, loss=loss, n_loss=(delta < 0))
+    if spec.get("sma") or "bollinger" in spec:
+        inputs["x"] = np.where(valid, c - ref, 0.0) if gaps else c - ref
+        if gaps:
+            inputs["n_valid"] = valid
+
+    if inputs:
+        names = list(inputs)
+        stacked = np.empty((len(names), n) + tail)  # (entrada, tiempo, símbolo) contiguo
+        for j, k in enumerate(names):
+            stacked[j] = inputs[k]
+        csum = np.zeros((len(names), n + 1) + tail)
+        np.cumsum(stacked, axis=1, out=csum[:, 1:])
+        row = {k: j for j, k in enumerate(names)}
+
+        def mean(name, w):
+            m = np.full((n,) + tail, np.nan)
+            if n >= w:
+                cs = csum[row[name]]
+                m[w - 1:] = (cs[w:] - cs[:n - w + 1]) / w
+            return m
+
+        def full_window(w):
+            # Como rolling(w).mean(): NaN salvo que las w velas de la ventana sean válidas
+            return mean("n_valid", w) > 1 - 0.5 / w if gaps else True
+
+        if "n_loss" in inputs:
+            # Sin pérdidas en la ventana la media es exactamente 0 (RSI = 100, como pandas)
+            loss_mean = np.where(mean("n_loss", p) > 0, mean("loss", p), 0.0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out["rsi"] = 100 - 100 / (1 + mean("gain", p) / loss_mean)
+        for w in spec.get("sma", []):
+            out[f"sma_{w}"] = np.where(full_window(w), mean("x", w) + ref, np.nan)
+        if "bollinger" in spec:
+            w, k = spec["bollinger"]["period"], spec["bollinger"].get("k", 2.0)
+            mid = np.where(full_window(w), mean("x", w) + ref, np.nan)
+            # La varianza por sumas acumuladas pierde precisión (E[x²] - E[x]²): ventana
+            # deslizante directa, O(n·w) con w pequeño
+            std = np.full((n,) + tail, np.nan)
+            if n >= w:
+                std[w - 1:] = np.lib.stride_tricks.sliding_window_view(c, w, axis=0).std(axis=-1)
+            out.update(bb_mid=mid, bb_upper=mid + k * std, bb_lower=mid - k * std)
+
+    # 2. Medias exponenciales: scan lineal por bloques
+    work = np.float32 if dtype == np.float32 else np.float64
+    if "macd" in spec:
+        m = spec["macd"]
+        cw = (c - ref).astype(work)
+        fast = _ewm(cw, 2.0 / (m["fast"] + 1))
+        slow = _ewm(cw, 2.0 / (m["slow"] + 1))
+        macd = fast - slow
+        signal = _ewm(macd, 2.0 / (m["signal"] + 1))
+        out.update(macd=macd, macd_signal=signal, macd_hist=macd - signal)
+    if "rsi" in spec and spec["rsi"].get("method", "sma") in ("wilder", "both"):
+        p = spec["rsi"]["period"]
+        g = _wilder(gain.astype(work), p, p)
+        l = _wilder(loss.astype(work), p, p)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["rsi_wilder"] = 100 - 100 / (1 + g / l)
+    if "atr" in spec:
+        if high is None or low is None:
+            raise ValueError("ATR necesita high y low")
+        h = np.asarray(high, dtype=np.float64)
+        lo = np.asarray(low, dtype=np.float64)
+        prev = np.concatenate((c[:1], c[:-1]))
+        tr = np.maximum(h - lo, np.maximum(np.abs(h - prev), np.abs(lo - prev)))
+        if n:
+            tr[0] = h[0] - lo[0]
+        p = spec["atr"]["period"]
+        out["atr"] = _wilder(tr.astype(work), p, p - 1)
+    if "vwap" in spec:
+        if high is None or low is None or volume is None:
+            raise ValueError("VWAP necesita high, low y volume")
+        tp = (np.asarray(high, dtype=np.float64) + np.asarray(low, dtype=np.float64) + c) / 3 - ref
+        v = np.asarray(volume, dtype=np.float64)
+        tpv = tp * v
+        valid = ~np.isnan(tpv)  # velas con NaN fuera de la suma, igual que el motor loop
+        pv = np.cumsum(np.where(valid, tpv, 0.0), axis=0)
+        cv = np.cumsum(np.where(valid, v, 0.0), axis=0)
+        anchor = spec["vwap"].get("anchor")
+        if anchor and index is not None and n:
+            period = pd.DatetimeIndex(index).floor(anchor).asi8
+            starts = np.flatnonzero(np.r_[True, period[1:] != period[:-1]])
+            start_of = starts[np.searchsorted(starts, np.arange(n), side="right") - 1]
+            before = start_of - 1
+            pv = pv - np.where((before >= 0).reshape((-1,) + (1,) * len(tail)), pv[np.maximum(before, 0)], 0.0)
+            cv = cv - np.where((before >= 0).reshape((-1,) + (1,) * len(tail)), cv[np.maximum(before, 0)], 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["vwap"] = np.where(cv > 0, pv / cv + ref, np.nan)
+
+    return {k: np.ascontiguousarray(out[k], dtype=dtype) for k in columns(spec)}
+
+
+def add_fused_indicators(df, spec=None, dtype=np.float64):
+    """compute() over an OHLCV DataFrame; returns df with the spec's columns added."""
+    has_hl = "high" in df.columns and "low" in df.columns
+    values = compute(df["close"].to_numpy(dtype=np.float64),
+                     df["high"].to_numpy(dtype=np.float64) if has_hl else None,
+                     df["low"].to_numpy(dtype=np.float64) if has_hl else None,
+                     df["volume"].to_numpy(dtype=np.float64) if "volume" in df.columns else None,
+                     spec, dtype, index=df.index if isinstance(df.index, pd.DatetimeIndex) else None)
+    for name, arr in values.items():
+        df[name] = arr
+    return df
+
+
+def benchmark(n_bars=20_000, n_symbols=50, repeat=3, seed=0):
+    """Times utils.add_indicators (one symbol at a time) against compute() on the same panel."""
+    import time
+    from src.utils import add_indicators, add_indicators_panel
+
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (n_bars, n_symbols)), axis=0))
+    settings = {"rsi_period": 14, "macd_fast": 12, "macd_slow": 26, "macd_signal": 9}
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            t = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - t)
+        return min(times), result
+
+    t_loop, frames = best(lambda: [add_indicators(pd.DataFrame({"close": close[:, j]}), settings) for j in range(n_symbols)])
+    t_panel, _ = best(lambda: add_indicators_panel(close, settings))
+    t_fused, fused = best(lambda: compute(close, spec=spec_from_settings(settings)))
+    t_f32, fused32 = best(lambda: compute(close, spec=spec_from_settings(settings), dtype=np.float32))
+
+    def max_err(values):
+        # Error relativo a la escala de cada columna: el precio, o 100 para el RSI
+        errs = {}
+        for col in values:
+            ref = np.column_stack([f[col].to_numpy() for f in frames])
+            scale = 100.0 if col.startswith("rsi") else close
+            errs[col] = float(np.nanmax(np.abs(values[col] - ref) / scale))
+        return errs
+
+    return {
+        "bars": n_bars, "symbols": n_symbols, "engine": "numba" if HAVE_NUMBA else "numpy",
+        "add_indicators_per_symbol_s": t_loop, "add_indicators_panel_s": t_panel,
+        "fused_s": t_fused, "fused_float32_s": t_f32,
+        "speedup_vs_per_symbol": t_loop / t_fused, "speedup_vs_panel": t_panel / t_fused,
+        "max_rel_error": max_err(fused), "max_rel_error_float32": max_err(fused32),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the fused indicator kernel against src/utils.py")
+    parser.add_argument("--bars", type=int, default=20_000)
+    parser.add_argument("--symbols", type=int, default=50)
+    args = parser.parse_args()
+
+    r = benchmark(args.bars, args.symbols)
+    print(f"⏱️ {r['bars']} velas × {r['symbols']} símbolos (motor {r['engine']})")
+    print(f"   add_indicators (uno a uno): {r['add_indicators_per_symbol_s'] * 1000:8.1f} ms")
+    print(f"   add_indicators_panel:       {r['add_indicators_panel_s'] * 1000:8.1f} ms")
+    print(f"   fused float64:              {r['fused_s'] * 1000:8.1f} ms  (x{r['speedup_vs_per_symbol']:.1f} / x{r['speedup_vs_panel']:.1f})")
+    print(f"   fused float32:              {r['fused_float32_s'] * 1000:8.1f} ms")
+    print(f"   error relativo máx. float64: {max(r['max_rel_error'].values()):.2e}")
+    print(f"   error relativo máx. float32: {max(r['max_rel_error_float32'].values()):.2e}")
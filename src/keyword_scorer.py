@@ -0,0 +1,81 @@
+import json
+import os
+import re
+import numpy as np
+
+# Scorer heurístico de sentimiento por palabras clave (cerebro de respaldo).
+# Un único regex compilado con límites de palabra recorre todo el lote de una
+# vez, así "up" ya no coincide dentro de "update" ni "low" dentro de "follow".
+
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "sentiment_lexicon.json")
+
+
+def load_lexicon(path=None):
+    """
+    Loads {"bullish": {term: weight}, "bearish": {term: weight}} from a JSON
+    file and returns a flat {term: signed_weight} dict.
+    """
+    path = path or os.getenv("TECH_BRAIN_LEXICON", DEFAULT_LEXICON_PATH)
+    with open(path) as f:
+        data = json.load(f)
+
+    weights = {}
+    for term, w in data.get("bullish", {}).items():
+        weights[term.lower()] = abs(float(w))
+    for term, w in data.get("bearish", {}).items():
+        weights[term.lower()] = -abs(float(w))
+    return weights
+
+
+class KeywordScorer:
+    def __init__(self, weights, clip=0.99, threshold=0.1):
+        if not weights:
+            raise ValueError("El léxico está vacío.")
+        self.terms = sorted(weights, key=len, reverse=True)  # el término más largo gana
+        self.term_index = {t: i for i, t in enumerate(self.terms)}
+        self.weights = np.array([weights[t] for t in self.terms], dtype=np.float64)
+        self.clip = clip
+        self.threshold = threshold
+        alternation = "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in self.terms)
+        self.pattern = re.compile(rf"(?<![\w-])(?:{alternation})(?![\w-])", re.IGNORECASE)
+
+    @classmethod
+    def from_file(cls, path=None, **kwargs):
+        return cls(load_lexicon(path), **kwargs)
+
+    def score_batch(self, texts):
+        """
+        Returns a float64 array with one score per text in [-clip, clip].
+        Each term counts once per text (presence, not frequency).
+        """
+        n = len(texts)
+        if n == 0:
+            return np.empty(0, dtype=np.float64)
+
+        # Todo el lote en una sola cadena; los offsets devuelven cada match a su texto.
+        # Separador \x00: no es \s ni \w, así que ninguna frase cruza de un texto al siguiente
+        joined = "\x00".join(texts)
+        lengths = np.fromiter((len(t) + 1 for t in texts), dtype=np.int64, count=n)
+        starts = np.concatenate(([0], np.cumsum(lengths[:-1])))
+
+        positions = []
+        term_ids = []
+        index = self.term_index
+        for m in self.pattern.finditer(joined):
+            positions.append(m.start())
+            term_ids.append(index[" ".join(m.group(0).lower().split())])
+
+        if not positions:
+            return np.zeros(n, dtype=np.float64)
+
+        text_ids = np.searchsorted(starts, np.asarray(positions), side="right") - 1
+        pairs = np.unique(text_ids * len(self.terms) + np.asarray(term_ids))
+        scores = np.bincount(pairs // len(self.terms), weights=self.weights[pairs % len(self.terms)], minlength=n)
+        return np.clip(scores, -self.clip, self.clip)
+
+    def classify_batch(self, texts):
+        """Same output format as the FinBERT brain: [{'label', 'score'}, ...]"""
+        scores = self.score_batch(texts)
+        labels = np.where(scores > self.threshold, "positive",
+                          np.where(scores < -self.threshold, "negative", "neutral"))
+        return [{"label": label, "score": score} for label, score in zip(labels.tolist(), np.abs(scores).tolist())]
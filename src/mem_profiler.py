@@ -0,0 +1,138 @@
+import os
+import gc
+import time
+import logging
+import threading
+import tracemalloc
+from collections import Counter
+
+# Instrumentación de memoria para el bucle de larga duración (opt-in).
+# RSS y pico del proceso se miden siempre (leer /proc cuesta microsegundos);
+# con MEMORY_PROFILE=1 además se activa tracemalloc y cada N ciclos se toma un
+# snapshot: las líneas que más han crecido desde el anterior y desde el primero,
+# y el recuento de objetos vivos por tipo, para ver qué crece antes de un OOM.
+
+_IGNORED = (tracemalloc.__file__, "<frozen importlib._bootstrap>", "<frozen importlib._bootstrap_external>", "<unknown>")
+
+logger = logging.getLogger(__name__)
+
+
+def process_memory():
+    """RSS and peak RSS in bytes (Linux /proc; ru_maxrss elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return {"rss": int(fields["VmRSS"].split()[0]) * 1024, "peak_rss": int(fields["VmHWM"].split()[0]) * 1024}
+    except (OSError, KeyError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak *= 1 if os.uname().sysname == "Darwin" else 1024  # macOS en bytes, Linux en KiB
+        return {"rss": None, "peak_rss": peak}
+
+
+def object_counts():
+    """Live gc-tracked objects by type name."""
+    return Counter(type(o).__name__ for o in gc.get_objects())
+
+
+def _top_diffs(new, old, limit):
+    stats = new.compare_to(old, "lineno")
+    return [{"where": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+             "size_diff": s.size_diff, "size": s.size, "count_diff": s.count_diff}
+            for s in stats[:limit] if s.size_diff > 0]
+
+
+class MemoryProfiler:
+    def __init__(self, enabled=None, every_cycles=None, top=10, frames=1):
+        if enabled is None:
+            enabled = os.getenv("MEMORY_PROFILE", "0") == "1"
+        self.enabled = enabled
+        self.every_cycles = max(1, int(every_cycles or os.getenv("MEMORY_PROFILE_EVERY", "10")))
+        self.top = top
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._baseline = None
+        self._previous = None
+        self._baseline_objects = None
+        self._previous_objects = None
+        self._start_memory = process_memory()
+        self._started_at = time.time()
+        self.history = []  # (ciclo, rss, traced) por muestra, para ver la tendencia
+        self.last_report = None
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            logger.info(f"🧪 Memory profiling on: tracemalloc snapshot every {self.every_cycles} cycles")
+
+    def _snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in _IGNORED])
+
+    def maybe_sample(self, cycle):
+        """Samples every `every_cycles` cycles; returns the report or None."""
+        if cycle % self.every_cycles:
+            return None
+        report = self.sample(cycle)
+        self.log(report)
+        return report
+
+    def sample(self, cycle=None):
+        with self._lock:
+            memory = process_memory()
+            report = {
+                "cycle": cycle,
+                "uptime_s": time.time() - self._started_at,
+                "rss": memory["rss"],
+                "peak_rss": memory["peak_rss"],
+                "rss_growth": (memory["rss"] - self._start_memory["rss"]) if memory["rss"] and self._start_memory["rss"] else None,
+                "tracemalloc": self.enabled,
+            }
+            if self.enabled:
+                # El recuento de objetos recorre todo el heap: solo con el modo activo
+                gc.collect()
+                snapshot = self._snapshot()
+                objects = object_counts()
+                traced, traced_peak = tracemalloc.get_traced_memory()
+                report.update({
+                    "traced": traced,
+                    "traced_peak": traced_peak,
+                    "tracemalloc_overhead": tracemalloc.get_tracemalloc_memory(),
+                    "top_since_last": _top_diffs(snapshot, self._previous, self.top) if self._previous else [],
+                    "top_since_start": _top_diffs(snapshot, self._baseline, self.top) if self._baseline else [],
+                    "objects_since_last": _count_diffs(objects, self._previous_objects, self.top),
+                    "objects_since_start": _count_diffs(objects, self._baseline_objects, self.top),
+                })
+                if self._baseline is None:
+                    self._baseline, self._baseline_objects = snapshot, objects
+                self._previous, self._previous_objects = snapshot, objects
+            self.history.append((cycle, memory["rss"], report.get("traced")))
+            del self.history[:-100]
+            self.last_report = report
+            return report
+
+    def log(self, report):
+        mb = 1024 * 1024
+        rss = f"{report['rss'] / mb:.1f} MB" if report["rss"] else "n/a"
+        growth = f" ({report['rss_growth'] / mb:+.1f} MB since start)" if report["rss_growth"] is not None else ""
+        logger.info(f"🧠 Memory @ cycle {report['cycle']}: RSS {rss}{growth}, peak {report['peak_rss'] / mb:.1f} MB")
+        if not report["tracemalloc"]:
+            return
+        logger.info(f"🧠 Traced {report['traced'] / mb:.1f} MB (peak {report['traced_peak'] / mb:.1f} MB)")
+        for item in report["top_since_last"][:5]:
+            logger.info(f"   +{item['size_diff'] / 1024:.1f} KiB ({item['count_diff']:+d} blocks) {item['where']}")
+        grown = ", ".join(f"{name} {diff:+d}" for name, diff in report["objects_since_last"][:5])
+        if grown:
+            logger.info(f"   Objects: {grown}")
+
+    def status(self):
+        """Last report plus RSS history, for the debug endpoint."""
+        return {"enabled": self.enabled, "every_cycles": self.every_cycles,
+                "current": process_memory(), "last_report": self.last_report,
+                "history": [{"cycle": c, "rss": r, "traced": t} for c, r, t in self.history]}
+
+
+def _count_diffs(new, old, limit):
+    if old is None:
+        return []
+    diff = Counter(new)
+    diff.subtract(old)
+    return [(name, n) for name, n in diff.most_common(limit) if n > 0]
@@ -0,0 +1,178 @@
+import os
+import json
+import zlib
+import pickle
+import hashlib
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Caché en disco direccionada por contenido para sesiones de investigación.
+# La clave de cada entrada es un hash de todo lo que determina el resultado
+# (huella de los datos, parámetros y versión del código), así que nunca hay
+# que invalidar a mano: si algo cambia, la clave es otra. Tamaño acotado con
+# expulsión LRU (la fecha de acceso de cada archivo es su posición en la cola).
+
+DEFAULT_CACHE_DIR = os.getenv("BACKTEST_CACHE_DIR", "state/cache")
+DEFAULT_CACHE_BYTES = int(os.getenv("BACKTEST_CACHE_MB", "512")) * 1024 * 1024
+SUFFIX = ".pkl.z"
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_frame(df):
+    """Hash of a DataFrame's index, column names and values (not of its identity)."""
+    h = hashlib.sha1()
+    h.update(np.ascontiguousarray(df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else df.index.to_numpy()).tobytes())
+    for col in df.columns:
+        h.update(str(col).encode("utf-8"))
+        h.update(np.ascontiguousarray(df[col].to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def fingerprint_object(obj):
+    """
+    Hash of an object's class (name and source file) and instance attributes,
+    e.g. a predictor's parameters. Arrays and frames are hashed by content.
+    """
+    import inspect
+
+    cls = type(obj)
+    h = hashlib.sha1(f"{cls.__module__}.{cls.__qualname__}".encode("utf-8"))
+    try:
+        with open(inspect.getsourcefile(cls), "rb") as f:
+            h.update(f.read())
+    except (TypeError, OSError):
+        pass  # clase sin archivo fuente (builtin, REPL)
+    for name, value in sorted(getattr(obj, "__dict__", {}).items()):
+        h.update(name.encode("utf-8"))
+        if isinstance(value, np.ndarray):
+            h.update(f"{value.dtype}{value.shape}".encode("utf-8"))
+            h.update(np.ascontiguousarray(value).tobytes())
+        elif isinstance(value, pd.DataFrame):
+            h.update(fingerprint_frame(value).encode("utf-8"))
+        else:
+            h.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+def code_version(*paths):
+    """Hash of the source files a result depends on: editing them invalidates old results."""
+    h = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()[:12]
+
+
+def make_key(*parts):
+    """Stable key from JSON-serializable parts (dict order does not matter)."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        os.makedirs(root, exist_ok=True)
+        self._sizes = {}
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                if name.endswith(SUFFIX):
+                    path = os.path.join(dirpath, name)
+                    self._sizes[path] = os.path.getsize(path)
+
+    def _path(self, namespace, key):
+        return os.path.join(self.root, namespace, key[:2], f"{key}{SUFFIX}")
+
+    def get(self, namespace, key, default=None):
+        path = self._path(namespace, key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except Exception as e:
+            # Entrada corrupta (o de otra versión de pandas): se trata como fallo
+            logger.warning(f"⚠️ Dropping unreadable cache entry {path}: {e}")
+            self._remove(path)
+            self.misses += 1
+            return default
+        os.utime(path)  # más reciente en la cola LRU
+        self.hits += 1
+        return value
+
+    def put(self, namespace, key, value):
+        blob = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), level=3)
+        if len(blob) > self.max_bytes:
+            return
+        path = self._path(namespace, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, path)  # atómico: otro proceso nunca lee una entrada a medias
+        self._sizes[path] = len(blob)
+        self.writes += 1
+        self._evict()
+
+    def memoize(self, namespace, key, compute):
+        """Cached value for key, or compute() stored under it."""
+        sentinel = object()
+        value = self.get(namespace, key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(namespace, key, value)
+        return value
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        self._sizes.pop(path, None)
+
+    def _evict(self):
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = sorted(self._sizes, key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes[path]
+            self._remove(path)
+            self.evictions += 1
+
+    def clear(self):
+        for path in list(self._sizes):
+            self._remove(path)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses, "writes": self.writes, "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._sizes), "bytes": sum(self._sizes.values()), "max_bytes": self.max_bytes,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect or clear the backtest cache")
+    parser.add_argument("--root", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--clear", action="store_true")
+    args = parser.parse_args()
+
+    cache = DiskCache(args.root)
+    if args.clear:
+        cache.clear()
+    s = cache.stats()
+    print(f"🗄️ {args.root}: {s['entries']} entries, {s['bytes'] / 1e6:.1f} MB of {s['max_bytes'] / 1e6:.0f} MB")
@@ -1,8 +1,58 @@
 import requests
 import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+    CLOSED: requests flow. OPEN: endpoint skipped until reset_timeout elapses.
+    HALF_OPEN: a single probe request is let through; success closes the
+    circuit, failure opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, failure_threshold=3, reset_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.time()
+            self._probe_in_flight = False
 
 class RemoteSentimentAnalyzer:
-    def __init__(self, api_url=None):
+    def __init__(self, api_url=None, timeout=10, min_hedge_delay=0.5, default_hedge_delay=2.0):
         # Define failover URLs
         self.default_urls = [
             "https://fr33b0t-crypto-sentiment-api.hf.space/analyze",
@@ -17,59 +67,138 @@ class RemoteSentimentAnalyzer:
             self.urls = [env_url]
         else:
             self.urls = self.default_urls
+
+        self.timeout = timeout
+        self.min_hedge_delay = min_hedge_delay
+        self.default_hedge_delay = default_hedge_delay
+
+        # Keep-alive session, breaker and latency window per endpoint
+        self.sessions = {}
+        for url in self.urls:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self.sessions[url] = session
+        self.breakers = {url: CircuitBreaker() for url in self.urls}
+        self.latencies = {url: deque(maxlen=50) for url in self.urls}
+        self._latency_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(2, len(self.urls)), thread_name_prefix="sentiment")
             
         print(f"Initialized RemoteSentimentAnalyzer. URLs: {self.urls}")
 
-    def analyze(self, text_list):
-        if not text_list:
-            return "NEUTRAL", 0.0
+    def hedge_delay(self, url):
+        """p95 latency of the endpoint: how long to wait before firing the backup."""
+        # Copia bajo lock: los hilos de hedge añaden muestras mientras tanto
+        with self._latency_lock:
+            samples = list(self.latencies[url])
+        if len(samples) < 5:
+            return self.default_hedge_delay
+        p95 = float(np.percentile(samples, 95))
+        return min(max(p95, self.min_hedge_delay), self.timeout)
 
-        for url in self.urls:
-            try:
-                # print(f"Querying: {url}...") 
-                response = requests.post(url, json={"texts": text_list}, timeout=10)
+    @staticmethod
+    def _parse_results(results, text_list):
+        """Returns (sentiment, confidence) or None if the payload is not usable."""
+        # Handle dict response (legacy)
+        if isinstance(results, dict) and "sentiment" in results:
+            return results.get("sentiment", "NEUTRAL"), results.get("confidence", 0.0)
+        
+        # Handle list response (raw classifications)
+        if isinstance(results, list):
+            sentiment_score = 0
+            valid_results = False
+            
+            for res in results:
+                label = res.get('label', '').lower()
+                score = res.get('score', 0)
                 
-                if response.status_code == 200:
-                    results = response.json()
-                    
-                    # Handle dict response (legacy)
-                    if isinstance(results, dict) and "sentiment" in results:
-                        return results.get("sentiment", "NEUTRAL"), results.get("confidence", 0.0)
-                    
-                    # Handle list response (raw classifications)
-                    if isinstance(results, list):
-                        sentiment_score = 0
-                        valid_results = False
-                        
-                        for res in results:
-                            label = res.get('label', '').lower()
-                            score = res.get('score', 0)
-                            
-                            if label == 'positive':
-                                sentiment_score += score
-                            elif label == 'negative':
-                                sentiment_score -= score
-                            valid_results = True
-                        
-                        if not valid_results:
-                            continue # Try next URL if response format was weird? Or just return Neutral.
-                            
-                        avg_score = sentiment_score / len(text_list) if text_list else 0
-                        
-                        if avg_score > 0.1:
-                            return "BULLISH", avg_score
-                        elif avg_score < -0.1:
-                            return "BEARISH", avg_score
-                        else:
-                            return "NEUTRAL", avg_score
+                if label == 'positive':
+                    sentiment_score += score
+                elif label == 'negative':
+                    sentiment_score -= score
+                valid_results = True
+            
+            if not valid_results:
+                return None
                 
-                else:
-                    print(f"API Error {response.status_code} from {url}")
+            avg_score = sentiment_score / len(text_list) if text_list else 0
             
-            except Exception as e:
-                print(f"Connection failed to {url}: {e}")
-                continue # Try next URL
+            if avg_score > 0.1:
+                return "BULLISH", avg_score
+            elif avg_score < -0.1:
+                return "BEARISH", avg_score
+            else:
+                return "NEUTRAL", avg_score
+
+        return None
+
+    def _query(self, url, text_list):
+        """Runs in a worker thread. Updates breaker/latency stats for the endpoint."""
+        breaker = self.breakers[url]
+        start = time.monotonic()
+        try:
+            response = self.sessions[url].post(url, json={"texts": text_list}, timeout=self.timeout)
+            if response.status_code != 200:
+                print(f"API Error {response.status_code} from {url}")
+                breaker.record_failure()
+                return None
+            parsed = self._parse_results(response.json(), text_list)
+            if parsed is None:
+                breaker.record_failure()
+                return None
+            with self._latency_lock:
+                self.latencies[url].append(time.monotonic() - start)
+            breaker.record_success()
+            return parsed
+        except Exception as e:
+            print(f"Connection failed to {url}: {e}")
+            breaker.record_failure()
+            return None
+
+    def analyze(self, text_list):
+        if not text_list:
+            return "NEUTRAL", 0.0
+
+        # Hedged requests: fire the primary, then the next backup whenever the
+        # in-flight ones fail or exceed the p95 latency of the last one launched.
+        # Breakers are asked only when an endpoint is actually launched: asking
+        # earlier would take a half-open probe that might never be sent.
+        pending = {}
+        deadline = time.monotonic() + self.timeout + 1
+        next_idx = 0
+        launched = 0
+        launch_backup = False
+        while True:
+            if next_idx < len(self.urls) and (not pending or launch_backup):
+                # Endpoints with an open circuit are skipped (half-open ones get a probe)
+                while next_idx < len(self.urls):
+                    url = self.urls[next_idx]
+                    next_idx += 1
+                    if self.breakers[url].allow_request():
+                        pending[self._executor.submit(self._query, url, text_list)] = url
+                        wait_for = self.hedge_delay(url)
+                        launched += 1
+                        break
+                launch_backup = False
 
+            remaining = deadline - time.monotonic()
+            if not pending or remaining <= 0:
+                break
+
+            timeout = min(wait_for, remaining) if next_idx < len(self.urls) else remaining
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            launch_backup = not done
+            for future in done:
+                pending.pop(future)
+                result = future.result()
+                if result is not None:
+                    return result
+                launch_backup = True  # failed answer: fire the backup right away
+
+        if not launched:
+            print("All Sentiment APIs have open circuits. Skipping remote analysis.")
+            return "NEUTRAL", 0.0
         print("All Sentiment APIs failed or returned errors.")
         return "NEUTRAL", 0.0
 
@@ -81,7 +210,7 @@ class RemoteSentimentAnalyzer:
                 # Determine base URL for ping (strip /analyze)
                 base_url = url.replace("/analyze", "")
                 print(f"Pinging {base_url}...")
-                requests.get(base_url, timeout=5)
+                self.sessions[url].get(base_url, timeout=5)
                 success = True
             except Exception:
                 pass
@@ -101,13 +230,21 @@ class SentimentAnalyzer:
             print(f"Error loading model: {e}")
             self.pipe = None
 
-    def analyze(self, text_list):
+    def classify(self, text_list, batch_size=None):
+        """Raw per-text classifications: [{'label': 'positive', 'score': 0.9}, ...]"""
+        if not self.pipe:
+            return [{"label": "neutral", "score": 0.0} for _ in text_list]
+
         import torch
+        kwargs = {"batch_size": batch_size} if batch_size else {}
+        with torch.no_grad():
+            return self.pipe(list(text_list), **kwargs)
+
+    def analyze(self, text_list):
         if not self.pipe:
             return "NEUTRAL", 0.0
         
-        with torch.no_grad():
-            results = self.pipe(text_list)
+        results = self.classify(text_list)
         # Simple aggregation logic
         sentiment_score = 0
         for res in results:
@@ -125,26 +262,49 @@ class SentimentAnalyzer:
         else:
             return "NEUTRAL", avg_score
 
-class PricePredictor:
+# Señales técnicas codificadas como int8 para procesar historias completas
+SIGNAL_DOWN, SIGNAL_HOLD, SIGNAL_UP = -1, 0, 1
+SIGNAL_LABELS = {SIGNAL_DOWN: "DOWN", SIGNAL_HOLD: "HOLD", SIGNAL_UP: "UP"}
+
+def signals_to_labels(signals):
+    """Converts an int8 signal array into a Categorical of "DOWN"/"HOLD"/"UP"."""
+    return pd.Categorical.from_codes(np.asarray(signals, dtype=np.int8) + 1, ["DOWN", "HOLD", "UP"])
+
+class BasePredictor:
+    """
+    Interface for price models.
+    Models implement predict_series(df), returning one int8 signal per row
+    (SIGNAL_UP / SIGNAL_DOWN / SIGNAL_HOLD) computed in a single batch pass.
+    The single-step API used by the live loop is derived from it.
+    """
+    def predict_series(self, df):
+        raise NotImplementedError
+
+    def predict_next_move(self, df):
+        """Signal for the last row of df ("UP", "DOWN" or "HOLD")."""
+        if df.empty:
+            return "HOLD"
+        signals = self.predict_series(df)
+        return SIGNAL_LABELS[int(signals[-1])]
+
+class PricePredictor(BasePredictor):
     def __init__(self):
         # In a real scenario, load a saved PyTorch/TensorFlow model here
         pass
 
-    def predict_next_move(self, df):
+    def predict_series(self, df):
         """
-        Dummy prediction logic for demonstration.
+        Dummy prediction logic for demonstration, vectorized over every row.
         In reality, this would prepare features from 'df' and feed into an LSTM.
         """
-        if df.empty:
-            return "HOLD"
-        
+        signals = np.zeros(len(df), dtype=np.int8)
+
         # Simple heuristic for demonstration:
         # If SMA_50 > SMA_200 (Golden Cross) -> UP
-        last_row = df.iloc[-1]
         if 'sma_50' in df.columns and 'sma_200' in df.columns:
-            if last_row['sma_50'] > last_row['sma_200']:
-                return "UP"
-            elif last_row['sma_50'] < last_row['sma_200']:
-                return "DOWN"
-        
-        return "HOLD"
+            sma_50 = df['sma_50'].to_numpy(dtype=np.float64)
+            sma_200 = df['sma_200'].to_numpy(dtype=np.float64)
+            signals[sma_50 > sma_200] = SIGNAL_UP
+            signals[sma_50 < sma_200] = SIGNAL_DOWN
+
+        return signals
@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import threading
+import subprocess
+import socketserver
+
+from src.model import RemoteSentimentAnalyzer
+
+# Servicio de modelo compartido para el contenedor del Space.
+# Un único proceso carga FinBERT y atiende a todos los consumidores locales
+# (bucle del bot, endpoint /analyze, sentiment_brain...) por un socket Unix.
+# Las peticiones concurrentes se agrupan en lotes antes de pasar por el modelo.
+
+DEFAULT_SOCKET_PATH = os.getenv("MODEL_HOST_SOCKET", "/tmp/antigravity_model.sock")
+_HEADER = struct.Struct("!I")
+
+logger = logging.getLogger(__name__)
+
+
+def _send_frame(sock, payload):
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError("Socket cerrado por el otro extremo")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def _recv_frame(sock):
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, length))
+
+
+class _Batcher:
+    """
+    Collects texts from concurrent requests and runs them through the model
+    in batches of up to max_batch texts, waiting at most max_wait seconds
+    for a batch to fill.
+    """
+    def __init__(self, classify_fn, max_batch=32, max_wait=0.01):
+        self.classify_fn = classify_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+        threading.Thread(target=self._run, daemon=True, name="model-batcher").start()
+
+    def submit(self, texts):
+        texts = list(texts)
+        if not texts:
+            return []
+        # Una petición grande se parte en trozos de max_batch: ningún lote lo supera
+        slots = [{"texts": texts[i:i + self.max_batch], "done": threading.Event(), "results": None, "error": None}
+                 for i in range(0, len(texts), self.max_batch)]
+        for slot in slots:
+            self._queue.put(slot)
+        results = []
+        for slot in slots:
+            slot["done"].wait()
+            if slot["error"]:
+                raise RuntimeError(slot["error"])
+            results.extend(slot["results"])
+        return results
+
+    def _run(self):
+        carry = None
+        while True:
+            batch = [carry or self._queue.get()]
+            carry = None
+            n_texts = len(batch[0]["texts"])
+            deadline = time.monotonic() + self.max_wait
+            while n_texts < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    slot = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if n_texts + len(slot["texts"]) > self.max_batch:
+                    carry = slot  # no cabe: abre el siguiente lote
+                    break
+                batch.append(slot)
+                n_texts += len(slot["texts"])
+
+            texts = [t for slot in batch for t in slot["texts"]]
+            try:
+                results = self.classify_fn(texts, batch_size=self.max_batch)
+                offset = 0
+                for slot in batch:
+                    slot["results"] = results[offset:offset + len(slot["texts"])]
+                    offset += len(slot["texts"])
+            except Exception as e:
+                for slot in batch:
+                    slot["error"] = str(e)
+
+            self.stats["requests"] += len(batch)
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+            for slot in batch:
+                slot["done"].set()
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                request = _recv_frame(self.request)
+            except (ConnectionError, OSError):
+                return
+            op = request.get("op")
+            try:
+                if op == "classify":
+                    response = {"results": self.server.batcher.submit(request.get("texts", []))}
+                elif op == "ping":
+                    response = {"status": "ok", "pid": os.getpid(), "stats": self.server.batcher.stats}
+                else:
+                    response = {"error": f"Operación desconocida: {op}"}
+            except Exception as e:
+                response = {"error": str(e)}
+            _send_frame(self.request, response)
+
+
+class ModelHostServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path, classify_fn, max_batch=32, max_wait=0.01):
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)  # socket huérfano de un proceso anterior
+        self.batcher = _Batcher(classify_fn, max_batch=max_batch, max_wait=max_wait)
+        super().__init__(socket_path, _RequestHandler)
+
+
+class ModelHostClient:
+    """Persistent connection to the model host. Thread-safe."""
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH, timeout=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self._sock = sock
+
+    def _call(self, payload):
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    _send_frame(self._sock, payload)
+                    response = _recv_frame(self._sock)
+                    break
+                except (ConnectionError, OSError):
+                    self.close()
+                    if attempt:
+                        raise
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response
+
+    def ping(self):
+        try:
+            return self._call({"op": "ping"})
+        except Exception:
+            return None
+
+    def classify(self, text_list):
+        return self._call({"op": "classify", "texts": list(text_list)})["results"]
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+class SharedSentimentAnalyzer:
+    """Same interface as SentimentAnalyzer, backed by the shared model host."""
+    def __init__(self, socket_path=DEFAULT_SOCKET_PATH):
+        self.client = ModelHostClient(socket_path)
+
+    def classify(self, text_list):
+        return self.client.classify(text_list)
+
+    def analyze(self, text_list):
+        if not text_list:
+            return "NEUTRAL", 0.0
+        try:
+            parsed = RemoteSentimentAnalyzer._parse_results(self.classify(text_list), text_list)
+        except Exception as e:
+            logger.error(f"❌ Model host error: {e}")
+            return "NEUTRAL", 0.0
+        return parsed if parsed else ("NEUTRAL", 0.0)
+
+
+def ensure_model_host(socket_path=DEFAULT_SOCKET_PATH, startup_timeout=600):
+    """
+    Returns a SharedSentimentAnalyzer connected to the model host, spawning
+    the host process if none is running. Returns None if it never came up.
+    """
+    client = ModelHostClient(socket_path)
+    if client.ping():
+        logger.info(f"🧠 Using shared model host at {socket_path}")
+        return SharedSentimentAnalyzer(socket_path)
+
+    logger.info("🧠 Starting shared model host process...")
+    proc = subprocess.Popen([sys.executable, "-m", "src.model_host", "--socket", socket_path])
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if client.ping():
+            return SharedSentimentAnalyzer(socket_path)
+        # Si nuestro proceso salió, solo seguimos esperando si otro host tiene el lock
+        if proc.poll() is not None and not _host_lock_held(socket_path):
+            logger.error("❌ Model host exited before serving.")
+            return None
+        time.sleep(1)
+    logger.error("❌ Model host did not come up in time.")
+    return None
+
+
+def _host_lock_held(socket_path):
+    import fcntl
+    with open(socket_path + ".lock", "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return True
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return False
+
+
+def serve(socket_path=DEFAULT_SOCKET_PATH, model_name="ProsusAI/finbert", max_batch=32, max_wait=0.01):
+    import fcntl
+
+    # Una sola instancia por socket: el lock evita cargar el modelo dos veces
+    lock_file = open(socket_path + ".lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(f"Model host already running for {socket_path}. Exiting.")
+        return
+
+    from src.model import SentimentAnalyzer
+    analyzer = SentimentAnalyzer(model_name)
+    server = ModelHostServer(socket_path, analyzer.classify, max_batch=max_batch, max_wait=max_wait)
+    print(f"✅ Model host serving {model_name} on {socket_path} (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Shared FinBERT model host")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH)
+    parser.add_argument("--model", default="ProsusAI/finbert")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+    serve(args.socket, args.model, args.max_batch, args.max_wait_ms / 1000)
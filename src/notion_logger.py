@@ -11,6 +11,9 @@ class NotionLogger:
             "Content-Type": "application/json",
             "Notion-Version": "2022-06-28"
         }
+        # Una sesión por logger: reutiliza la conexión en lugar de abrir una por registro
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
 
     def log_trade(self, action, price, sentiment, confidence, profit):
         if not self.token or not self.database_id:
@@ -30,7 +33,7 @@ class NotionLogger:
                 "Profit Acumulado": {"number": float(profit)}
             }
         }
-        response = requests.post(url, headers=self.headers, json=data)
+        response = self.session.post(url, json=data)
         
         if response.status_code == 200:
             print("✅ ¡Registro publicado en Notion exitosamente!")
@@ -0,0 +1,273 @@
+import os
+import json
+import math
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.backtester import Backtester
+from src.intrabar import simulate_intrabar
+
+# Búsqueda adaptativa de parámetros sobre el backtester.
+# Cada generación propone candidatos (TPE o aleatorio) y los filtra con
+# successive halving: todos se evalúan sobre un tramo corto de la historia,
+# solo el mejor 1/eta pasa al siguiente tramo (más largo) y así hasta la
+# historia completa. El estado se guarda en JSON tras cada tramo, así que una
+# búsqueda interrumpida continúa donde quedó.
+
+DEFAULT_SPACE = {
+    # nombre: (min, max, escala) o lista de opciones
+    "stop_loss_pct": (0.005, 0.08, "log"),
+    "take_profit_pct": (0.01, 0.20, "log"),
+    "allow_short": [False, True],
+}
+SENTIMENT_SPACE = {"min_confidence": (0.0, 0.9, "linear")}
+
+logger = logging.getLogger(__name__)
+
+
+# --- Evaluación (en procesos worker; los arrays se envían una vez por worker) ---
+_DATA = None
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _evaluate(params, n_bars):
+    """Log-growth of the trade sequence on the first n_bars candles."""
+    d = _DATA
+    signals = Backtester.gate_signals(d["signals"][:n_bars],
+                                      None if d["labels"] is None else d["labels"][:n_bars],
+                                      None if d["conf"] is None else d["conf"][:n_bars],
+                                      params.get("min_confidence", 0.60))
+    trades = simulate_intrabar(d["open"][:n_bars], d["high"][:n_bars], d["low"][:n_bars], d["close"][:n_bars],
+                               signals, params["stop_loss_pct"], params["take_profit_pct"],
+                               d["tie_break"], params.get("allow_short", False), d["slippage"])
+    returns = trades["return_pct"] / 100
+    if returns.size == 0:
+        return 0.0, 0
+    return float(np.sum(np.log1p(np.maximum(returns, -0.999)))), int(returns.size)
+
+
+# --- Propuestas ---
+
+def _to_unit(value, spec):
+    low, high, scale = spec
+    if scale == "log":
+        return (math.log(value) - math.log(low)) / (math.log(high) - math.log(low))
+    return (value - low) / (high - low)
+
+
+def _from_unit(u, spec):
+    low, high, scale = spec
+    u = min(1.0, max(0.0, u))
+    if scale == "log":
+        return float(math.exp(math.log(low) + u * (math.log(high) - math.log(low))))
+    return float(low + u * (high - low))
+
+
+def sample_random(space, rng):
+    return {name: (spec[int(rng.integers(len(spec)))] if isinstance(spec, list) else _from_unit(rng.random(), spec))
+            for name, spec in space.items()}
+
+
+def sample_tpe(space, history, rng, gamma=0.25, n_candidates=64, bandwidth=0.15):
+    """
+    Tree-structured Parzen Estimator: parameters are modelled independently,
+    with one density over the best `gamma` fraction of the history (l) and one
+    over the rest (g); the candidate maximizing l/g is proposed.
+    """
+    scores = np.array([score for _, score in history])
+    n_good = max(1, int(math.ceil(gamma * len(history))))
+    order = np.argsort(-scores)
+    good = [history[i][0] for i in order[:n_good]]
+    bad = [history[i][0] for i in order[n_good:]] or good
+
+    proposal = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            # Frecuencias suavizadas de cada opción
+            l = np.array([1 + sum(p[name] == c for p in good) for c in spec], dtype=float)
+            g = np.array([1 + sum(p[name] == c for p in bad) for c in spec], dtype=float)
+            l, g = l / l.sum(), g / g.sum()
+            draws = rng.choice(len(spec), size=n_candidates, p=l)
+            proposal[name] = spec[int(draws[np.argmax(l[draws] / g[draws])])]
+            continue
+
+        good_u = np.array([_to_unit(p[name], spec) for p in good])
+        bad_u = np.array([_to_unit(p[name], spec) for p in bad])
+        draws = np.clip(rng.choice(good_u, size=n_candidates) + rng.normal(0, bandwidth, n_candidates), 0, 1)
+
+        def density(x, centers):
+            return np.exp(-0.5 * ((x[:, None] - centers[None, :]) / bandwidth) ** 2).mean(axis=1) + 1e-12
+
+        best = draws[np.argmax(density(draws, good_u) / density(draws, bad_u))]
+        proposal[name] = _from_unit(float(best), spec)
+    return proposal
+
+
+# --- Búsqueda ---
+
+class SuccessiveHalvingSearch:
+    def __init__(self, data, space=None, population=27, eta=3, min_fraction=1 / 9, n_startup=20,
+                 sampler="tpe", workers=None, checkpoint=None, seed=0):
+        self.data = data
+        self.space = space or DEFAULT_SPACE
+        self.population = population
+        self.eta = eta
+        self.sampler = sampler
+        self.workers = workers
+        self.checkpoint = checkpoint
+        self.n_startup = n_startup
+
+        n = len(data["close"])
+        # Tramos crecientes de la historia: min_fraction, min_fraction * eta, ..., 1
+        n_rungs = max(1, int(round(math.log(1 / min_fraction, eta))) + 1)
+        self.rung_bars = [max(2, int(n * min(1.0, min_fraction * eta ** r))) for r in range(n_rungs)]
+
+        self.trials = []
+        self.generation = 0
+        self.rng = np.random.default_rng(seed)
+        if checkpoint and os.path.exists(checkpoint):
+            self._load()
+
+    # Checkpoint ---------------------------------------------------------------
+    def _save(self):
+        if not self.checkpoint:
+            return
+        state = {"generation": self.generation, "rung_bars": self.rung_bars, "space": _jsonable_space(self.space),
+                 "tie_break": self.data["tie_break"], "rng": self.rng.bit_generator.state, "trials": self.trials}
+        os.makedirs(os.path.dirname(self.checkpoint) or ".", exist_ok=True)
+        tmp = f"{self.checkpoint}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint)
+
+    def _load(self):
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+        if (state["rung_bars"] != self.rung_bars or state["space"] != _jsonable_space(self.space)
+                or state.get("tie_break") != self.data["tie_break"]):
+            raise ValueError("El checkpoint es de otra búsqueda (datos, espacio o tie_break distintos).")
+        self.generation = state["generation"]
+        self.trials = state["trials"]
+        self.rng.bit_generator.state = state["rng"]
+        logger.info(f"♻️ Resuming search: {len(self.trials)} trials, generation {self.generation}")
+
+    # Búsqueda -----------------------------------------------------------------
+    def _history(self):
+        """(params, score) pairs on the first rung: every trial has one, so they are comparable."""
+        return [(t["params"], t["scores"]["0"]) for t in self.trials if "0" in t["scores"]]
+
+    def _propose(self):
+        history = self._history()
+        if self.sampler == "tpe" and len(history) >= self.n_startup:
+            return sample_tpe(self.space, history, self.rng)
+        return sample_random(self.space, self.rng)
+
+    def _run_generation(self, pool):
+        gen = [t for t in self.trials if t["generation"] == self.generation]
+        if not gen:
+            gen = [{"id": len(self.trials) + i, "generation": self.generation, "params": self._propose(), "scores": {}, "trades": {}}
+                   for i in range(self.population)]
+            self.trials.extend(gen)
+            self._save()
+
+        alive = gen
+        for rung, n_bars in enumerate(self.rung_bars):
+            key = str(rung)
+            todo = [t for t in alive if key not in t["scores"]]
+            futures = [(t, pool.submit(_evaluate, t["params"], n_bars)) for t in todo]
+            for t, future in futures:
+                t["scores"][key], t["trades"][key] = future.result()
+            if todo:
+                self._save()
+            if rung + 1 < len(self.rung_bars):
+                keep = max(1, len(alive) // self.eta)
+                alive = sorted(alive, key=lambda t: t["scores"][key], reverse=True)[:keep]
+
+        self.generation += 1
+        self._save()
+
+    def run(self, generations=10):
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.data,)) as pool:
+            while self.generation < generations:
+                self._run_generation(pool)
+                best = self.best()
+                if best:
+                    logger.info(f"🧬 Generation {self.generation}/{generations} | best log-growth "
+                                f"{best['score']:.4f} | {best['params']}")
+        return self.best()
+
+    def best(self):
+        """Best trial evaluated on the full history."""
+        last = str(len(self.rung_bars) - 1)
+        finished = [t for t in self.trials if last in t["scores"]]
+        if not finished:
+            return None
+        t = max(finished, key=lambda t: t["scores"][last])
+        return {"params": t["params"], "score": t["scores"][last], "trades": t["trades"][last],
+                "roi_pct": (math.exp(t["scores"][last]) - 1) * 100}
+
+    def stats(self):
+        evaluated = sum(len(t["scores"]) for t in self.trials)
+        bar_cost = sum(self.rung_bars[int(r)] for t in self.trials for r in t["scores"])
+        full = len(self.trials) * self.rung_bars[-1]
+        return {"configurations": len(self.trials), "evaluations": evaluated,
+                "cost_vs_full_grid": bar_cost / full if full else 0.0}
+
+
+def _jsonable_space(space):
+    return {k: list(v) for k, v in space.items()}
+
+
+def build_search_data(backtester, sentiment=None, slippage=0.001, tie_break="stop"):
+    """
+    Runs the expensive part once (download, indicators, signals) and returns plain arrays.
+    tie_break is fixed for the whole search, not searched: optimising over the
+    ambiguous-bar assumption just rewards the optimistic one.
+    """
+    df, signals, labels, conf = backtester.prepare_signals(sentiment=sentiment)
+    return {
+        "open": df["open"].to_numpy(dtype=np.float64), "high": df["high"].to_numpy(dtype=np.float64),
+        "low": df["low"].to_numpy(dtype=np.float64), "close": df["close"].to_numpy(dtype=np.float64),
+        "signals": signals, "labels": labels, "conf": conf, "slippage": slippage,
+        "tie_break": tie_break,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.sentiment_store import SentimentStore
+    from src.memo import DiskCache
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Adaptive SL/TP search (TPE + successive halving) on the backtester")
+    parser.add_argument("--symbol", default="BTC-USD")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--period", default="730d")
+    parser.add_argument("--generations", type=int, default=10)
+    parser.add_argument("--population", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--sampler", choices=["tpe", "random"], default="tpe")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--checkpoint", default="state/optimizer.json")
+    parser.add_argument("--tie-break", choices=["stop", "target", "open"], default="stop",
+                        help="SL/TP both inside one bar: which fills first (fixed for the whole search)")
+    parser.add_argument("--sentiment-version", default=os.getenv("BACKTEST_SENTIMENT_VERSION"))
+    args = parser.parse_args()
+
+    sentiment = SentimentStore(args.sentiment_version).load() if args.sentiment_version else None
+    space = dict(DEFAULT_SPACE, **(SENTIMENT_SPACE if sentiment is not None else {}))
+    data = build_search_data(Backtester(args.symbol, args.timeframe, args.period, cache=DiskCache()), sentiment,
+                             tie_break=args.tie_break)
+
+    search = SuccessiveHalvingSearch(data, space, population=args.population, eta=args.eta,
+                                     sampler=args.sampler, workers=args.workers, checkpoint=args.checkpoint)
+    best = search.run(args.generations)
+    print(f"\n🏆 Best: {best['params']}")
+    print(f"   ROI {best['roi_pct']:.2f}% over {best['trades']} trades (full history)")
+    print(f"   {search.stats()}")
@@ -0,0 +1,246 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.indicators import compute, spec_from_settings
+from src.model import PricePredictor
+
+# Backtest de cartera multi-activo.
+# Todas las velas se alinean en un array (tiempo × símbolo × campo); indicadores y
+# señales se calculan para todos los símbolos a la vez y la simulación recorre el
+# tiempo una sola vez operando sobre vectores de símbolos (SL/TP, salidas, entradas,
+# reparto de capital). 50 monedas cuestan casi lo mismo que una.
+
+FIELDS = ("open", "high", "low", "close", "volume")
+_F = {name: i for i, name in enumerate(FIELDS)}
+INDICATOR_SETTINGS = {"rsi_period": 14, "macd_fast": 12, "macd_slow": 26, "macd_signal": 9}
+
+logger = logging.getLogger(__name__)
+
+
+def align_panel(frames):
+    """
+    {symbol: OHLCV DataFrame} -> (index, symbols, panel) with panel a float64
+    (time, symbol, field) array on the union of timestamps (NaN where a symbol has no bar).
+    """
+    symbols = list(frames)
+    index = pd.DatetimeIndex(sorted(set().union(*(f.index for f in frames.values())))) if frames else pd.DatetimeIndex([])
+    panel = np.full((len(index), len(symbols), len(FIELDS)), np.nan)
+    for j, sym in enumerate(symbols):
+        df = frames[sym]
+        df = df[~df.index.duplicated(keep="last")]
+        pos = index.get_indexer(df.index)
+        panel[pos, j, :] = df.reindex(columns=list(FIELDS)).to_numpy(dtype=np.float64)
+    return index, symbols, panel
+
+
+def download_panel(symbols, timeframe="1h", period="60d"):
+    """All symbols in a single yfinance request, aligned into a panel."""
+    import yfinance as yf
+
+    print(f"📥 Descargando {len(symbols)} símbolos ({period}, {timeframe})...")
+    raw = yf.download(tickers=list(symbols), period=period, interval=timeframe,
+                      group_by="ticker", progress=False, threads=True)
+    if raw.empty:
+        raise ValueError("No se pudieron descargar datos.")
+
+    frames = {}
+    for sym in symbols:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if sym not in raw.columns.get_level_values(0):
+                logger.warning(f"⚠️ Sin datos para {sym}")
+                continue
+            df = raw[sym].copy()
+        else:
+            df = raw.copy()  # un solo ticker
+        df.columns = [str(c).lower() for c in df.columns]
+        if "adj close" in df.columns:
+            df["close"] = df["adj close"]
+        frames[sym] = df.dropna(subset=["close"])
+    print(f"✅ Panel: {len(frames)} símbolos.")
+    return align_panel(frames)
+
+
+def panel_signals(panel, settings=None, predictor=None):
+    """Indicators for every symbol at once, then the same int8 signals Backtester uses."""
+    predictor = predictor or PricePredictor()
+    close = panel[:, :, _F["close"]]
+    # Rellenar huecos internos para que las medias no se corten; antes del listado sigue NaN
+    close = pd.DataFrame(close).ffill().to_numpy()
+    indicators = compute(close, spec=spec_from_settings(settings or INDICATOR_SETTINGS))
+    signals = np.empty(close.shape, dtype=np.int8)
+    for j in range(close.shape[1]):
+        signals[:, j] = predictor.predict_series(pd.DataFrame({k: v[:, j] for k, v in indicators.items()}))
+    return indicators, signals
+
+
+class PortfolioBacktester:
+    def __init__(self, symbols, timeframe="1h", period="60d", predictor=None):
+        self.symbols = list(symbols)
+        self.timeframe = timeframe
+        self.period = period
+        self.predictor = predictor or PricePredictor()
+
+    def fetch_panel(self):
+        return download_panel(self.symbols, self.timeframe, self.period)
+
+    def run(self, stop_loss=0.02, take_profit=0.05, max_positions=10, max_weight=None,
+            initial_balance=10000, slippage=0.001, intrabar=False, panel=None):
+        """
+        Long-only portfolio with the single-asset rules of Backtester.run():
+        SL/TP per position, exit on DOWN, entry on UP. Each entry gets
+        equity / max_positions (capped by max_weight and the cash left); when
+        more symbols signal than slots are free, the strongest trend
+        (sma_50 / sma_200) wins.
+        intrabar=True checks SL/TP against high/low (stop first) instead of the close.
+        panel: optional (index, symbols, array) from align_panel, skips the download.
+        """
+        index, symbols, data = panel if panel is not None else self.fetch_panel()
+        indicators, signals = panel_signals(data, predictor=self.predictor)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            strength = np.nan_to_num(indicators["sma_50"] / indicators["sma_200"] - 1, nan=-np.inf)
+
+        raw_close = data[:, :, _F["close"]]
+        tradable = ~np.isnan(raw_close)
+        close = pd.DataFrame(raw_close).ffill().fillna(0.0).to_numpy()  # valoración con el último precio
+        # Sin vela no se dispara nada: low=+inf / high=-inf nunca tocan SL/TP
+        low = np.where(tradable, data[:, :, _F["low"] if intrabar else _F["close"]], np.inf)
+        high = np.where(tradable, data[:, :, _F["high"] if intrabar else _F["close"]], -np.inf)
+        open_ = np.where(tradable, data[:, :, _F["open"]], close)
+        sig_up = tradable & (signals == 1)
+        sig_down = tradable & (signals == -1)
+
+        n, s = close.shape
+        slot = min(1.0 / max_positions, max_weight or 1.0)
+        cash = float(initial_balance)
+        units = np.zeros(s)
+        held = np.zeros(s, dtype=bool)
+        entry = np.zeros(s)
+        sl = np.zeros(s)
+        tp = np.zeros(s)
+        # Las posiciones solo cambian en los eventos: se guardan ahí y se expanden al final
+        change_t, change_units, change_cash = [0], [units.copy()], [cash]
+        events = []  # (t, símbolo, acción, precio, motivo, beneficio %)
+
+        print(f"\n▶️ Simulando cartera: {s} símbolos × {n} velas...")
+        for t in range(n):
+            changed = False
+            exits = None
+            n_held = int(held.sum())
+
+            # 1. SL/TP y salida por señal de todas las posiciones a la vez
+            if n_held:
+                hit_sl = held & (low[t] <= sl)
+                hit_tp = held & (high[t] >= tp) & ~hit_sl
+                exits = hit_sl | hit_tp | (held & sig_down[t])
+                if exits.any():
+                    c = close[t]
+                    px = c
+                    if intrabar:
+                        # Nivel tocado dentro de la vela, o la apertura si abrió más allá (gap)
+                        px = np.where(hit_sl, np.minimum(sl, open_[t]), np.where(hit_tp, np.maximum(tp, open_[t]), c))
+                    px = px * (1 - slippage)
+                    for j in np.flatnonzero(exits):
+                        reason = "STOP_LOSS" if hit_sl[j] else "TAKE_PROFIT" if hit_tp[j] else "TECH_SIGNAL"
+                        events.append((t, j, "SELL", px[j], reason, (px[j] / entry[j] - 1) * 100))
+                    cash += float(units[exits] @ px[exits])
+                    units[exits] = 0.0
+                    held[exits] = False
+                    n_held = int(held.sum())
+                    changed = True
+
+            # 2. Entradas en los huecos libres
+            free = max_positions - n_held
+            if free > 0 and cash > 0:
+                wanted = sig_up[t] & ~held
+                if changed:
+                    wanted &= ~exits  # las vendidas en esta vela no reabren (como run())
+                candidates = np.flatnonzero(wanted)
+                if candidates.size:
+                    if candidates.size > free:
+                        candidates = candidates[np.argsort(-strength[t, candidates], kind="stable")[:free]]
+                    c = close[t]
+                    total = cash + float(units @ c)
+                    alloc = min(slot * total, cash / candidates.size)
+                    buy = c[candidates] * (1 + slippage)
+                    units[candidates] = alloc / buy
+                    held[candidates] = True
+                    entry[candidates] = buy
+                    sl[candidates] = buy * (1 - stop_loss)
+                    tp[candidates] = buy * (1 + take_profit)
+                    cash -= alloc * candidates.size
+                    for j, p in zip(candidates, buy):
+                        events.append((t, j, "BUY", p, "TECH_SIGNAL", 0.0))
+                    changed = True
+
+            if changed:
+                change_t.append(t)
+                change_units.append(units.copy())
+                change_cash.append(cash)
+
+        # Equity y pesos de toda la historia de una vez
+        state = np.searchsorted(np.asarray(change_t), np.arange(n), side="right") - 1
+        values = np.asarray(change_units)[state] * close
+        equity = np.asarray(change_cash)[state] + values.sum(axis=1)
+
+        # Cierre forzoso al final
+        final = close[-1] * (1 - slippage) if n else np.zeros(s)
+        for j in np.flatnonzero(held):
+            events.append((n - 1, j, "SELL", final[j], "END_OF_TEST", (final[j] / entry[j] - 1) * 100))
+        if n:
+            equity[-1] = cash + float(units @ final)
+
+        weights = pd.DataFrame(values / equity[:, None], index=index, columns=symbols)
+        trades = pd.DataFrame(events, columns=["t", "symbol", "action", "price", "reason", "profit_pct"])
+        trades.insert(0, "timestamp", index[trades.pop("t").to_numpy(dtype=np.int64)])
+        trades["symbol"] = np.asarray(symbols, dtype=object)[trades["symbol"].to_numpy(dtype=np.int64)]
+        return {
+            "equity": pd.Series(equity, index=index, name="equity"),
+            "exposure": weights.sum(axis=1).rename("exposure"),
+            "weights": weights,
+            "trades": trades,
+            "initial_balance": initial_balance,
+        }
+
+
+def summarize(result):
+    equity, trades = result["equity"], result["trades"]
+    sells = trades[trades["action"] == "SELL"]
+    initial = result["initial_balance"]
+    final = equity.iloc[-1] if len(equity) else initial
+    drawdown = (equity / equity.cummax() - 1).min() * 100 if len(equity) else 0.0
+
+    print("\n" + "=" * 40)
+    print("📊 REPORTE DE CARTERA (BACKTEST)")
+    print("=" * 40)
+    print(f"💰 Balance Inicial:   ${initial:,.2f}")
+    print(f"🏁 Balance Final:     ${final:,.2f}")
+    print(f"📈 ROI Total:         {(final / initial - 1) * 100:.2f}%")
+    print(f"📉 Max Drawdown:      {drawdown:.2f}%")
+    print(f"📦 Exposición media:  {result['exposure'].mean() * 100:.1f}%")
+    print("-" * 20)
+    print(f"🤝 Total Operaciones: {len(sells)}")
+    if len(sells):
+        print(f"🎯 Win Rate:          {(sells['profit_pct'] > 0).mean() * 100:.2f}%")
+        print("\n🏷️ Beneficio medio por símbolo (%):")
+        print(sells.groupby("symbol")["profit_pct"].agg(["count", "mean"]).sort_values("mean").tail(10))
+    return sells
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Vectorized multi-asset portfolio backtest")
+    parser.add_argument("symbols", nargs="+", help="yfinance tickers, e.g. BTC-USD ETH-USD SOL-USD")
+    parser.add_argument("--timeframe", default="1h")
+    parser.add_argument("--period", default="60d")
+    parser.add_argument("--stop-loss", type=float, default=0.02)
+    parser.add_argument("--take-profit", type=float, default=0.05)
+    parser.add_argument("--max-positions", type=int, default=10)
+    parser.add_argument("--intrabar", action="store_true")
+    args = parser.parse_args()
+
+    pb = PortfolioBacktester(args.symbols, args.timeframe, args.period)
+    summarize(pb.run(args.stop_loss, args.take_profit, args.max_positions, intrabar=args.intrabar))
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+
+# Registro compacto para simulaciones largas.
+# En lugar de un dict por operación y un float de Python por vela, se guardan
+# columnas tipadas preasignadas que crecen por duplicación (coste amortizado O(1)).
+
+
+class EquityBuffer:
+    """
+    Growable float64 buffer for the equity curve (one value per bar).
+    Keeps list-like append/len/iteration so existing callers keep working.
+    """
+    def __init__(self, capacity=1024):
+        self._data = np.empty(max(int(capacity), 1), dtype=np.float64)
+        self._size = 0
+
+    def append(self, value):
+        if self._size == self._data.size:
+            self._grow(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def reserve(self, capacity):
+        """Ensures room for `capacity` values without further reallocations."""
+        if capacity > self._data.size:
+            self._grow(capacity)
+
+    def _grow(self, min_capacity):
+        new_capacity = max(min_capacity, self._data.size * 2)
+        data = np.empty(new_capacity, dtype=np.float64)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    @property
+    def values(self):
+        """Zero-copy NumPy view over the recorded values."""
+        return self._data[:self._size]
+
+    def to_series(self, index=None):
+        return pd.Series(self.values, index=index, copy=False, name="equity")
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, item):
+        return self.values[item]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.values if dtype is None else self.values.astype(dtype)
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+
+class TradeLog:
+    """
+    Struct-of-arrays trade journal for BacktestTrader.
+    Text fields (action, reason) are stored as uint8 codes over a small
+    vocabulary, numeric fields as float64 and timestamps as datetime64[ns].
+    """
+    NUMERIC_FIELDS = ("price", "profit_pct", "balance")
+
+    def __init__(self, capacity=256):
+        capacity = max(int(capacity), 1)
+        self._size = 0
+        self._timestamp = np.empty(capacity, dtype="datetime64[ns]")
+        self._action = np.empty(capacity, dtype=np.uint8)
+        self._reason = np.empty(capacity, dtype=np.uint8)
+        self._numeric = {f: np.empty(capacity, dtype=np.float64) for f in self.NUMERIC_FIELDS}
+        self._actions = {}
+        self._reasons = {}
+
+    @staticmethod
+    def _code(vocab, value):
+        code = vocab.get(value)
+        if code is None:
+            code = len(vocab)
+            if code > np.iinfo(np.uint8).max:
+                raise ValueError(f"Demasiadas categorías distintas en TradeLog: {value}")
+            vocab[value] = code
+        return code
+
+    def append(self, timestamp, action, price, reason, profit_pct, balance):
+        if self._size == self._action.size:
+            self._grow()
+        i = self._size
+        self._timestamp[i] = np.datetime64(pd.Timestamp(timestamp).to_datetime64(), "ns")
+        self._action[i] = self._code(self._actions, action)
+        self._reason[i] = self._code(self._reasons, reason)
+        self._numeric["price"][i] = price
+        self._numeric["profit_pct"][i] = profit_pct
+        self._numeric["balance"][i] = balance
+        self._size += 1
+
+    def _grow(self):
+        capacity = self._action.size * 2
+
+        def _resized(arr):
+            out = np.empty(capacity, dtype=arr.dtype)
+            out[:self._size] = arr[:self._size]
+            return out
+
+        self._timestamp = _resized(self._timestamp)
+        self._action = _resized(self._action)
+        self._reason = _resized(self._reason)
+        self._numeric = {f: _resized(a) for f, a in self._numeric.items()}
+
+    def column(self, name):
+        """Zero-copy NumPy view of a numeric/timestamp column."""
+        if name == "timestamp":
+            return self._timestamp[:self._size]
+        return self._numeric[name][:self._size]
+
+    def to_frame(self):
+        """
+        Builds a DataFrame whose numeric columns are views over the buffers
+        (no copy) and whose text columns are Categoricals over the uint8 codes.
+        """
+        n = self._size
+        data = {
+            "timestamp": self._timestamp[:n],
+            "action": pd.Categorical.from_codes(self._action[:n], list(self._actions)),
+            "price": self._numeric["price"][:n],
+            "reason": pd.Categorical.from_codes(self._reason[:n], list(self._reasons)),
+            "profit_pct": self._numeric["profit_pct"][:n],
+            "balance": self._numeric["balance"][:n],
+        }
+        return pd.DataFrame(data, copy=False)
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return (self._timestamp.nbytes + self._action.nbytes + self._reason.nbytes
+                + sum(a.nbytes for a in self._numeric.values()))
@@ -0,0 +1,293 @@
+import io
+import os
+import time
+import logging
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+from src.clock import VirtualClock
+from src.trader import Trader
+from src.recorder import TradeLog
+from src.keyword_scorer import KeywordScorer
+from src.model import RemoteSentimentAnalyzer
+
+# Modo replay: ejecuta run_bot_loop (la lógica real de main.py) sobre un reloj
+# virtual, alimentado con velas, titulares, ballenas y señales OpenClaw grabadas.
+# Los sleep() avanzan el reloj al instante, así que un día son ~1440 ciclos en
+# segundos. El diario de operaciones sale con el mismo formato que trading_logs.
+
+logger = logging.getLogger(__name__)
+
+LIVE_FALLBACK_NEWS = ["Bitcoin market steady.", "Crypto monitoring active."]
+
+
+def _epoch_seconds(ts):
+    ts = pd.to_datetime(pd.Series(ts), utc=True)
+    return ((ts - pd.Timestamp(0, tz="UTC")) / pd.Timedelta(seconds=1)).to_numpy(dtype=np.float64)
+
+
+def _load_table(directory, name):
+    """Reads <name>.csv / .parquet from a recording directory (None if missing)."""
+    for ext, reader in ((".parquet", pd.read_parquet), (".csv", pd.read_csv)):
+        path = os.path.join(directory, name + ext)
+        if os.path.exists(path):
+            df = reader(path)
+            df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+            return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+    return None
+
+
+class Recording:
+    """
+    Recorded inputs of the bot, each with a UTC `timestamp` column:
+    candles (open/high/low/close/volume), headlines (text), whales (text) and
+    openclaw (signal, confidence, sentiment_analysis[, source]).
+    """
+    def __init__(self, candles, headlines=None, whales=None, openclaw=None):
+        self.candles = candles
+        self.headlines = headlines
+        self.whales = whales
+        self.openclaw = openclaw
+
+    @classmethod
+    def from_dir(cls, directory):
+        candles = _load_table(directory, "candles")
+        if candles is None:
+            raise FileNotFoundError(f"No candles.csv/.parquet in {directory}")
+        return cls(candles, _load_table(directory, "headlines"),
+                   _load_table(directory, "whales"), _load_table(directory, "openclaw"))
+
+
+class _TimedEvents:
+    """Text events sorted by time; window(now) is a searchsorted slice."""
+    def __init__(self, events, clock, lookback):
+        self.clock = clock
+        self.lookback = lookback
+        if events is None or events.empty:
+            self.ts = np.empty(0)
+            self.text = np.empty(0, dtype=object)
+        else:
+            self.ts = _epoch_seconds(events["timestamp"])
+            self.text = events["text"].astype(str).to_numpy(dtype=object)
+
+    def window(self, count=None):
+        now = self.clock.time()
+        lo = np.searchsorted(self.ts, now - self.lookback, side="right")
+        hi = np.searchsorted(self.ts, now, side="right")
+        items = self.text[lo:hi].tolist()
+        return items[-count:] if count else items
+
+
+class ReplayDataLoader:
+    """Stand-in for DataLoader: the last `window` recorded candles closed at clock time."""
+    def __init__(self, candles, clock, window=48):
+        self.clock = clock
+        self.window = window
+        self.frame = candles.reindex(columns=["timestamp", "open", "high", "low", "close", "volume"])
+        self.frame["volume"] = self.frame["volume"].fillna(0.0)
+        # Mismo formato que CoinGecko: timestamps naive
+        self.frame["timestamp"] = self.frame["timestamp"].dt.tz_localize(None)
+        self.ts = _epoch_seconds(candles["timestamp"])
+
+        self.values = self.frame[["open", "high", "low", "close", "volume"]].to_numpy(dtype=np.float64)
+        self.ts_ns = self.frame["timestamp"].dt.as_unit("ns").astype("int64").to_numpy()
+
+    def _window(self):
+        hi = int(np.searchsorted(self.ts, self.clock.time(), side="right"))
+        return max(0, hi - self.window), hi
+
+    def fetch_ohlcv(self, symbol, timeframe):
+        lo, hi = self._window()
+        return self.frame.iloc[lo:hi].reset_index(drop=True)
+
+    def fetch_into(self, buffer, symbol, timeframe):
+        lo, hi = self._window()
+        if hi == lo:
+            return None
+        return buffer.update(self.ts_ns[lo:hi], self.values[lo:hi])
+
+
+class ReplayNewsFetcher:
+    def __init__(self, headlines, clock, count=5, lookback=3600):
+        self.events = _TimedEvents(headlines, clock, lookback)
+        self.count = count
+
+    def get_latest_news(self):
+        news = self.events.window(self.count)
+        return news or list(LIVE_FALLBACK_NEWS)
+
+
+class ReplayWhaleFetcher:
+    def __init__(self, whales, clock, lookback=3600):
+        self.events = _TimedEvents(whales, clock, lookback)
+
+    def get_latest_movements(self):
+        return self.events.window(), "NEUTRAL"
+
+
+class LexiconAnalyzer:
+    """Sentiment stand-in: tech_brain's lexicon scorer + the live payload aggregation."""
+    def __init__(self, scorer=None):
+        self.scorer = scorer or KeywordScorer.from_file()
+
+    def analyze(self, text_list):
+        if not text_list:
+            return "NEUTRAL", 0.0
+        return RemoteSentimentAnalyzer._parse_results(self.scorer.classify_batch(text_list), text_list) or ("NEUTRAL", 0.0)
+
+    def check_status(self):
+        return True
+
+
+class ReplayTrader(Trader):
+    """Offline Trader whose journal uses the virtual clock instead of wall time."""
+    def __init__(self, symbol, clock, initial_balance=100000.0):
+        super().__init__(symbol, offline=True)
+        self.clock = clock
+        self.virtual_balance = initial_balance
+        self.trades = TradeLog()
+
+    def _save_to_csv(self, timestamp, action, price, reason, profit):
+        self.trades.append(self.clock.now(), action, price, reason, profit, self.virtual_balance)
+
+
+class JournalLogger:
+    """Collects what the live loop would send to Supabase / Notion / Telegram."""
+    def __init__(self, clock):
+        self.clock = clock
+        self.rows = []
+        self.rollups = []
+        self.messages = 0
+
+    def log_to_supabase(self, action, price, sentiment, confidence, pnl=0.0):
+        self.rows.append({"created_at": self.clock.now(), "action": action, "price": float(price),
+                          "sentiment": sentiment, "confidence": float(confidence), "pnl": float(pnl)})
+
+    def log_rollup(self, rollup, created_at=None):
+        self.rollups.append(rollup)
+        return True
+
+    def log_trade(self, action, price, sentiment, confidence, profit):
+        pass
+
+    def send_message(self, text):
+        self.messages += 1
+
+    def report_cycle(self, status, price=None, sentiment=None, error=None):
+        if status == "ERROR":
+            logger.warning(f"Replay cycle error at {self.clock.now()}: {error}")
+
+    def frame(self):
+        return pd.DataFrame(self.rows, columns=["created_at", "action", "price", "sentiment", "confidence", "pnl"])
+
+
+class _ReplaySchedule:
+    """
+    Passed to run_bot_loop as `stop`: before each cycle it delivers the OpenClaw
+    signals that are due (same path as POST /openclaw/signal) and ends the run
+    when the recording is exhausted.
+    """
+    def __init__(self, bot, clock, openclaw, end_ts):
+        self.bot = bot
+        self.clock = clock
+        self.end_ts = end_ts
+        self.cycles = 0
+        self.signals = [] if openclaw is None else openclaw.to_dict("records")
+        self.signal_ts = [] if openclaw is None else _epoch_seconds(openclaw["timestamp"]).tolist()
+        self._next = 0
+
+    def __call__(self):
+        now = self.clock.time()
+        while self._next < len(self.signals) and self.signal_ts[self._next] <= now:
+            sig = self.signals[self._next]
+            self.bot.ingest_openclaw_signal(sig["signal"], float(sig["confidence"]),
+                                            str(sig.get("sentiment_analysis", "")),
+                                            sig.get("source", "OpenClaw"), ts=self.signal_ts[self._next])
+            self._next += 1
+        if now > self.end_ts:
+            return True
+        self.cycles += 1
+        return False
+
+
+def run_replay(recording, settings=None, start=None, end=None, analyzer=None, window=48, quiet=True):
+    """
+    Drives main.run_bot_loop over a Recording on a virtual clock.
+    Returns the trade journal (trading_logs rows), closed trades, HOLD rollups and speed stats.
+    """
+    import json
+    import main as bot  # importa FastAPI; solo se paga al usar replay
+
+    if settings is None:
+        with open("config/settings.json") as f:
+            settings = json.load(f)
+    settings = dict(settings, symbol="BTC/USD", cluster_enabled=False)
+
+    candle_ts = _epoch_seconds(recording.candles["timestamp"])
+    start_ts = pd.Timestamp(start, tz="UTC").timestamp() if start else candle_ts[min(window, len(candle_ts) - 1)]
+    end_ts = pd.Timestamp(end, tz="UTC").timestamp() if end else candle_ts[-1]
+
+    clock = VirtualClock(start_ts)
+    journal = JournalLogger(clock)
+    trader = ReplayTrader(settings["symbol"], clock)
+    schedule = _ReplaySchedule(bot, clock, recording.openclaw, end_ts)
+    bot.openclaw_signals.clear()  # sin señales de una ejecución anterior
+
+    root = logging.getLogger()
+    level = root.level
+    t0 = time.perf_counter()
+    try:
+        if quiet:
+            root.setLevel(logging.WARNING)
+        # Trader y DataLoader informan con print(): se silencian en modo quiet
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            bot.run_bot_loop(
+                settings=settings,
+                clock=clock,
+                loader=ReplayDataLoader(recording.candles, clock, window),
+                fetcher=ReplayNewsFetcher(recording.headlines, clock),
+                whale_tracker=ReplayWhaleFetcher(recording.whales, clock),
+                bot_trader=trader,
+                bot_analyzer=analyzer or LexiconAnalyzer(),
+                notion=journal,
+                supabase=journal,
+                telegram=journal,
+                stop=schedule,
+            )
+    finally:
+        root.setLevel(level)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "journal": journal.frame(),
+        "trades": trader.trades.to_frame(),
+        "rollups": pd.DataFrame(journal.rollups),
+        "cycles": schedule.cycles,
+        "simulated_seconds": clock.time() - start_ts,
+        "wall_seconds": elapsed,
+        "cycles_per_second": schedule.cycles / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Replay recorded market data through the live bot loop")
+    parser.add_argument("recording", help="Directory with candles/headlines/whales/openclaw .csv or .parquet")
+    parser.add_argument("--start", default=None)
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--journal", default=None, help="Write the trade journal to this CSV")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    result = run_replay(Recording.from_dir(args.recording), start=args.start, end=args.end, quiet=not args.verbose)
+    journal = result["journal"]
+    print(f"⏩ {result['cycles']} cycles ({result['simulated_seconds'] / 86400:.1f} simulated days) "
+          f"in {result['wall_seconds']:.2f}s -> {result['cycles_per_second']:.0f} cycles/s")
+    print(f"📒 {len(journal)} journal rows | {len(result['trades'])} closed trades | {len(result['rollups'])} HOLD rollups")
+    if not journal.empty:
+        print(journal.tail(10).to_string(index=False))
+    if args.journal:
+        journal.to_csv(args.journal, index=False)
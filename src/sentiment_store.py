@@ -0,0 +1,234 @@
+import os
+import json
+import glob
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Almacén histórico de sentimiento para backtests.
+# Un archivo local de titulares se puntúa offline una sola vez por versión de
+# modelo y se guarda en columnas .npy (timestamp, id, score, label) por chunk.
+# Cada chunk se escribe de forma atómica, así que una ejecución interrumpida se
+# reanuda saltando los chunks ya hechos. El backtester lo une a las velas con un
+# as-of vectorizado (searchsorted + sumas acumuladas).
+
+DEFAULT_STORE_ROOT = os.getenv("SENTIMENT_STORE", "data/sentiment")
+CHUNK_SIZE = 20_000
+TEXT_COLUMNS = ("text", "title", "headline")
+COLUMNS = ("timestamp", "id", "score", "label")
+
+logger = logging.getLogger(__name__)
+
+
+def load_headline_archive(path):
+    """
+    Reads .csv / .jsonl / .json / .parquet headline files (a file or a directory tree)
+    into a DataFrame (timestamp UTC, text, id) sorted by time and de-duplicated.
+    """
+    files = [path] if os.path.isfile(path) else sorted(
+        f for ext in ("csv", "jsonl", "json", "parquet")
+        for f in glob.glob(os.path.join(path, "**", f"*.{ext}"), recursive=True)
+    )
+    frames = []
+    for f in files:
+        if f.endswith(".csv"):
+            df = pd.read_csv(f)
+        elif f.endswith(".parquet"):
+            df = pd.read_parquet(f)
+        else:
+            df = pd.read_json(f, lines=f.endswith(".jsonl"))
+        text_col = next((c for c in TEXT_COLUMNS if c in df.columns), None)
+        if text_col is None or "timestamp" not in df.columns:
+            logger.warning(f"⚠️ Skipping {f}: needs 'timestamp' and one of {TEXT_COLUMNS}")
+            continue
+        frames.append(pd.DataFrame({"timestamp": df["timestamp"], "text": df[text_col].astype(str)}))
+
+    if not frames:
+        return pd.DataFrame({"timestamp": pd.DatetimeIndex([], tz="UTC"), "text": [], "id": np.empty(0, np.uint64)})
+
+    archive = pd.concat(frames, ignore_index=True)
+    archive["timestamp"] = pd.to_datetime(archive["timestamp"], utc=True, format="mixed").dt.as_unit("ns")
+    archive = archive.dropna(subset=["timestamp"])
+    archive["id"] = [headline_id(ts, t) for ts, t in zip(archive["timestamp"].astype("int64").tolist(), archive["text"])]
+    archive = archive.drop_duplicates(subset="id").sort_values(["timestamp", "id"], kind="stable")
+    return archive.reset_index(drop=True)
+
+
+def headline_id(ts_ns, text):
+    """Stable 64-bit id of a headline (timestamp + normalized text)."""
+    digest = hashlib.sha1(f"{ts_ns}|{' '.join(text.lower().split())}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def _signed_scores(results):
+    """Same per-text contribution the live aggregation uses: +score / -score / 0."""
+    labels = np.array([r["label"].lower() for r in results], dtype=object)
+    scores = np.array([r["score"] for r in results], dtype=np.float64)
+    sign = np.where(labels == "positive", 1, np.where(labels == "negative", -1, 0)).astype(np.int8)
+    return scores * sign, sign
+
+
+# --- Workers (uno por proceso, el modelo se carga una vez por worker) ---
+_WORKER_MODEL = None
+
+
+def _load_model(kind, model_name=None):
+    if kind == "lexicon":
+        from src.keyword_scorer import KeywordScorer
+        scorer = KeywordScorer.from_file(model_name)
+        return scorer.classify_batch
+    if kind == "finbert":
+        from src.model import SentimentAnalyzer
+        analyzer = SentimentAnalyzer(model_name or "ProsusAI/finbert")
+        if not analyzer.pipe:
+            # Sin modelo todo saldría NEUTRAL y se guardaría como si fuera válido
+            raise RuntimeError("FinBERT could not be loaded.")
+        return lambda texts: analyzer.classify(texts, batch_size=64)
+    raise ValueError(f"Modelo de sentimiento desconocido: {kind}")
+
+
+def _init_worker(kind, model_name):
+    global _WORKER_MODEL
+    _WORKER_MODEL = _load_model(kind, model_name)
+
+
+def _score_chunk(texts):
+    return _signed_scores(_WORKER_MODEL(texts))
+
+
+def model_version(kind, model_name=None):
+    """Identifier under which scores are stored; changes whenever the model does."""
+    if kind == "lexicon":
+        from src.keyword_scorer import load_lexicon
+        weights = json.dumps(load_lexicon(model_name), sort_keys=True)
+        return f"lexicon-{hashlib.sha1(weights.encode('utf-8')).hexdigest()[:10]}"
+    return f"{kind}-{(model_name or 'ProsusAI/finbert').replace('/', '_')}"
+
+
+class SentimentStore:
+    def __init__(self, version, root=DEFAULT_STORE_ROOT):
+        self.version = version
+        self.path = os.path.join(root, version)
+
+    def _chunk_dir(self, chunk_id):
+        return os.path.join(self.path, "chunks", chunk_id)
+
+    def _manifest_path(self):
+        return os.path.join(self.path, "manifest.json")
+
+    def manifest(self):
+        if not os.path.exists(self._manifest_path()):
+            return {}
+        with open(self._manifest_path()) as f:
+            return json.load(f)
+
+    def _write_chunk(self, chunk_id, columns):
+        final = self._chunk_dir(chunk_id)
+        tmp = f"{final}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), values)
+        os.replace(tmp, final)  # atómico: un chunk existe completo o no existe
+
+    def build(self, archive, kind="lexicon", model_name=None, workers=None, chunk_size=CHUNK_SIZE):
+        """
+        Scores every headline of `archive` (see load_headline_archive) that is not
+        stored yet. Returns the number of headlines scored in this call.
+        """
+        fingerprint = hashlib.sha1(archive["id"].to_numpy(dtype=np.uint64).tobytes()).hexdigest()
+        if self.manifest().get("archive") == fingerprint:
+            logger.info(f"✅ Sentiment store {self.version} already covers this archive.")
+            return 0
+
+        # Chunks direccionados por contenido: los ya escritos se saltan al reanudar
+        os.makedirs(os.path.join(self.path, "chunks"), exist_ok=True)
+        pending = []
+        for start in range(0, len(archive), chunk_size):
+            chunk = archive.iloc[start:start + chunk_size]
+            chunk_id = hashlib.sha1(chunk["id"].to_numpy(dtype=np.uint64).tobytes()).hexdigest()[:16]
+            if not os.path.isdir(self._chunk_dir(chunk_id)):
+                pending.append((chunk_id, chunk))
+
+        logger.info(f"🧮 Scoring {sum(len(c) for _, c in pending)} headlines in {len(pending)} chunks ({self.version})")
+        scored = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(kind, model_name)) as pool:
+            futures = [(chunk_id, chunk, pool.submit(_score_chunk, chunk["text"].tolist())) for chunk_id, chunk in pending]
+            for chunk_id, chunk, future in futures:
+                score, label = future.result()
+                self._write_chunk(chunk_id, {
+                    "timestamp": chunk["timestamp"].astype("int64").to_numpy(),
+                    "id": chunk["id"].to_numpy(dtype=np.uint64),
+                    "score": score.astype(np.float64),
+                    "label": label,
+                })
+                scored += len(chunk)
+                logger.info(f"  chunk {chunk_id}: {len(chunk)} headlines")
+
+        with open(self._manifest_path(), "w") as f:
+            json.dump({"version": self.version, "archive": fingerprint, "headlines": int(len(archive)),
+                       "model": kind, "model_name": model_name}, f)
+        return scored
+
+    def load(self, start=None, end=None):
+        """All stored scores as a DataFrame indexed by UTC timestamp (score, label)."""
+        chunks = sorted(glob.glob(os.path.join(self.path, "chunks", "*")))
+        chunks = [c for c in chunks if ".tmp-" not in c]
+        if not chunks:
+            return pd.DataFrame({"score": np.empty(0, np.float64), "label": np.empty(0, np.int8)},
+                                index=pd.DatetimeIndex([], tz="UTC", name="timestamp"))
+
+        cols = {name: np.concatenate([np.load(os.path.join(c, f"{name}.npy"), mmap_mode="r") for c in chunks])
+                for name in COLUMNS}
+        _, first = np.unique(cols["id"], return_index=True)  # un titular puede caer en dos chunks
+        order = first[np.argsort(cols["timestamp"][first], kind="stable")]
+        df = pd.DataFrame({"score": cols["score"][order], "label": cols["label"][order]},
+                          index=pd.DatetimeIndex(pd.to_datetime(cols["timestamp"][order], utc=True), name="timestamp"))
+        return df.loc[start:end] if (start is not None or end is not None) else df
+
+
+def sentiment_asof(times, store_frame, lookback="24h", max_headlines=5, threshold=0.1):
+    """
+    Sentiment the live loop would have had at each of `times`: mean signed score
+    of the last `max_headlines` headlines published within `lookback` before it,
+    labelled with the same ±threshold rule as the live aggregation.
+    Returns (labels: object array, confidence: float64 array).
+    """
+    t = pd.DatetimeIndex(times)
+    t = (t.tz_localize("UTC") if t.tz is None else t.tz_convert("UTC")).as_unit("ns").asi8
+    ts = store_frame.index.asi8
+    scores = store_frame["score"].to_numpy(dtype=np.float64)
+
+    hi = np.searchsorted(ts, t, side="right")
+    lo = np.searchsorted(ts, t - pd.Timedelta(lookback).value, side="right")
+    lo = np.maximum(lo, hi - max_headlines)
+    count = hi - lo
+    csum = np.concatenate(([0.0], np.cumsum(scores)))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = np.where(count > 0, (csum[hi] - csum[lo]) / count, 0.0)
+
+    labels = np.where(avg > threshold, "BULLISH", np.where(avg < -threshold, "BEARISH", "NEUTRAL")).astype(object)
+    return labels, avg
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Score a local headline archive into the historical sentiment store")
+    parser.add_argument("archive", help="File or directory with headline .csv/.jsonl/.json/.parquet files")
+    parser.add_argument("--model", choices=["lexicon", "finbert"], default="finbert")
+    parser.add_argument("--model-name", default=None, help="HF model id (finbert) or lexicon path")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--root", default=DEFAULT_STORE_ROOT)
+    args = parser.parse_args()
+
+    version = model_version(args.model, args.model_name)
+    store = SentimentStore(version, args.root)
+    n = store.build(load_headline_archive(args.archive), args.model, args.model_name, args.workers, args.chunk_size)
+    print(f"📚 {version}: {n} headlines scored, {len(store.load())} stored.")
@@ -0,0 +1,73 @@
+import json
+import struct
+import numpy as np
+
+# Formato binario compacto para enviar muchas series float64 por HTTP.
+#   b"AGS1" | uint32 header_len | header JSON | padding a 8 bytes | datos
+# El header describe cada serie (nombre, longitud, columnas) y los datos son
+# los float64 little-endian de cada columna, uno detrás de otro. Decodificar
+# no copia: cada columna es una vista np.frombuffer sobre el payload.
+
+MAGIC = b"AGS1"
+MEDIA_TYPE = "application/x-antigravity-series"
+_LEN = struct.Struct("<I")
+_DTYPE = np.dtype("<f8")
+
+
+def encode_series(series):
+    """
+    series: {name: {column: 1-D array}} (all columns of a series share length)
+    Returns the binary payload.
+    """
+    meta = []
+    chunks = []
+    for name, columns in series.items():
+        arrays = {col: np.ascontiguousarray(values, dtype=_DTYPE) for col, values in columns.items()}
+        lengths = {a.size for a in arrays.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columnas de distinta longitud en la serie {name}")
+        meta.append({"name": name, "length": lengths.pop() if lengths else 0, "columns": list(arrays)})
+        chunks.extend(arrays.values())
+
+    header = json.dumps({"series": meta}).encode("utf-8")
+    prefix_len = len(MAGIC) + _LEN.size + len(header)
+    padding = b"\0" * (-prefix_len % 8)
+    return b"".join([MAGIC, _LEN.pack(len(header)), header, padding] + [a.tobytes() for a in chunks])
+
+
+def decode_series(payload):
+    """Inverse of encode_series. Columns are read-only views over payload."""
+    payload = memoryview(payload)
+    if bytes(payload[:4]) != MAGIC:
+        raise ValueError("Payload no reconocido (magic incorrecto)")
+    (header_len,) = _LEN.unpack(payload[4:8])
+    header = json.loads(bytes(payload[8:8 + header_len]))
+    offset = 8 + header_len
+    offset += -offset % 8
+
+    series = {}
+    for meta in header["series"]:
+        n = meta["length"]
+        columns = {}
+        for col in meta["columns"]:
+            columns[col] = np.frombuffer(payload, dtype=_DTYPE, count=n, offset=offset)
+            offset += n * _DTYPE.itemsize
+        series[meta["name"]] = columns
+    if offset != len(payload):
+        raise ValueError("Payload truncado o con bytes sobrantes")
+    return series
+
+
+def fetch_remote_indicators(url, closes_by_symbol, settings=None, timeout=30):
+    """
+    Client helper: sends {symbol: close array} to a tech brain
+    /indicators/batch endpoint and returns {symbol: {indicator: array}}.
+    """
+    import requests
+    settings = settings or {}
+    params = {k: settings[k] for k in ("rsi_period", "macd_fast", "macd_slow", "macd_signal") if k in settings}
+    body = encode_series({sym: {"close": closes} for sym, closes in closes_by_symbol.items()})
+    response = requests.post(url, data=body, params=params, timeout=timeout,
+                             headers={"Content-Type": MEDIA_TYPE})
+    response.raise_for_status()
+    return decode_series(response.content)
@@ -0,0 +1,93 @@
+import os
+import json
+import threading
+
+from fastapi import HTTPException, Header
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+# Piezas comunes de la API (proceso del bot y proceso API separado).
+# Las respuestas se serializan con orjson si está instalado (varias veces más
+# rápido que json) y los endpoints de solo lectura más consultados sirven bytes
+# ya codificados: se codifican una vez cuando cambia el estado, no por petición.
+
+try:
+    import orjson
+    HAVE_ORJSON = True
+except ImportError:
+    HAVE_ORJSON = False
+
+OPENCLAW_SECRET = os.getenv("OPENCLAW_SECRET", "changeme_in_production")
+
+
+def dumps(obj):
+    """JSON bytes; numpy scalars and other unknown types fall back to str()/float()."""
+    if HAVE_ORJSON:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data):
+    return orjson.loads(data) if HAVE_ORJSON else json.loads(data)
+
+
+def _default(obj):
+    if hasattr(obj, "item"):  # numpy scalar
+        return obj.item()
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+class FastJSONResponse(Response):
+    """JSONResponse drop-in that encodes with dumps()."""
+    media_type = "application/json"
+
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)  # ya codificado
+        return dumps(content)
+
+
+class PreEncoded:
+    """
+    Holds the encoded body of a read-mostly payload. set() encodes once per
+    state change; body() is a reference read, so requests never touch the encoder.
+    """
+    def __init__(self, payload=None):
+        self._lock = threading.Lock()
+        self._body = dumps(payload if payload is not None else {})
+        self.version = 0
+
+    def set(self, payload):
+        body = dumps(payload)
+        with self._lock:
+            self._body = body
+            self.version += 1
+        return body
+
+    def set_bytes(self, body):
+        with self._lock:
+            self._body = bytes(body)
+            self.version += 1
+
+    def body(self):
+        return self._body
+
+    def response(self):
+        return Response(content=self._body, media_type="application/json")
+
+
+def verify_token(x_auth_token: str = Header(None, alias="X-Auth-Token")):
+    if x_auth_token != OPENCLAW_SECRET:
+        raise HTTPException(status_code=401, detail="Invalid Authentication Token")
+    return x_auth_token
+
+
+class OpenClawSignal(BaseModel):
+    signal: str  # "buy", "sell", "hold"
+    confidence: float
+    sentiment_analysis: str
+    timestamp: str = None
+    source: str = "OpenClaw"
+    additional_data: dict = {}
@@ -0,0 +1,145 @@
+import time
+import struct
+import logging
+from multiprocessing import shared_memory
+
+# Estado compartido entre el proceso del bot y un proceso API separado.
+# Un solo segmento de memoria compartida con:
+#   - el cuerpo JSON ya codificado de /market/status, protegido con un seqlock
+#     (el bot escribe, la API copia los bytes y reintenta si el bot estaba a medias);
+#   - la hora del último ciclo del bucle (health check);
+#   - una cola circular de bytes (un productor: la API; un consumidor: el bot)
+#     por la que llegan las señales OpenClaw al SignalBook del bucle.
+# Así la API no comparte el GIL con pandas y el bot no paga la serialización HTTP.
+
+# Cabecera: offsets de cada campo (u64 salvo LOOP_TIME, f64)
+SEQ, BLOB_LEN, LOOP_TIME, WRITTEN, READ, DROPPED, BLOB_SIZE, RING_SIZE = (0, 8, 16, 24, 32, 40, 48, 56)
+_HEADER_SIZE = 64
+_LEN = struct.Struct("<I")
+_U64 = struct.Struct("<Q")
+_F64 = struct.Struct("<d")
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState:
+    def __init__(self, name=None, create=False, blob_size=64 * 1024, ring_size=256 * 1024):
+        """create=True allocates the segment (bot process); otherwise attaches to `name` (API process)."""
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_SIZE + blob_size + ring_size)
+            self._buf = self._shm.buf
+            self._buf[:_HEADER_SIZE] = bytes(_HEADER_SIZE)
+            self._put(BLOB_SIZE, blob_size)
+            self._put(RING_SIZE, ring_size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+            self._buf = self._shm.buf
+        self.name = self._shm.name
+        self.owner = create
+        self.blob_size = self._get(BLOB_SIZE)
+        self.ring_size = self._get(RING_SIZE)
+        self._blob = _HEADER_SIZE
+        self._ring = _HEADER_SIZE + self.blob_size
+
+    def _get(self, offset):
+        return _U64.unpack_from(self._buf, offset)[0]
+
+    def _put(self, offset, value):
+        _U64.pack_into(self._buf, offset, value)
+
+    # --- Estado publicado por el bot (seqlock) ---
+
+    def publish(self, body):
+        """Writer side: replaces the shared JSON body (single writer)."""
+        n = len(body)
+        if n > self.blob_size:
+            logger.warning(f"⚠️ Shared status of {n} bytes does not fit in {self.blob_size}; not published")
+            return False
+        seq = self._get(SEQ)
+        self._put(SEQ, seq + 1)  # impar: escritura en curso
+        self._buf[self._blob:self._blob + n] = body
+        self._put(BLOB_LEN, n)
+        self._put(SEQ, seq + 2)
+        return True
+
+    def read(self, retries=100):
+        """Reader side: consistent copy of the last published body (b"{}" before the first one)."""
+        for _ in range(retries):
+            seq = self._get(SEQ)
+            if seq & 1:
+                time.sleep(0)
+                continue
+            n = self._get(BLOB_LEN)
+            body = bytes(self._buf[self._blob:self._blob + n])
+            if self._get(SEQ) == seq:
+                return body if n else b"{}"
+        raise TimeoutError("El estado compartido está siendo escrito continuamente")
+
+    @property
+    def version(self):
+        return self._get(SEQ) >> 1
+
+    @property
+    def last_loop_time(self):
+        return _F64.unpack_from(self._buf, LOOP_TIME)[0]
+
+    @last_loop_time.setter
+    def last_loop_time(self, value):
+        _F64.pack_into(self._buf, LOOP_TIME, value)
+
+    # --- Cola de señales API -> bot ---
+
+    def push(self, record):
+        """Producer side: appends one encoded record; False if the ring is full (the record is dropped)."""
+        return self.push_many([record])
+
+    def push_many(self, records):
+        """Producer side: appends every record or none of them (False if the batch does not fit)."""
+        written, read = self._get(WRITTEN), self._get(READ)
+        data = b"".join(_LEN.pack(len(record)) + record for record in records)
+        if len(data) > self.ring_size - (written - read):
+            self._put(DROPPED, self._get(DROPPED) + len(records))
+            return False
+        self._ring_write(written, data)
+        self._put(WRITTEN, written + len(data))  # visible solo cuando el lote está completo
+        return True
+
+    def drain(self, limit=None):
+        """Consumer side: every pending record, oldest first."""
+        written, read = self._get(WRITTEN), self._get(READ)
+        out = []
+        while read < written and (limit is None or len(out) < limit):
+            (n,) = _LEN.unpack(self._ring_read(read, _LEN.size))
+            out.append(self._ring_read(read + _LEN.size, n))
+            read += _LEN.size + n
+        self._put(READ, read)
+        return out
+
+    def _ring_write(self, pos, data):
+        start = self._ring + pos % self.ring_size
+        first = min(len(data), self._ring + self.ring_size - start)
+        self._buf[start:start + first] = data[:first]
+        if first < len(data):
+            self._buf[self._ring:self._ring + len(data) - first] = data[first:]
+
+    def _ring_read(self, pos, n):
+        start = self._ring + pos % self.ring_size
+        first = min(n, self._ring + self.ring_size - start)
+        data = bytes(self._buf[start:start + first])
+        if first < n:
+            data += bytes(self._buf[self._ring:self._ring + n - first])
+        return data
+
+    def stats(self):
+        written, read = self._get(WRITTEN), self._get(READ)
+        return {"name": self.name, "version": self.version, "status_bytes": self._get(BLOB_LEN),
+                "pending_bytes": written - read, "dropped": self._get(DROPPED), "ring_size": self.ring_size}
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
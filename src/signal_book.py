@@ -0,0 +1,206 @@
+import threading
+import time
+
+import numpy as np
+
+# Historial de señales OpenClaw por fuente.
+# Cada agente (campo `source`) tiene su propio buffer circular de capacidad fija:
+# añadir es O(1) y las columnas numéricas se guardan dos veces (posición p y
+# p + capacidad) como en CandleBuffer, así que la ventana actual es un bloque
+# contiguo y las consultas por tiempo son un searchsorted. El consenso se
+# recalcula solo cuando llega una señal o caduca alguna de las que lo forman;
+# entre medias el bucle lo lee en tiempo constante.
+
+SIGNAL_CODES = {"buy": 1, "sell": -1, "hold": 0}
+_ACTIONS = {1: "buy", -1: "sell", 0: "hold"}
+
+
+class _SourceRing:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ts = np.zeros(2 * capacity, dtype=np.float64)
+        self.code = np.zeros(2 * capacity, dtype=np.int8)
+        self.conf = np.zeros(2 * capacity, dtype=np.float64)
+        self.records = [None] * capacity
+        self.head = 0
+        self.size = 0
+
+    def append(self, ts, code, conf, record):
+        if self.size == self.capacity:
+            p = self.head
+            self.head = (self.head + 1) % self.capacity
+        else:
+            p = (self.head + self.size) % self.capacity
+            self.size += 1
+        for q in (p, p + self.capacity):
+            self.ts[q] = ts
+            self.code[q] = code
+            self.conf[q] = conf
+        self.records[p] = record
+
+    def last(self):
+        return self.records[(self.head + self.size - 1) % self.capacity] if self.size else None
+
+    def between(self, since, until):
+        """Records with since <= ts <= until, oldest first."""
+        ts = self.ts[self.head:self.head + self.size]  # vista contigua, sin copia
+        lo = int(np.searchsorted(ts, since, side="left"))
+        hi = int(np.searchsorted(ts, until, side="right"))
+        return [self.records[(self.head + i) % self.capacity] for i in range(lo, hi)]
+
+    def arrays(self):
+        s = slice(self.head, self.head + self.size)
+        return self.ts[s], self.code[s], self.conf[s]
+
+
+class SignalBook:
+    def __init__(self, capacity=256, max_sources=64, window=300.0):
+        if capacity < 1:
+            raise ValueError("capacity debe ser >= 1")
+        self.capacity = capacity
+        self.max_sources = max_sources
+        self.window = window
+        self._rings = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._cached = None  # ((versión, ventana), válido desde, válido hasta, consenso)
+        self.total = 0
+
+    def __len__(self):
+        with self._lock:
+            return sum(r.size for r in self._rings.values())
+
+    # --- Escritura ---
+
+    def _append(self, signal, confidence, sentiment_analysis, source, additional_data, ts):
+        signal = str(signal).lower()
+        ring = self._rings.get(source)
+        if ring is None:
+            if len(self._rings) >= self.max_sources:
+                # Fuente más antigua fuera: el número de agentes también está acotado
+                stale = min(self._rings, key=lambda s: self._rings[s].last()["timestamp"])
+                del self._rings[stale]
+            ring = self._rings[source] = _SourceRing(self.capacity)
+        last = ring.last()
+        if last is not None and ts < last["timestamp"]:
+            ts = last["timestamp"]  # reloj hacia atrás: se mantiene el orden para searchsorted
+        record = {
+            "signal": signal,
+            "sentiment": sentiment_analysis,  # Map to internal logic
+            "confidence": float(confidence),
+            "reason": sentiment_analysis,
+            "timestamp": ts,
+            "source": source,
+            "additional_data": additional_data or {},
+        }
+        ring.append(ts, SIGNAL_CODES.get(signal, 0), record["confidence"], record)
+        self.total += 1
+        return record
+
+    def add(self, signal, confidence, sentiment_analysis, source="OpenClaw", additional_data=None, ts=None):
+        with self._lock:
+            record = self._append(signal, confidence, sentiment_analysis, source, additional_data,
+                                  time.time() if ts is None else ts)
+            self._version += 1
+            return record
+
+    def extend(self, signals, ts=None):
+        """Bulk insert of dicts with the add() fields; one lock acquisition for the whole batch."""
+        now = time.time() if ts is None else ts
+        with self._lock:
+            records = [self._append(s["signal"], s["confidence"], s.get("sentiment_analysis", ""),
+                                    s.get("source", "OpenClaw"), s.get("additional_data"), s.get("ts", now))
+                       for s in signals]
+            self._version += 1
+            return records
+
+    def clear(self):
+        with self._lock:
+            self._rings.clear()
+            self._version += 1
+            self._cached = None
+
+    # --- Lectura ---
+
+    def latest(self, source=None):
+        with self._lock:
+            if source is not None:
+                ring = self._rings.get(source)
+                return ring.last() if ring else None
+            lasts = [r.last() for r in self._rings.values()]
+            return max(lasts, key=lambda r: r["timestamp"], default=None)
+
+    def window_query(self, since, until=None, source=None):
+        """Signals with since <= timestamp <= until (all sources, or one), oldest first."""
+        until = float("inf") if until is None else until
+        with self._lock:
+            if source is None:
+                rings = list(self._rings.values())
+            else:
+                rings = [self._rings[source]] if source in self._rings else []
+            out = [rec for ring in rings for rec in ring.between(since, until)]
+        if len(rings) > 1:
+            out.sort(key=lambda r: r["timestamp"])
+        return out
+
+    def counts(self, since, until=None):
+        """{source: {"buy": n, "sell": n, "hold": n}} in the window, straight from the typed columns."""
+        until = float("inf") if until is None else until
+        with self._lock:
+            out = {}
+            for source, ring in self._rings.items():
+                ts, code, _ = ring.arrays()
+                lo, hi = np.searchsorted(ts, since, side="left"), np.searchsorted(ts, until, side="right")
+                window = code[lo:hi]
+                out[source] = {a: int(np.count_nonzero(window == c)) for c, a in _ACTIONS.items()}
+            return out
+
+    def consensus(self, now=None, window=None):
+        """
+        Aggregate of the latest signal of every source younger than `window` seconds.
+        Each source votes its action with its confidence; the winner's confidence is
+        its summed confidence over the number of voting sources (a single source
+        keeps its own confidence). Buy/sell ties resolve to hold. None if nothing is fresh.
+        Cached until the next signal arrives or one of the votes expires.
+        """
+        now = time.time() if now is None else now
+        window = self.window if window is None else window
+        with self._lock:
+            cached = self._cached
+            if cached and cached[0] == (self._version, window) and cached[1] <= now < cached[2]:
+                return cached[3]
+
+            fresh = [r.last() for r in self._rings.values()]
+            fresh = [rec for rec in fresh if now - rec["timestamp"] < window]
+            result = None
+            if fresh:
+                weight = {"buy": 0.0, "sell": 0.0, "hold": 0.0}
+                best = {}
+                for rec in fresh:
+                    action = _ACTIONS[SIGNAL_CODES.get(rec["signal"], 0)]
+                    weight[action] += rec["confidence"]
+                    if action not in best or rec["confidence"] > best[action]["confidence"]:
+                        best[action] = rec
+                action = max(weight, key=weight.get)
+                if action != "hold" and weight["buy"] == weight["sell"]:
+                    action = "hold"
+                lead = best.get(action) or max(fresh, key=lambda r: r["confidence"])
+                result = {
+                    "signal": action,
+                    "confidence": weight[action] / len(fresh),
+                    "sentiment": lead["sentiment"],
+                    "reason": lead["reason"],
+                    "timestamp": max(rec["timestamp"] for rec in fresh),
+                    "source": lead["source"],
+                    "sources": len(fresh),
+                    "votes": weight,
+                }
+            # Válido hasta que caduque el voto más antiguo (o llegue una señal nueva)
+            valid_until = min((rec["timestamp"] + window for rec in fresh), default=float("inf"))
+            self._cached = ((self._version, window), now, valid_until, result)
+            return result
+
+    def stats(self):
+        with self._lock:
+            return {"sources": len(self._rings), "stored": sum(r.size for r in self._rings.values()),
+                    "received": self.total, "capacity_per_source": self.capacity}
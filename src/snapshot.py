@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import zlib
+import base64
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# Snapshots del estado en proceso del bot para arranques en caliente.
+# Se guardan cada N ciclos en disco (escritura atómica) o en Redis, y al
+# arrancar se restauran por componentes según su antigüedad.
+# Formato: JSON comprimido. Nada de pickle: el blob puede venir de un Redis
+# compartido y deserializarlo no debe poder ejecutar código. DataFrames y
+# fechas se codifican como objetos etiquetados ("__frame__", "__ts__", "__dt__").
+
+DEFAULT_SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", "state/bot_snapshot.json.z")
+SNAPSHOT_VERSION = 2
+REDIS_KEY = "bot:snapshot"
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_column(values):
+    """Index or Series -> {"dtype", "values"}. Datetimes go as int64 UTC epochs in their own unit."""
+    values = pd.Index(values)
+    if isinstance(values, pd.DatetimeIndex):
+        return {"dtype": str(values.dtype), "values": values.asi8.tolist()}
+    return {"dtype": str(values.dtype), "values": values.tolist()}
+
+
+def _decode_column(column):
+    dtype = pd.api.types.pandas_dtype(column["dtype"])
+    if isinstance(dtype, pd.DatetimeTZDtype):
+        unit, tz = dtype.unit, dtype.tz
+    elif dtype.kind == "M":
+        unit, tz = np.datetime_data(dtype)[0], None
+    else:
+        return pd.Index(column["values"], dtype=dtype)
+    values = pd.DatetimeIndex(np.asarray(column["values"], dtype="int64").view(f"M8[{unit}]"))
+    return values.tz_localize("UTC").tz_convert(tz) if tz else values
+
+
+def _default(obj):
+    if isinstance(obj, pd.DataFrame):
+        index = obj.index
+        default_index = isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1
+        return {"__frame__": {
+            "columns": list(obj.columns),
+            "data": [_encode_column(obj[c]) for c in obj.columns],
+            "index": None if default_index else _encode_column(index),
+        }}
+    if isinstance(obj, pd.Timestamp):
+        return {"__ts__": obj.isoformat()}
+    if isinstance(obj, datetime):
+        return {"__dt__": obj.isoformat()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Tipo no serializable en el snapshot: {type(obj).__name__}")
+
+
+def _object_hook(obj):
+    if len(obj) == 1:
+        if "__frame__" in obj:
+            frame = obj["__frame__"]
+            index = _decode_column(frame["index"]) if frame["index"] is not None else None
+            return pd.DataFrame({c: _decode_column(col) for c, col in zip(frame["columns"], frame["data"])},
+                                index=index)
+        if "__ts__" in obj:
+            return pd.Timestamp(obj["__ts__"])
+        if "__dt__" in obj:
+            return datetime.fromisoformat(obj["__dt__"])
+    return obj
+
+
+def encode_state(state):
+    return zlib.compress(json.dumps(state, default=_default, separators=(",", ":")).encode("utf-8"), level=3)
+
+
+def decode_state(blob):
+    return json.loads(zlib.decompress(blob), object_hook=_object_hook)
+
+
+class StateSnapshotter:
+    def __init__(self, path=DEFAULT_SNAPSHOT_PATH, redis=None, every_cycles=5, max_age_seconds=6 * 3600):
+        self.path = path
+        self.redis = redis
+        self.every_cycles = max(1, every_cycles)
+        self.max_age_seconds = max_age_seconds
+
+    def save(self, state):
+        state = dict(state, version=SNAPSHOT_VERSION, saved_at=time.time())
+        blob = encode_state(state)
+        try:
+            if self.redis:
+                # Upstash REST guarda strings: base64 del blob comprimido
+                self.redis.set(REDIS_KEY, base64.b64encode(blob).decode("ascii"))
+            else:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(blob)
+                os.replace(tmp, self.path)  # atómico: nunca queda un snapshot a medias
+            return len(blob)
+        except Exception as e:
+            logger.error(f"⚠️ Snapshot save failed: {e}")
+            return 0
+
+    def maybe_save(self, cycle, state_fn):
+        """Saves state_fn() every `every_cycles` cycles."""
+        if cycle % self.every_cycles == 0:
+            return self.save(state_fn())
+        return 0
+
+    def load(self):
+        """Returns the last snapshot dict (with 'age' in seconds) or None if missing/stale/corrupt."""
+        try:
+            if self.redis:
+                raw = self.redis.get(REDIS_KEY)
+                if not raw:
+                    return None
+                blob = base64.b64decode(raw)
+            else:
+                if not os.path.exists(self.path):
+                    return None
+                with open(self.path, "rb") as f:
+                    blob = f.read()
+            state = decode_state(blob)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot unreadable, cold start: {e}")
+            return None
+
+        if state.get("version") != SNAPSHOT_VERSION:
+            return None
+        age = time.time() - state.get("saved_at", 0)
+        if age > self.max_age_seconds:
+            logger.info(f"Snapshot too old ({age / 60:.0f} min), cold start.")
+            return None
+        state["age"] = age
+        return state
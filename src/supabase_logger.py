@@ -1,6 +1,6 @@
 import os
-from supabase import create_client, Client
 import logging
+from datetime import datetime, timezone
 
 class SupabaseLogger:
     def __init__(self):
@@ -9,10 +9,12 @@ class SupabaseLogger:
         
         if not url or not key:
             logging.warning("⚠️ Supabase credentials not found. Logging disabled.")
-            self.supabase: Client = None
+            self.supabase = None
         else:
             try:
-                self.supabase: Client = create_client(url, key)
+                # Lazy import: supabase (httpx, postgrest, realtime...) solo si hay credenciales
+                from supabase import create_client
+                self.supabase = create_client(url, key)
                 logging.info("✅ Connected to Supabase for Logging")
             except Exception as e:
                 logging.error(f"❌ Failed to connect to Supabase: {e}")
@@ -39,3 +41,35 @@ class SupabaseLogger:
             # logging.info(f"📝 Logged to Supabase: {response}")
         except Exception as e:
             logging.error(f"❌ Error logging to Supabase: {e}")
+
+    def log_rollup(self, rollup: dict, created_at: str = None) -> bool:
+        """
+        Logs a heartbeat rollup (see src/heartbeat.py) as a single HOLD_ROLLUP row
+        in 'trading_logs'. If SUPABASE_ROLLUP_TABLE is set, the full OHLC /
+        sentiment distribution is also stored in that table.
+        created_at defaults to the write time (the dashboards refresh incrementally
+        on it); backfills such as the compaction job pass the window end instead.
+        The window start goes in its own bucket_start column.
+        """
+        if not self.supabase:
+            return False
+
+        data = {
+            "action": "HOLD_ROLLUP",
+            "price": rollup["close"],
+            "sentiment": rollup["sentiment"],
+            "confidence": rollup["confidence"],
+            "pnl": rollup["pnl"],
+            "created_at": created_at or datetime.now(timezone.utc).isoformat(),
+            "bucket_start": rollup["bucket_start"],
+        }
+
+        try:
+            self.supabase.table("trading_logs").insert(data).execute()
+            rollup_table = os.getenv("SUPABASE_ROLLUP_TABLE")
+            if rollup_table:
+                self.supabase.table(rollup_table).insert(rollup).execute()
+            return True
+        except Exception as e:
+            logging.error(f"❌ Error logging rollup to Supabase: {e}")
+            return False
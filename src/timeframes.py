@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from src.utils import calculate_rsi
+
+# Motor multi-timeframe: una sola serie base (la que se descarga) y los
+# timeframes superiores derivados por agregación OHLCV incremental.
+# Los indicadores de cada nivel se cachean y solo se recalculan desde la
+# primera vela modificada, así que añadir una vela base no recalcula la historia.
+
+OHLCV = ["open", "high", "low", "close", "volume"]
+OHLCV_AGG = {
+    "open": ("open", "first"),
+    "high": ("high", "max"),
+    "low": ("low", "min"),
+    "close": ("close", "last"),
+    "volume": ("volume", "sum"),
+}
+INDICATOR_COLUMNS = ["rsi", "ema_fast", "ema_slow", "macd", "macd_signal", "macd_hist", "sma_50", "sma_200"]
+_UNITS = {"m": "min", "h": "h", "d": "D", "w": "W"}
+
+
+def timeframe_to_timedelta(timeframe):
+    """'5m' -> 5 minutes, '4h' -> 4 hours, '1d' -> 1 day."""
+    unit = timeframe[-1].lower()
+    if unit not in _UNITS or not timeframe[:-1].isdigit():
+        raise ValueError(f"Timeframe no soportado: {timeframe}")
+    return pd.Timedelta(int(timeframe[:-1]), unit=_UNITS[unit])
+
+
+def _seeded_ewm(values, span, seed):
+    """
+    EWM (adjust=False) continuing from a previously computed value.
+    Prepending the seed reproduces exactly the recursion over the full history.
+    """
+    if seed is None or np.isnan(seed):
+        return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+    seeded = np.concatenate(([seed], values))
+    return pd.Series(seeded).ewm(span=span, adjust=False).mean().to_numpy()[1:]
+
+
+class MultiTimeframeEngine:
+    def __init__(self, base_timeframe="30m", timeframes=("1h", "4h", "1d"), settings=None, max_bars=5000):
+        self.base_timeframe = base_timeframe
+        self.settings = settings or {}
+        self.levels = {}
+        base_delta = timeframe_to_timedelta(base_timeframe)
+        for tf in timeframes:
+            delta = timeframe_to_timedelta(tf)
+            if delta < base_delta or delta % base_delta:
+                raise ValueError(f"{tf} no es múltiplo del timeframe base {base_timeframe}")
+            if tf != base_timeframe:
+                self.levels[tf] = delta
+
+        self.lookback = max(200, self.settings.get("rsi_period", 14)) + 1
+        self.max_bars = max(max_bars, 2 * self.lookback)
+
+        empty = pd.DataFrame(columns=OHLCV, dtype=np.float64, index=pd.DatetimeIndex([], name="timestamp"))
+        self._frames = {tf: empty.copy() for tf in [base_timeframe, *self.levels]}
+        self._dirty_from = {tf: None for tf in self._frames}
+        self.stats = {"updates": 0, "aggregated_bars": 0, "indicator_rows": 0}
+
+    @property
+    def timeframes(self):
+        return list(self._frames)
+
+    @staticmethod
+    def _normalize(candles):
+        df = candles
+        if "timestamp" in df.columns:
+            df = df.set_index("timestamp")
+        df = df.reindex(columns=OHLCV).astype(np.float64)
+        df["volume"] = df["volume"].fillna(0.0)
+        df.index = pd.DatetimeIndex(df.index, name="timestamp")
+        df = df[~df.index.duplicated(keep="last")]
+        return df.sort_index()
+
+    def _mark_dirty(self, tf, ts):
+        current = self._dirty_from[tf]
+        self._dirty_from[tf] = ts if current is None else min(current, ts)
+
+    def _trim(self, frame):
+        return frame.iloc[-self.max_bars:] if len(frame) > self.max_bars else frame
+
+    def update(self, candles):
+        """
+        Upserts base-timeframe candles (new bars or a revised last bar).
+        Only the higher-timeframe buckets that contain changed bars are re-aggregated.
+        Returns the number of base bars that actually changed.
+        """
+        new = self._normalize(candles)
+        base = self._frames[self.base_timeframe]
+
+        # Descartar velas idénticas a las ya guardadas (las APIs devuelven ventanas solapadas)
+        if not base.empty and not new.empty:
+            existing = base.reindex(new.index)[OHLCV]
+            changed = ~(existing == new).all(axis=1)
+            new = new[changed.to_numpy()]
+        if new.empty:
+            return 0
+
+        first_changed = new.index[0]
+        if base.empty or first_changed > base.index[-1]:
+            base = pd.concat([base, new]) if not base.empty else new.copy()
+        else:
+            base = pd.concat([base[~base.index.isin(new.index)], new]).sort_index()
+        self._frames[self.base_timeframe] = self._trim(base)
+        self._mark_dirty(self.base_timeframe, first_changed)
+
+        for tf, delta in self.levels.items():
+            start = first_changed.floor(delta)
+            tail = base.loc[start:, OHLCV]
+            agg = tail.groupby(tail.index.floor(delta)).agg(**OHLCV_AGG)
+            agg.index.name = "timestamp"
+            frame = self._frames[tf]
+            frame = pd.concat([frame[frame.index < start], agg]) if not frame.empty else agg
+            self._frames[tf] = self._trim(frame)
+            self._mark_dirty(tf, start)
+            self.stats["aggregated_bars"] += len(agg)
+
+        self.stats["updates"] += 1
+        return len(new)
+
+    def _refresh_indicators(self, tf):
+        since = self._dirty_from[tf]
+        frame = self._frames[tf]
+        if since is None or frame.empty:
+            return
+
+        for col in INDICATOR_COLUMNS:
+            if col not in frame.columns:
+                frame[col] = np.nan
+
+        k = int(frame.index.searchsorted(since))
+        s = max(0, k - self.lookback)
+        window = frame.iloc[s:]
+        close = window["close"]
+
+        settings = self.settings
+        fast = settings.get("macd_fast", 12)
+        slow = settings.get("macd_slow", 26)
+        signal_span = settings.get("macd_signal", 9)
+
+        seed = frame.iloc[k - 1] if k > 0 else None
+        tail_close = frame["close"].to_numpy()[k:]
+        ema_fast = _seeded_ewm(tail_close, fast, seed["ema_fast"] if seed is not None else None)
+        ema_slow = _seeded_ewm(tail_close, slow, seed["ema_slow"] if seed is not None else None)
+        macd = ema_fast - ema_slow
+        macd_signal = _seeded_ewm(macd, signal_span, seed["macd_signal"] if seed is not None else None)
+
+        rows = frame.index[k:]
+        offset = k - s
+        frame.loc[rows, "rsi"] = calculate_rsi(window, settings.get("rsi_period", 14)).to_numpy()[offset:]
+        frame.loc[rows, "ema_fast"] = ema_fast
+        frame.loc[rows, "ema_slow"] = ema_slow
+        frame.loc[rows, "macd"] = macd
+        frame.loc[rows, "macd_signal"] = macd_signal
+        frame.loc[rows, "macd_hist"] = macd - macd_signal
+        frame.loc[rows, "sma_50"] = close.rolling(window=50).mean().to_numpy()[offset:]
+        frame.loc[rows, "sma_200"] = close.rolling(window=200).mean().to_numpy()[offset:]
+
+        self._frames[tf] = frame
+        self._dirty_from[tf] = None
+        self.stats["indicator_rows"] += len(rows)
+
+    def get(self, timeframe=None):
+        """Candles + cached indicators for a timeframe (base timeframe by default)."""
+        tf = timeframe or self.base_timeframe
+        if tf not in self._frames:
+            raise KeyError(f"Timeframe no registrado: {tf}")
+        self._refresh_indicators(tf)
+        return self._frames[tf]
+
+    def get_state(self):
+        """Picklable engine state (frames with cached indicators) for warm restarts."""
+        return {
+            "base_timeframe": self.base_timeframe,
+            "timeframes": list(self._frames),
+            "frames": self._frames,
+            "dirty_from": self._dirty_from,
+        }
+
+    def set_state(self, state):
+        """Restores get_state() output if it was saved with the same timeframes."""
+        if state.get("base_timeframe") != self.base_timeframe or state.get("timeframes") != list(self._frames):
+            return False
+        self._frames = dict(state["frames"])
+        self._dirty_from = dict(state["dirty_from"])
+        return True
+
+    def snapshot(self):
+        """Last close / RSI / trend of every timeframe, for the market status payload."""
+        summary = {}
+        for tf in self._frames:
+            frame = self.get(tf)
+            if frame.empty:
+                continue
+            last = frame.iloc[-1]
+            sma_50 = last.get("sma_50", np.nan)
+            trend = "neutral" if np.isnan(sma_50) else ("up" if last["close"] > sma_50 else "down")
+            summary[tf] = {
+                "close": float(last["close"]),
+                "rsi": None if np.isnan(last["rsi"]) else float(last["rsi"]),
+                "trend": trend,
+            }
+        return summary
@@ -1,26 +1,30 @@
 import os
 import datetime
-import pandas as pd
-from upstash_redis import Redis
-from alpaca.trading.client import TradingClient
-from alpaca.trading.requests import MarketOrderRequest
-from alpaca.trading.enums import OrderSide, TimeInForce
+
+# alpaca-py y upstash_redis son pesados de importar: se cargan solo cuando
+# hay credenciales configuradas (en simulación/backtest nunca se importan).
 
 class Trader:
-    def __init__(self, symbol, stop_loss_pct=0.02, take_profit_pct=0.05):
-        # Normalizar símbolo para Alpaca (Ej: BTC/USD)
-        self.symbol = "BTC/USD"
-        if "ETH" in symbol: self.symbol = "ETH/USD"
+    def __init__(self, symbol, stop_loss_pct=0.02, take_profit_pct=0.05, state_prefix="trader", offline=False):
+        # Normalizar símbolo para Alpaca (Ej: BTC-USD -> BTC/USD); BTC/USD si no se indica.
+        # En cluster cada slot tiene su Trader: el símbolo debe ser el suyo, no siempre BTC
+        self.symbol = symbol.replace("-", "/").upper() if symbol else "BTC/USD"
         
         self.filename = "trading_results.csv"
+        # Claves de estado en Redis: "trader:position" en modo único nodo,
+        # "trader:<SYMBOL>:position" cuando varias réplicas se reparten símbolos
+        self.state_prefix = state_prefix
         
         # --- Redis Connection for State Persistence ---
         url = os.getenv("UPSTASH_REDIS_REST_URL")
         token = os.getenv("UPSTASH_REDIS_REST_TOKEN")
         
+        # offline=True (replay/backtest): sin Redis, sin Alpaca y sin tocar el CSV
+        self.offline = offline
         self.redis = None
-        if url and token:
+        if url and token and not offline:
             try:
+                from upstash_redis import Redis
                 self.redis = Redis(url=url, token=token)
                 self.redis.get("test_connection")
                 print("✅ Connected to Upstash Redis for State Memory")
@@ -38,8 +42,9 @@ class Trader:
         # paper=True se encarga de usar https://paper-api.alpaca.markets
         
         self.trading_client = None
-        if api_key and secret:
+        if api_key and secret and not offline:
             try:
+                from alpaca.trading.client import TradingClient
                 self.trading_client = TradingClient(api_key, secret, paper=True)
                 # Quick test
                 acc = self.trading_client.get_account()
@@ -51,45 +56,45 @@ class Trader:
         
         # --- Estado Inicial (Redis o Local) ---
         if self.redis:
-            if not self.redis.get("trader:position"):
-                self.redis.set("trader:position", "NONE")
-            if not self.redis.get("trader:entry_price"):
-                self.redis.set("trader:entry_price", "0.0")
+            if not self.redis.get(f"{self.state_prefix}:position"):
+                self.redis.set(f"{self.state_prefix}:position", "NONE")
+            if not self.redis.get(f"{self.state_prefix}:entry_price"):
+                self.redis.set(f"{self.state_prefix}:entry_price", "0.0")
         else:
             self._position = "NONE"
             self._entry_price = 0.0
 
         self.virtual_balance = 100000.0 # Paper starting balance sim
 
-        if not os.path.exists(self.filename):
+        if not offline and not os.path.exists(self.filename):
             with open(self.filename, "w") as f:
                 f.write("timestamp,action,price,reason,profit_pct\n")
 
     @property
     def position(self):
         if self.redis:
-            val = self.redis.get("trader:position")
+            val = self.redis.get(f"{self.state_prefix}:position")
             return val if val else "NONE"
         return self._position
 
     @position.setter
     def position(self, value):
         if self.redis:
-            self.redis.set("trader:position", value)
+            self.redis.set(f"{self.state_prefix}:position", value)
         else:
             self._position = value
 
     @property
     def entry_price(self):
         if self.redis:
-            val = self.redis.get("trader:entry_price")
+            val = self.redis.get(f"{self.state_prefix}:entry_price")
             return float(val) if val else 0.0
         return self._entry_price
 
     @entry_price.setter
     def entry_price(self, value):
         if self.redis:
-            self.redis.set("trader:entry_price", str(value))
+            self.redis.set(f"{self.state_prefix}:entry_price", str(value))
         else:
             self._entry_price = value
 
@@ -148,6 +153,8 @@ class Trader:
         # --- REAL TRADING via ALPACA ---
         if self.trading_client:
             try:
+                from alpaca.trading.requests import MarketOrderRequest
+                from alpaca.trading.enums import OrderSide, TimeInForce
                 alpaca_side = OrderSide.BUY if side == "buy" else OrderSide.SELL
                 
                 # Market Order
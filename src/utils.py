@@ -45,3 +45,24 @@ def add_indicators(df: pd.DataFrame, settings: dict) -> pd.DataFrame:
     df['sma_200'] = df['close'].rolling(window=200).mean()
     
     return df
+
+def add_indicators_panel(closes: np.ndarray, settings: dict) -> dict:
+    """
+    Same indicator set as add_indicators, computed for many series at once.
+    closes is a (time, symbols) float64 array; every output is the same shape.
+    """
+    panel = {'close': pd.DataFrame(np.asarray(closes, dtype=np.float64))}
+    macd, signal, hist = calculate_macd(
+        panel,
+        settings.get('macd_fast', 12),
+        settings.get('macd_slow', 26),
+        settings.get('macd_signal', 9)
+    )
+    return {
+        'rsi': calculate_rsi(panel, settings.get('rsi_period', 14)).to_numpy(),
+        'macd': macd.to_numpy(),
+        'macd_signal': signal.to_numpy(),
+        'macd_hist': hist.to_numpy(),
+        'sma_50': panel['close'].rolling(window=50).mean().to_numpy(),
+        'sma_200': panel['close'].rolling(window=200).mean().to_numpy(),
+    }
@@ -1,10 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, HTTPException
 from pydantic import BaseModel
 import pandas as pd
 import numpy as np
+from src.keyword_scorer import KeywordScorer
+from src.series_codec import decode_series, encode_series, MEDIA_TYPE
+from src.utils import add_indicators_panel
 
 app = FastAPI()
 
+# Léxico ponderado (config/sentiment_lexicon.json o $TECH_BRAIN_LEXICON), compilado una vez
+scorer = KeywordScorer.from_file()
+
 # Task: Technical / Backup Brain
 # This app is lightweight (no PyTorch/Transformers) and serves two purposes:
 # 1. Backup for Sentiment Analysis (Rule-based/Heuristic)
@@ -22,64 +28,67 @@ async def analyze(request: AnalyzeRequest):
     """
     Fallback Sentiment Analysis using simple Heuristics/Keywords.
     This acts as a backup if the main FinBERT brain is down.
+    The whole batch is scored in one pass of the compiled lexicon regex.
     """
     texts = request.texts
     if not texts:
         return []
-    
-    results = []
-    bullish_keywords = ['buy', 'bull', 'up', 'gain', 'profit', 'surge', 'high', 'breakout']
-    bearish_keywords = ['sell', 'bear', 'down', 'loss', 'drop', 'crash', 'low', 'dump']
-
-    for text in texts:
-        text_lower = text.lower()
-        score = 0
-        
-        # Simple keyword scoring
-        for word in bullish_keywords:
-            if word in text_lower: score += 0.1
-        for word in bearish_keywords:
-            if word in text_lower: score -= 0.1
-            
-        # Normalize score to [-1, 1] roughly
-        score = max(min(score, 0.99), -0.99)
-        
-        label = "neutral"
-        if score > 0.1: label = "positive"
-        elif score < -0.1: label = "negative"
-        
-        results.append({"label": label, "score": abs(score)})
 
-    return results
+    return scorer.classify_batch(texts)
 
 @app.post("/indicators")
 async def calculate_rsi(request: IndicatorRequest):
     """
-    Example of offloaded technical calculation (RSI).
-    This keeps the main client light.
+    Offloaded RSI for a single JSON price list.
+    Uses the same full-series calculation as src/utils.calculate_rsi.
     """
     prices = request.prices
     period = request.period
     
-    if len(prices) < period:
+    # period cambios de precio necesitan period + 1 precios
+    if period < 1 or len(prices) <= period:
         return {"error": "Not enough data"}
 
-    start_delta = np.diff(prices)
-    up = start_delta.clip(min=0)
-    down = -1 * start_delta.clip(max=0)
-    
-    # We generally can't do full RSI without more history, but this shows intent.
-    # Simple SMA of gains/losses
-    avg_up = np.mean(up[-period:])
-    avg_down = np.mean(down[-period:])
+    rsi = add_indicators_panel(np.asarray(prices, dtype=np.float64)[:, None], {"rsi_period": period})["rsi"][-1, 0]
+    if np.isnan(rsi):
+        # Ventana plana: ni ganancias ni pérdidas (0/0). Solo subidas ya da 100 (gain/0 = inf)
+        rsi = 50.0
+    return {"rsi": float(rsi)}
+
+@app.post("/indicators/batch")
+async def calculate_indicators_batch(request: Request, rsi_period: int = 14, macd_fast: int = 12,
+                                     macd_slow: int = 26, macd_signal: int = 9):
+    """
+    Batched indicator service.
+    Body: src/series_codec payload with a 'close' column per symbol.
+    Returns the same format with the add_indicators set (rsi, macd,
+    macd_signal, macd_hist, sma_50, sma_200) for the whole series.
+    Symbols with equal length are stacked and computed in one vectorized pass.
+    """
+    try:
+        series = decode_series(await request.body())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid payload: {e}")
+
+    settings = {"rsi_period": rsi_period, "macd_fast": macd_fast,
+                "macd_slow": macd_slow, "macd_signal": macd_signal}
+
+    by_length = {}
+    for name, columns in series.items():
+        if "close" not in columns:
+            raise HTTPException(status_code=400, detail=f"Series {name} has no 'close' column")
+        by_length.setdefault(len(columns["close"]), []).append(name)
+
+    results = {}
+    for length, names in by_length.items():
+        closes = np.column_stack([series[name]["close"] for name in names])
+        panel = add_indicators_panel(closes, settings)
+        for j, name in enumerate(names):
+            results[name] = {col: values[:, j] for col, values in panel.items()}
 
-    if avg_down == 0:
-        rsi = 100
-    else:
-        rs = avg_up / avg_down
-        rsi = 100 - (100 / (1 + rs))
-        
-    return {"rsi": rsi}
+    # Mantener el orden de entrada
+    results = {name: results[name] for name in series}
+    return Response(content=encode_series(results), media_type=MEDIA_TYPE)
 
 if __name__ == "__main__":
     import uvicorn